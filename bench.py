@@ -0,0 +1,33 @@
+#!/usr/bin/python
+"""
+Design by Contract in Python - benchmark runner.
+
+@description: This module runs the benchmarks for the Design by Contract functionality in python-dbc module.
+              Use C{--save=FILE} to save the results as a baseline, and C{--compare=FILE}
+              to fail (with the exit code 1) if any scenario regressed beyond the threshold.
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+import sys, optparse
+
+import bench
+
+
+if __name__ == "__main__":
+    p = optparse.OptionParser(usage='%prog [options]')
+    p.add_option('-s', '--save', metavar='FILE', help='save the results as the baseline')
+    p.add_option('-c', '--compare', metavar='FILE', help='compare the results against the baseline')
+    p.add_option('-t', '--threshold', type='float', default=0.25,
+                 help='the allowed relative regression, for --compare (default: 0.25)')
+    p.add_option('-k', '--pattern', default='',
+                 help='run only the scenarios containing this substring')
+    options, args = p.parse_args()
+
+    results = bench.run(pattern=options.pattern)
+    if options.save:
+        bench.save(results, options.save)
+    if options.compare:
+        if bench.compare(results, options.compare, options.threshold):
+            sys.exit(1)
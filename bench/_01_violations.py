@@ -0,0 +1,61 @@
+#!/usr/bin/python
+"""
+The contract violation path with large arguments.
+
+Some callers catch the violation exceptions as a normal fallback path,
+so raising them should not depend on the size of the offending value;
+only rendering the message (which is bounded in size) may take longer.
+"""
+from dbc import contract_epydoc, typed
+
+
+BIG_LIST = range(1000000)
+
+
+@contract_epydoc
+def f_typed(a):
+    """
+    @type a: dict
+    """
+    return a
+
+
+@contract_epydoc
+def f_precondition(a):
+    """
+    @type a: list
+    @precondition: len(a) < 10
+    """
+    return a
+
+
+def violate_type():
+    try:
+        f_typed(BIG_LIST)
+    except TypeError, e:
+        return e
+
+
+def violate_precondition():
+    try:
+        f_precondition(BIG_LIST)
+    except ValueError, e:
+        return e
+
+
+def violate_typed():
+    try:
+        typed(BIG_LIST, dict)
+    except AssertionError, e:
+        return e
+
+
+def render_type_violation():
+    return str(violate_type())
+
+
+SCENARIOS = (('raise_type_violation', violate_type),
+             ('raise_precondition_violation', violate_precondition),
+             ('raise_typed_violation', violate_typed),
+             ('raise_and_render_type_violation', render_type_violation),
+            )
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+"""
+The resident memory occupied by the decorated functions.
+
+Every scenario defines a lot of similar functions in a new module, calls each of them once,
+and reports the growth of the resident memory per function, compared to the same functions
+not decorated.
+"""
+import gc, sys, imp, resource
+from itertools import count
+
+from dbc import contract_epydoc
+
+
+NUMBER_OF_FUNCTIONS = 2000
+
+FUNCTION_TEMPLATE = '''
+@contract_epydoc
+def f_%(i)i(a, b=None):
+    """
+    @type a: int
+    @type b: (int, NoneType)
+    @precondition: a > 0
+    @precondition: b is None or b > a
+    @postcondition: result >= a
+    @rtype: int
+    """
+    return a
+'''
+
+_module_counter = count()
+
+
+def _get_rss():
+    """
+    @return: The current resident memory of the process, in bytes.
+    @rtype: int
+    """
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize()
+    except IOError:
+        # Not precise: this is the peak resident memory.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _define_functions(decorated):
+    """
+    @return: The growth of the resident memory per function, in bytes.
+    @rtype: float
+    """
+    name = '_dbc_bench_memory_%i' % next(_module_counter)
+    module = imp.new_module(name)
+    sys.modules[name] = module
+    module.__dict__.update(contract_epydoc=contract_epydoc if decorated else (lambda f: f),
+                           NoneType=type(None))
+    source = ''.join(FUNCTION_TEMPLATE % {'i': i} for i in xrange(NUMBER_OF_FUNCTIONS))
+
+    gc.collect()
+    before = _get_rss()
+    exec compile(source, name, 'exec') in module.__dict__
+    for i in xrange(NUMBER_OF_FUNCTIONS):
+        getattr(module, 'f_%i' % i)(5)
+    gc.collect()
+    return float(_get_rss() - before) / NUMBER_OF_FUNCTIONS
+
+
+def bytes_per_decorated_function():
+    # Warm up, so that the one-time allocations are not counted.
+    _define_functions(decorated=True)
+    return _define_functions(decorated=True) - _define_functions(decorated=False)
+
+
+MEMORY_SCENARIOS = (('bytes_per_decorated_function', bytes_per_decorated_function),
+                   )
@@ -0,0 +1,26 @@
+#!/usr/bin/python
+"""
+The helper functions: typed(), ntyped() and consists_of(), for the sequences of several sizes;
+and consists_of() for the same immutable sequence checked repeatedly.
+"""
+from collections import Mapping
+
+from dbc import typed, ntyped, consists_of
+
+
+SIZES = (10, 1000, 100000)
+
+_sequences = dict((size, range(size)) for size in SIZES)
+_mappings = [{}] * 1000
+_frozen = tuple(xrange(100000))
+
+
+SCENARIOS = [('typed', lambda: typed(5, int)),
+             ('typed_tuple', lambda: typed(5.0, (int, long, float))),
+             ('typed_abc', lambda: typed({}, Mapping)),
+             ('ntyped', lambda: ntyped(5, int)),
+             ('ntyped_none', lambda: ntyped(None, int)),
+             ('consists_of_abc_1000', lambda: consists_of(_mappings, Mapping)),
+            ] + [('consists_of_%i' % size, (lambda seq: lambda: consists_of(seq, int))(_sequences[size]))
+                     for size in SIZES] + \
+            [('consists_of_same_tuple_100000', lambda: consists_of(_frozen, int))]
@@ -0,0 +1,168 @@
+#!/usr/bin/python
+"""
+The functions decorated with contract_epydoc: the decoration time,
+and the per-call overhead depending on the number of the contract clauses,
+the way the arguments are passed, and the depth of the stack;
+and the same functions with the contracts inlined by dbc.inline,
+or given as the type objects and callables to dbc.contract;
+and the range of the array argument, given as the @range field or as the precondition;
+and the shapes of the array arguments;
+and the calls outside of the sampled requests, with dbc.sampling enabled;
+and the calls with the expensive clauses left out by the tier chosen for the module.
+"""
+import sys, imp
+from array import array
+
+import dbc
+from dbc import contract_epydoc, contract, set_tier
+from dbc.inline import transform
+from dbc.sampling import Sampler
+
+
+def _source(n_clauses, decorated=False):
+    """
+    @return: The source of the function of two arguments, with C{n_clauses} clauses in its contract.
+    """
+    lines = ['@type a: int', '@type b: int', '@precondition: a > 0',
+             '@precondition: b > 0', '@rtype: int', '@postcondition: result > 0']
+    lines.extend('@precondition: a + b > %i' % -i for i in xrange(max(0, n_clauses - len(lines))))
+    return (('from dbc import contract_epydoc\n'
+             '@contract_epydoc\n' if decorated else '') +
+            'def f(a, b):\n'
+            '    """\n'
+            '    %s\n'
+            '    """\n'
+            '    return a + b\n' % '\n    '.join(lines[:n_clauses]))
+
+
+def _make_function(n_clauses):
+    """
+    @return: The new undecorated function of two arguments, with C{n_clauses} clauses in its contract.
+    """
+    namespace = {'__name__': __name__}
+    exec _source(n_clauses) in namespace
+    return namespace['f']
+
+
+def _make_inlined(n_clauses):
+    """
+    @return: The new function of two arguments, with C{n_clauses} clauses in its contract inlined.
+    """
+    namespace = {'__name__': __name__}
+    exec transform(_source(n_clauses, decorated=True), __name__, __file__) in namespace
+    return namespace['f']
+
+
+f0, f1, f5, f20 = [contract_epydoc(_make_function(n)) for n in (0, 1, 5, 20)]
+f_raw = _make_function(5)
+f5_inlined, f20_inlined = _make_inlined(5), _make_inlined(20)
+
+
+def _make_tiered(tier):
+    """
+    @return: The new function of two arguments, with one cheap and four expensive preconditions,
+             decorated in the module checked up to the given tier.
+    """
+    module = imp.new_module('%s_%s' % (__name__, tier))
+    sys.modules[module.__name__] = module
+    set_tier(tier, module=module.__name__)
+    exec ('from dbc import contract_epydoc\n'
+          '@contract_epydoc\n'
+          'def f(a, b):\n'
+          '    """\n'
+          '    @precondition: a > 0  # cheap\n'
+          '    %s\n'
+          '    """\n'
+          '    return a + b\n' % '\n    '.join('@precondition: a + b + %i in range(100)  # expensive' % -i
+                                              for i in xrange(4))) in module.__dict__
+    return module.f
+
+
+f_tiers_paranoid, f_tiers_cheap = _make_tiered('paranoid'), _make_tiered('cheap')
+
+
+def _decorate_args(function):
+    """
+    @return: The function decorated with the same 5-clause contract as by _make_function(5),
+             given to dbc.contract.
+    """
+    return contract(types={'a': int, 'b': int}, rtype=int,
+                    preconditions=[lambda a: a > 0, lambda b: b > 0],
+                    postconditions=[lambda result: result > 0])(function)
+
+
+f5_args = _decorate_args(_make_function(0))
+
+
+@contract_epydoc
+def f_range(a):
+    """
+    @range a: [0.0, 1.0)
+    """
+    return a
+
+
+@contract_epydoc
+def f_range_loop(a):
+    """
+    @precondition: all(0.0 <= x < 1.0 for x in a)
+    """
+    return a
+
+
+@contract_epydoc
+def f_shapes(a, b):
+    """
+    @shape a: (n,)
+    @dtype a: float64
+    @shape b: (n,)
+    @rshape: (n,)
+    """
+    return a
+
+
+_array = array('d', (i / 100000.0 for i in xrange(100000)))
+
+
+# The state of the thread handling no sampled request.
+_unsampled = Sampler(rate=0.0).state
+
+
+def _call_unsampled(function):
+    dbc._sampling = _unsampled
+    try:
+        return function(1, 2)
+    finally:
+        dbc._sampling = None
+
+
+def _at_depth(depth, function):
+    if depth:
+        return _at_depth(depth - 1, function)
+    else:
+        return function(1, 2)
+
+
+SCENARIOS = (('decorate', lambda: contract_epydoc(_make_function(5))),
+             ('decorate_args', lambda: _decorate_args(_make_function(0))),
+             ('call_raw', lambda: f_raw(1, 2)),
+             ('call_0_clauses', lambda: f0(1, 2)),
+             ('call_1_clause', lambda: f1(1, 2)),
+             ('call_5_clauses', lambda: f5(1, 2)),
+             ('call_20_clauses', lambda: f20(1, 2)),
+             ('call_5_clauses_inlined', lambda: f5_inlined(1, 2)),
+             ('call_20_clauses_inlined', lambda: f20_inlined(1, 2)),
+             ('call_5_clauses_args', lambda: f5_args(1, 2)),
+             ('call_keywords', lambda: f5(a=1, b=2)),
+             ('call_range_scalar', lambda: f_range(0.5)),
+             ('call_range_array_100000', lambda: f_range(_array)),
+             ('call_range_loop_100000', lambda: f_range_loop(_array)),
+             ('call_shapes_100000', lambda: f_shapes(_array, _array)),
+             ('call_unsampled_raw', lambda: _call_unsampled(f_raw)),
+             ('call_unsampled_5_clauses', lambda: _call_unsampled(f5)),
+             ('call_unsampled_20_clauses', lambda: _call_unsampled(f20)),
+             ('call_tiers_paranoid', lambda: f_tiers_paranoid(1, 2)),
+             ('call_tiers_cheap', lambda: f_tiers_cheap(1, 2)),
+             ('call_at_depth_50_raw', lambda: _at_depth(50, f_raw)),
+             ('call_at_depth_50', lambda: _at_depth(50, f5)),
+            )
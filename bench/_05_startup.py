@@ -0,0 +1,71 @@
+#!/usr/bin/python
+"""
+The startup time: importing the module of the functions with the contracts,
+with the contracts checked, with dbc disabled, stripped by dbc.release and inlined by dbc.inline;
+compared to importing the same module without the contracts.
+The bytecode of the modules is cached, as it usually is (even if PYTHONDONTWRITEBYTECODE is set).
+"""
+import os, sys, atexit, shutil, tempfile
+
+import dbc, dbc.inline, dbc.release
+
+
+_FUNCTIONS = 50
+
+
+def _source(contracted):
+    """
+    @return: The source of the module with C{_FUNCTIONS} functions, with the contracts or not.
+    """
+    lines = ['from dbc import contract_epydoc, typed\n' if contracted else '']
+    for i in xrange(_FUNCTIONS):
+        lines.append('%s'
+                     'def f%i(a, b):\n'
+                     '    """\n'
+                     '    @type a: int\n'
+                     '    @type b: int\n'
+                     '    @precondition: a > 0\n'
+                     '    @rtype: int\n'
+                     '    @postcondition: result > a\n'
+                     '    """\n'
+                     '    return %s + b\n' % ('@contract_epydoc\n' if contracted else '',
+                                              i,
+                                              'typed(a, int)' if contracted else 'a'))
+    return '\n'.join(lines)
+
+
+_directory = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, _directory)
+for _name, _contracted in (('dbc_bench_uncontracted', False), ('dbc_bench_contracted', True)):
+    with open(os.path.join(_directory, _name + '.py'), 'w') as _fh:
+        _fh.write(_source(_contracted))
+
+
+def _import(name, hook=None, enabled=True):
+    """
+    Import the module from scratch.
+
+    @param hook: The module (dbc.inline or dbc.release) which import hook should be installed for the import.
+    """
+    sys.modules.pop(name, None)
+    sys.path.insert(0, _directory)
+    dont_write_bytecode, sys.dont_write_bytecode = sys.dont_write_bytecode, False
+    old_enabled, dbc.ENABLED = dbc.ENABLED, enabled
+    if hook is not None:
+        hook.install(name)
+    try:
+        __import__(name)
+    finally:
+        if hook is not None:
+            hook.uninstall()
+        dbc.ENABLED = old_enabled
+        sys.dont_write_bytecode = dont_write_bytecode
+        sys.path.remove(_directory)
+
+
+SCENARIOS = (('import_uncontracted', lambda: _import('dbc_bench_uncontracted')),
+             ('import_contracted', lambda: _import('dbc_bench_contracted')),
+             ('import_disabled', lambda: _import('dbc_bench_contracted', enabled=False)),
+             ('import_release', lambda: _import('dbc_bench_contracted', hook=dbc.release)),
+             ('import_inlined', lambda: _import('dbc_bench_contracted', hook=dbc.inline)),
+            )
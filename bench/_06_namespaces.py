@@ -0,0 +1,87 @@
+#!/usr/bin/python
+"""
+The per-call overhead depending on the size of the namespaces the clauses are evaluated in:
+the number of the module globals, and the number of the function arguments.
+
+The clauses should be evaluated right in the module globals and in the arguments, so the work
+(and the memory allocated) on every call should grow with the number of the arguments only,
+not with the number of the module globals. The functions taking C{**kwargs} have their clauses
+evaluated one by one, rather than together; so both ways are measured.
+
+The memory scenarios count the bytes of all the distinct dictionaries the clauses are evaluated in,
+per call (except the module globals themselves): copying the globals would make them grow with
+the number of the globals.
+"""
+import sys, imp
+from itertools import count
+
+
+_module_counter = count()
+
+
+def _make_function(n_globals, n_args, kwargs=False, preconditions=None, postconditions=None):
+    """
+    @return: The new function decorated with contract_epydoc, with a precondition and a postcondition
+             for every argument (unless the clauses are given), in the new module having C{n_globals} globals.
+    """
+    name = '_dbc_bench_namespaces_%i' % next(_module_counter)
+    module = imp.new_module(name)
+    sys.modules[name] = module
+    module.__dict__.update(('global_%i' % i, i) for i in xrange(n_globals))
+    args = ['a%i' % i for i in xrange(n_args)]
+    if preconditions is None:
+        preconditions = ['%s > 0' % a for a in args]
+    if postconditions is None:
+        postconditions = ['result > %s' % a for a in args]
+    exec ('from dbc import contract_epydoc\n'
+          '@contract_epydoc\n'
+          'def f(%s):\n'
+          '    """\n'
+          '    %s\n'
+          '    %s\n'
+          '    """\n'
+          '    return %s\n' % (', '.join(args + (['**kwargs'] if kwargs else [])),
+                               '\n    '.join('@precondition: %s' % c for c in preconditions),
+                               '\n    '.join('@postcondition: %s' % c for c in postconditions),
+                               ' + '.join(args))) in module.__dict__
+    return module.f
+
+
+f_globals_10, f_globals_10000 = _make_function(10, 2), _make_function(10000, 2)
+f_kwargs_globals_10, f_kwargs_globals_10000 = _make_function(10, 2, kwargs=True), _make_function(10000, 2, kwargs=True)
+f_args_20 = _make_function(10, 20)
+_args_20 = range(1, 21)
+
+
+# The clauses recording the namespaces they are evaluated in.
+_RECORDING = ['_seen.append(globals()) is None', '_seen.append(locals()) is None'] * 2
+
+
+def _namespace_bytes(n_globals, n_args, kwargs=False, calls=100):
+    """
+    @return: The size of the distinct dictionaries (but the module globals) the clauses
+             are evaluated in, per call.
+    """
+    f = _make_function(n_globals, n_args, kwargs, _RECORDING, _RECORDING)
+    module_globals = f._dbc_contract.def_globals
+    module_globals['_seen'] = seen = []
+    args = range(1, n_args + 1)
+    for i in xrange(calls):
+        f(*args)
+    namespaces = dict((id(d), d) for d in seen if d is not module_globals)
+    return float(sum(sys.getsizeof(d) for d in namespaces.itervalues())) / calls
+
+
+SCENARIOS = (('call_globals_10', lambda: f_globals_10(1, 2)),
+             ('call_globals_10000', lambda: f_globals_10000(1, 2)),
+             ('call_kwargs_globals_10', lambda: f_kwargs_globals_10(1, 2)),
+             ('call_kwargs_globals_10000', lambda: f_kwargs_globals_10000(1, 2)),
+             ('call_args_20', lambda: f_args_20(*_args_20)),
+            )
+
+MEMORY_SCENARIOS = (('namespace_bytes_globals_10', lambda: _namespace_bytes(10, 2)),
+                    ('namespace_bytes_globals_10000', lambda: _namespace_bytes(10000, 2)),
+                    ('namespace_bytes_kwargs_globals_10', lambda: _namespace_bytes(10, 2, kwargs=True)),
+                    ('namespace_bytes_kwargs_globals_10000', lambda: _namespace_bytes(10000, 2, kwargs=True)),
+                    ('namespace_bytes_args_20', lambda: _namespace_bytes(10, 20)),
+                   )
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+"""
+The record classes generated by dbc.records: the cost of assigning the instance variables
+(checked, unchecked, and in the plain class), and the memory occupied by every instance,
+compared to the plain class with the per-instance __dict__.
+"""
+import sys
+
+import dbc
+from dbc.records import record
+
+
+_DOCSTRING = """
+    @ivar x: The abscissa.
+    @type x: float
+    @ivar y: The ordinate.
+    @type y: float
+    @ivar label: The name.
+    @type label: str
+    """
+
+
+class Plain(object):
+    __doc__ = _DOCSTRING
+
+    def __init__(self, x, y, label):
+        self.x = x
+        self.y = y
+        self.label = label
+
+
+Checked = record(type('Checked', (object,), {'__doc__': _DOCSTRING}))
+dbc.ENABLED = False
+try:
+    Unchecked = record(type('Unchecked', (object,), {'__doc__': _DOCSTRING}))
+finally:
+    dbc.ENABLED = True
+
+_plain, _checked, _unchecked = Plain(1.0, 2.0, 'a'), Checked(1.0, 2.0, 'a'), Unchecked(1.0, 2.0, 'a')
+
+
+def _set(instance):
+    instance.x = 3.0
+
+
+def bytes_per_plain_instance():
+    return sys.getsizeof(_plain) + sys.getsizeof(_plain.__dict__)
+
+
+def bytes_per_record_instance():
+    return sys.getsizeof(_checked)
+
+
+SCENARIOS = (('set_plain', lambda: _set(_plain)),
+             ('set_checked', lambda: _set(_checked)),
+             ('set_unchecked', lambda: _set(_unchecked)),
+             ('get_checked', lambda: _checked.x),
+             ('create_plain', lambda: Plain(1.0, 2.0, 'a')),
+             ('create_checked', lambda: Checked(1.0, 2.0, 'a')),
+             ('create_unchecked', lambda: Unchecked(1.0, 2.0, 'a')),
+            )
+
+MEMORY_SCENARIOS = (('bytes_per_plain_instance', bytes_per_plain_instance),
+                    ('bytes_per_record_instance', bytes_per_record_instance),
+                   )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Design by Contract in Python - benchmarks.
+
+@description: This module measures the overhead of the Design by Contract functionality in python-dbc module.
+              Every benchmark module defines the C{SCENARIOS} sequence of C{(name, function)} pairs;
+              each function is called repeatedly without arguments, and the time per call is reported.
+              Also, the benchmark module may define the C{MEMORY_SCENARIOS} sequence of C{(name, function)} pairs;
+              each function is called once and returns the measured memory amount in bytes.
+
+              The results may be saved as a baseline, and later compared against it,
+              to find the scenarios which regressed beyond the threshold.
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+import sys, json
+from timeit import default_timer as _timer
+
+modules = ("_01_violations",
+           "_02_memory",
+           "_03_helpers",
+           "_04_calls",
+           "_05_startup",
+           "_06_namespaces",
+           "_07_records",
+          )
+
+for m in modules:
+    exec("%(name)s = __import__('%(name)s', globals(), locals())" % {"name": m})
+
+
+def measure(function, min_time=0.2, repeat=3):
+    """
+    Call the function repeatedly (at least for C{min_time} seconds), and find the time per call;
+    take the best of C{repeat} such measurements.
+
+    @param function: The function to call, without arguments.
+    @type function: callable
+
+    @type min_time: float
+    @type repeat: int
+
+    @return: The best time per call, in seconds.
+    @rtype: float
+    """
+    number = 1
+    while True:
+        start = _timer()
+        for i in xrange(number):
+            function()
+        elapsed = _timer() - start
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed * 10 < min_time else 2
+
+    best = elapsed / number
+    for r in xrange(repeat - 1):
+        start = _timer()
+        for i in xrange(number):
+            function()
+        best = min(best, (_timer() - start) / number)
+    return best
+
+
+def run(stream=sys.stdout, pattern=''):
+    """
+    Run all the benchmarks and print the time per call (or the memory amount) for each scenario.
+
+    @param pattern: Run only the scenarios containing this substring in their names.
+
+    @return: The time per call (in seconds) or the memory amount (in bytes) for each scenario,
+             by the scenario name.
+    @rtype: dict
+    """
+    results = {}
+    gl = globals()
+    for m in modules:
+        for name, function in getattr(gl[m], 'SCENARIOS', ()):
+            full_name = '%s.%s' % (m.lstrip('_0123456789'), name)
+            if pattern in full_name:
+                results[full_name] = per_call = measure(function)
+                stream.write('%-50s %12.3f us\n' % (full_name, per_call * 1e6))
+        for name, function in getattr(gl[m], 'MEMORY_SCENARIOS', ()):
+            full_name = '%s.%s' % (m.lstrip('_0123456789'), name)
+            if pattern in full_name:
+                results[full_name] = amount = function()
+                stream.write('%-50s %12.0f bytes\n' % (full_name, amount))
+    return results
+
+
+def save(results, path):
+    """
+    Save the results of L{run} as the baseline.
+    """
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=1, sort_keys=True)
+
+
+def compare(results, path, threshold, stream=sys.stdout):
+    """
+    Compare the results of L{run} against the saved baseline.
+
+    @param threshold: The allowed relative growth of the time (or memory) for every scenario,
+                      like 0.25 for 25%.
+    @type threshold: float
+
+    @return: The names of the scenarios which regressed beyond the threshold.
+    @rtype: list
+    """
+    with open(path) as fh:
+        baseline = json.load(fh)
+
+    regressions = []
+    stream.write('%-50s %12s\n' % ('scenario', 'change'))
+    for name in sorted(results):
+        if name not in baseline:
+            stream.write('%-50s %12s\n' % (name, 'new'))
+            continue
+        ratio = results[name] / baseline[name] if baseline[name] else 1.0
+        regressed = ratio > 1 + threshold
+        stream.write('%-50s %+11.1f%%%s\n' % (name, (ratio - 1) * 100, '  REGRESSION' if regressed else ''))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    run()
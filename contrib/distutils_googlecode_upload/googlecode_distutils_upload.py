@@ -57,6 +57,9 @@ class upload(distutils.core.Command):
                    ' ("none" means not to use svn auth data)'),
                   ('user=', 'u',
                    'Google Code username'),
+                  ('upload-url=', None,
+                   'URL to upload to'
+                   ' [default: https://PROJECT.googlecode.com/files]'),
                   ]
   boolean_options = ['src', 'windows']
 
@@ -66,6 +69,7 @@ class upload(distutils.core.Command):
     self.dist_dir = None
     self.config_dir = None
     self.user = None
+    self.upload_url = None
 
   def finalize_options(self):
     # Validate src and windows options.
@@ -79,8 +83,8 @@ class upload(distutils.core.Command):
     else:
       self.set_undefined_options('bdist_wininst', ('dist_dir', 'dist_dir'))
 
-    # Do nothing for config-dir and user; upload_find_auth does the
-    # right thing when they're None.
+    # Do nothing for config-dir, user and upload-url; upload_find_auth does
+    # the right thing when they're None.
 
   def run(self):
     name = self.distribution.get_name()
@@ -108,7 +112,8 @@ class upload(distutils.core.Command):
     (status, reason,
      file_url) = googlecode_upload.upload_find_auth(fn, name, summary,
                                                     labels, self.config_dir,
-                                                    self.user)
+                                                    self.user,
+                                                    upload_url=self.upload_url)
 
     if file_url is None:
       sys.stderr.write('error: %s (%d)\n' % (reason, status))
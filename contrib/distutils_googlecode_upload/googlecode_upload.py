@@ -54,6 +54,14 @@ import optparse
 import getpass
 import base64
 import sys
+import urlparse
+
+
+# The size of the chunks the file is read and sent in.
+CHUNK_SIZE = 64 * 1024
+
+BOUNDARY = '----------Googlecode_boundary_reindeer_flotilla'
+CRLF = '\r\n'
 
 
 def get_svn_config_dir():
@@ -104,9 +112,18 @@ def get_svn_auth(project_name, config_dir):
   return result
 
 
-def upload(file, project_name, user_name, password, summary, labels=None):
+def get_upload_url(project_name):
+  """Return the default URL to upload the files of project_name to."""
+  return 'https://%s.googlecode.com/files' % project_name
+
+
+def upload(file, project_name, user_name, password, summary, labels=None,
+           upload_url=None):
   """Upload a file to a Google Code project's file server.
 
+  The file is sent in chunks of CHUNK_SIZE bytes, so the memory used does
+  not depend on the size of the file.
+
   Args:
     file: The local path to the file.
     project_name: The name of your project on Google Code.
@@ -115,6 +132,9 @@ def upload(file, project_name, user_name, password, summary, labels=None):
               Note that this is NOT your global Google Account password!
     summary: A small description for the file.
     labels: an optional list of label strings with which to tag the file.
+    upload_url: The http:// or https:// URL to upload the file to
+                (e.g. of a local test server); get_upload_url(project_name)
+                by default.
 
   Returns: a tuple:
     http_status: 201 if the upload succeeded, something else if an
@@ -122,6 +142,58 @@ def upload(file, project_name, user_name, password, summary, labels=None):
     http_reason: The human-readable string associated with http_status
     file_url: If the upload succeeded, the URL of the file on Google
               Code, None otherwise.
+
+  For example, uploading to a local server, which receives the body
+  encode_upload_request() builds in one piece:
+
+  >>> import BaseHTTPServer, os, tempfile, threading
+  >>> received = {}
+  >>> class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+  ...   def do_POST(self):
+  ...     received['length'] = int(self.headers['Content-Length'])
+  ...     received['body'] = self.rfile.read(received['length'])
+  ...     self.send_response(201)
+  ...     self.send_header('Location', 'http://localhost/files/x.txt')
+  ...     self.end_headers()
+  ...   def log_message(self, *args):
+  ...     pass
+  >>> httpd = BaseHTTPServer.HTTPServer(('localhost', 0), Handler)
+  >>> thread = threading.Thread(target=httpd.handle_request)
+  >>> thread.start()
+  >>> directory = tempfile.mkdtemp()
+  >>> path = os.path.join(directory, 'x.txt')
+  >>> open(path, 'wb').write('x' * (3 * CHUNK_SIZE + 1))
+  >>> upload(path, 'project', 'user@gmail.com', 'secret', 'Summary',
+  ...        ['a', ' b'], 'http://localhost:%d/files' % httpd.server_port)
+  (201, 'Created', 'http://localhost/files/x.txt')
+  >>> thread.join(); httpd.server_close()
+  >>> fields = [('summary', 'Summary'), ('label', 'a'), ('label', 'b')]
+  >>> received['body'] == encode_upload_request(fields, path)[1]
+  True
+  >>> received['length'] == len(received['body'])
+  True
+  >>> print received['body'][:received['body'].index('x' * 10)]
+  ... # doctest: +NORMALIZE_WHITESPACE
+  ------------Googlecode_boundary_reindeer_flotilla
+  Content-Disposition: form-data; name="summary"
+  <BLANKLINE>
+  Summary
+  ------------Googlecode_boundary_reindeer_flotilla
+  Content-Disposition: form-data; name="label"
+  <BLANKLINE>
+  a
+  ------------Googlecode_boundary_reindeer_flotilla
+  Content-Disposition: form-data; name="label"
+  <BLANKLINE>
+  b
+  ------------Googlecode_boundary_reindeer_flotilla
+  Content-Disposition: form-data; name="filename"; filename="x.txt"
+  Content-Type: application/octet-stream
+  <BLANKLINE>
+  <BLANKLINE>
+  >>> received['body'].endswith('x' + CRLF + '--' + BOUNDARY + '--' + CRLF)
+  True
+  >>> os.remove(path); os.rmdir(directory)
   """
   # The login is the user part of user@gmail.com. If the login provided
   # is in the full user@domain form, strip it down.
@@ -132,19 +204,32 @@ def upload(file, project_name, user_name, password, summary, labels=None):
   if labels is not None:
     form_fields.extend([('label', l.strip()) for l in labels])
 
-  content_type, body = encode_upload_request(form_fields, file)
+  content_type, content_length, body = encode_upload_stream(form_fields, file)
 
-  upload_host = '%s.googlecode.com' % project_name
-  upload_uri = '/files'
+  if upload_url is None:
+    upload_url = get_upload_url(project_name)
+  scheme, upload_host, upload_uri, query, fragment = urlparse.urlsplit(
+      upload_url)
+  if query:
+    upload_uri += '?' + query
   auth_token = base64.b64encode('%s:%s'% (user_name, password))
   headers = {
     'Authorization': 'Basic %s' % auth_token,
     'User-Agent': 'Googlecode.com uploader v0.9.4',
     'Content-Type': content_type,
+    'Content-Length': str(content_length),
     }
 
-  server = httplib.HTTPSConnection(upload_host)
-  server.request('POST', upload_uri, body, headers)
+  if scheme == 'http':
+    server = httplib.HTTPConnection(upload_host)
+  else:
+    server = httplib.HTTPSConnection(upload_host)
+  server.putrequest('POST', upload_uri or '/')
+  for name, value in headers.items():
+    server.putheader(name, value)
+  server.endheaders()
+  for chunk in body:
+    server.send(chunk)
   resp = server.getresponse()
   server.close()
 
@@ -155,18 +240,23 @@ def upload(file, project_name, user_name, password, summary, labels=None):
   return resp.status, resp.reason, location
 
 
-def encode_upload_request(fields, file_path):
-  """Encode the given fields and file into a multipart form body.
+def encode_upload_stream(fields, file_path, chunk_size=CHUNK_SIZE):
+  """Encode the given fields and file into a streamed multipart form body.
 
   fields is a sequence of (name, value) pairs. file is the path of
   the file to upload. The file will be uploaded to Google Code with
   the same file name.
 
-  Returns: (content_type, body) ready for httplib.HTTP instance
-  """
-  BOUNDARY = '----------Googlecode_boundary_reindeer_flotilla'
-  CRLF = '\r\n'
+  The body is the same as encode_upload_request() returns, but the file
+  is read only while the body is iterated, chunk_size bytes at a time.
+
+  Returns: (content_type, content_length, body), where body is the
+  iterator over the strings of the body.
 
+  Raises:
+    IOError: if the file cannot be read, or its size has changed while
+             the body is iterated.
+  """
   body = []
 
   # Add the metadata about the upload first
@@ -180,9 +270,7 @@ def encode_upload_request(fields, file_path):
 
   # Now add the file itself
   file_name = os.path.basename(file_path)
-  f = open(file_path, 'rb')
-  file_content = f.read()
-  f.close()
+  file_size = os.path.getsize(file_path)
 
   body.extend(
     ['--' + BOUNDARY,
@@ -191,20 +279,58 @@ def encode_upload_request(fields, file_path):
      # The upload server determines the mime-type, no need to set it.
      'Content-Type: application/octet-stream',
      '',
-     file_content,
+     '',
      ])
+  head = CRLF.join(body)
 
   # Finalize the form body
-  body.extend(['--' + BOUNDARY + '--', ''])
+  tail = CRLF.join(['', '--' + BOUNDARY + '--', ''])
+
+  def iter_body():
+    yield head
+    f = open(file_path, 'rb')
+    try:
+      remaining = file_size
+      while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+          break
+        remaining -= len(chunk)
+        yield chunk
+      if remaining or f.read(1):
+        raise IOError('%s has changed while being uploaded' % file_path)
+    finally:
+      f.close()
+    yield tail
+
+  return ('multipart/form-data; boundary=%s' % BOUNDARY,
+          len(head) + file_size + len(tail),
+          iter_body())
+
+
+def encode_upload_request(fields, file_path):
+  """Encode the given fields and file into a multipart form body.
 
-  return 'multipart/form-data; boundary=%s' % BOUNDARY, CRLF.join(body)
+  fields is a sequence of (name, value) pairs. file is the path of
+  the file to upload. The file will be uploaded to Google Code with
+  the same file name.
+
+  The whole file is read into memory; see encode_upload_stream() for
+  the large files.
+
+  Returns: (content_type, body) ready for httplib.HTTP instance
+  """
+  content_type, content_length, body = encode_upload_stream(fields, file_path)
+  return content_type, ''.join(body)
 
 
 def upload_find_auth(file_path, project_name, summary, labels=None,
-                     config_dir=None, user_name=None, tries=3):
+                     config_dir=None, user_name=None, tries=3,
+                     upload_url=None):
   """Find credentials and upload a file to a Google Code project's file server.
 
-  file_path, project_name, summary, and labels are passed as-is to upload.
+  file_path, project_name, summary, labels, and upload_url are passed as-is
+  to upload.
 
   If config_dir is None, try get_svn_config_dir(); if it is 'none', skip
   trying the Subversion configuration entirely.  If user_name is not None, use
@@ -218,6 +344,7 @@ def upload_find_auth(file_path, project_name, summary, labels=None,
     config_dir: Path to Subversion configuration directory, 'none', or None.
     user_name: Your Google account name.
     tries: How many attempts to make.
+    upload_url: The URL to upload the file to, if not the default one.
   """
 
   if config_dir != 'none':
@@ -248,7 +375,7 @@ def upload_find_auth(file_path, project_name, summary, labels=None,
       password = getpass.getpass()
 
     status, reason, url = upload(file_path, project_name, user_name, password,
-                                 summary, labels)
+                                 summary, labels, upload_url)
     # Returns 403 Forbidden instead of 401 Unauthorized for bad
     # credentials as of 2007-07-17.
     if status in [httplib.FORBIDDEN, httplib.UNAUTHORIZED]:
@@ -276,6 +403,9 @@ def main():
                     help='Your Google Code username')
   parser.add_option('-l', '--labels', dest='labels',
                     help='An optional list of labels to attach to the file')
+  parser.add_option('--url', dest='url', metavar='URL',
+                    help='upload to URL instead of'
+                         ' https://PROJECT.googlecode.com/files')
 
   options, args = parser.parse_args()
 
@@ -297,7 +427,8 @@ def main():
 
   status, reason, url = upload_find_auth(file_path, options.project,
                                          options.summary, labels,
-                                         options.config_dir, options.user)
+                                         options.config_dir, options.user,
+                                         upload_url=options.url)
   if url:
     print 'The file was uploaded successfully.'
     print 'URL: %s' % url
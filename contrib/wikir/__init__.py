@@ -224,6 +224,17 @@ You can publish a module's docstring written in RST format to Wiki format like s
     | Akimbo could live on [http://code.google.com/hosting/ Google Code] if it wanted to.
     | 
 
+Publishing Many Documents At Once
++++++++++++++++++++++++++++++++++
+
+Given several sources, directories (walked for ``.py``, ``.txt`` and ``.rst`` files), dotted module names or the ``--output-dir`` option, `wikir` writes every document to a ``.wiki`` file instead of STDOUT::
+
+    $ wikir -o wiki/ mypackage/ README.txt mypackage.extra
+
+Under the output directory, every document keeps the path of its source relative to the walked directory, to the current directory, or following the module name.  The modules without a docstring found in the directories are skipped.
+
+The documents are rendered in parallel by a pool of worker processes (``-j N``; by default, as many as there are CPUs).  The rendered documents are cached by the hash of their RST in ``~/.wikir-cache`` (see ``--cache-dir`` and ``--no-cache``), so only the changed documents are rendered again, and the ``.wiki`` files which would not change are not rewritten.  The same is available programmatically as ``publish_batch()``.
+
 Using Wikir Programatically
 ---------------------------
 
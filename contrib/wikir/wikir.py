@@ -1,6 +1,6 @@
 """core"""
 
-import re, pydoc, optparse, inspect
+import os, re, sys, copy, errno, hashlib, pkgutil, pydoc, optparse, inspect
 import tokenize
 import docutils.core
 from docutils import nodes
@@ -13,6 +13,9 @@ except ImportError:
 wiki_word_re = re.compile(r'^[A-Z][a-z]+(?:[A-Z][a-z]+)+')
 auto_url_re = re.compile(r'^(http|https|ftp)\://')
 
+class NoDocstringError(ValueError):
+    """The module has no docstring to publish."""
+
 def split_doc_from_module(modfile):
     docstring = None
     f = open(modfile,'r')
@@ -24,7 +27,7 @@ def split_doc_from_module(modfile):
             # we went too far
             break
     if docstring is None:
-        raise ValueError("could not find docstring in %s" % modfile)
+        raise NoDocstringError("could not find docstring in %s" % modfile)
     docstring = docstring[3:]
     docstring = docstring[:-3]
     return pydoc.splitdoc(docstring)
@@ -358,17 +361,244 @@ def publish_string(rstdoc, **kw):
     kw['settings_overrides'].update(settings_overrides)
     return docutils.core.publish_string(rstdoc, **kw)
 
+# the extensions of the sources found when walking the directories in batch mode:
+batch_extensions = ('.py', '.txt', '.rst')
+# bump when the Wiki output changes, to invalidate the cached documents:
+cache_version = 1
+default_cache_dir = os.path.join('~', '.wikir-cache')
+
+def read_source(source):
+    """
+    Return the RST text of `source`: the top-most docstring of a module (given as a path to
+    a ``.py`` file), or the whole contents of any other file.
+    """
+    if source.endswith('.py'):
+        short_desc, long_desc = split_doc_from_module(source)
+        return long_desc
+    f = open(source, 'r')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+def find_sources(sources):
+    """
+    Yield ``(path, relative path, walked)`` for every RST source among `sources`: the paths to
+    the files, the dotted names of the modules, and the directories, which are walked for
+    the files with `batch_extensions` (`walked` is true for those).  The relative path is relative
+    to the walked directory, follows the module name, or is the path to the file relative
+    to the current directory.  Raise ValueError if a source cannot be found.
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(batch_extensions):
+                        path = os.path.join(dirpath, filename)
+                        yield path, os.path.relpath(path, source), True
+        elif os.path.exists(source):
+            relpath = os.path.normpath(source)
+            if os.path.isabs(relpath) or relpath.startswith(os.pardir):
+                relpath = os.path.splitdrive(os.path.abspath(source))[1].lstrip(os.sep)
+            yield source, relpath, False
+        elif re.match(r'^[\w.]+$', source) and not source.endswith(batch_extensions):
+            try:
+                loader = pkgutil.get_loader(source)
+            except ImportError:
+                loader = None
+            if loader is None:
+                raise ValueError("could not find module %s" % source)
+            path = loader.get_filename()
+            if path.endswith(('.pyc', '.pyo')):
+                path = path[:-1]
+            if os.path.splitext(os.path.basename(path))[0] == '__init__':
+                yield path, os.path.join(source.replace('.', os.sep), '__init__.py'), False
+            else:
+                yield path, source.replace('.', os.sep) + '.py', False
+        else:
+            raise ValueError("no such file or directory: %s" % source)
+
+def _cache_key(text):
+    return hashlib.sha1('%s\0%r\0%s' % (cache_version, sorted(settings_overrides.items()), text)).hexdigest()
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError, e:
+        if e.errno != errno.EEXIST:
+            raise
+
+def _write_if_changed(path, data):
+    if os.path.exists(path):
+        f = open(path, 'rb')
+        try:
+            if f.read() == data:
+                return
+        finally:
+            f.close()
+    _makedirs(os.path.dirname(path) or os.curdir)
+    f = open(path, 'wb')
+    try:
+        f.write(data)
+    finally:
+        f.close()
+
+# the publisher settings, built once per process and reused for every document in batch mode:
+_batch_settings = None
+
+def _publish_batch_item(text):
+    """Publish one document in batch mode; return ``(output, error)``."""
+    global _batch_settings
+    if _batch_settings is None:
+        publisher = docutils.core.Publisher(writer=WikiWriter())
+        publisher.set_components('standalone', 'restructuredtext', None)
+        _batch_settings = publisher.get_settings(**settings_overrides)
+        # raise the errors rather than exit the worker:
+        _batch_settings.traceback = True
+    try:
+        return docutils.core.publish_string(text, writer=WikiWriter(),
+                                            settings=copy.copy(_batch_settings)), None
+    except Exception, e:
+        return None, '%s: %s' % (e.__class__.__name__, e)
+
+def publish_batch(sources, output_dir=None, cache_dir=default_cache_dir, processes=None):
+    """
+    Publish many RST documents in Wiki format.
+
+    `sources` are as for `find_sources`.  Every document is written to a ``.wiki`` file, next to
+    its source or (keeping its relative path) under `output_dir`; the files which would not change
+    are not rewritten.  The rendered documents are cached under `cache_dir` (unless it is None)
+    by the hash of their RST text, so the unchanged sources are not rendered again.
+    The rest are rendered by a pool of `processes` worker processes (by default, as many as
+    there are CPUs), every one reusing the same publisher settings for all its documents.
+
+    The modules without a docstring found by walking the directories are skipped.
+    Two sources would never be written to the same ``.wiki`` file: the later one fails instead.
+
+    Return the list of ``(source, wiki path)`` pairs for the published documents
+    and the list of ``(source, error)`` pairs for the failed ones.
+
+    >>> import tempfile, shutil
+    >>> directory, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    >>> def write(name, text):
+    ...     with open(os.path.join(directory, name), 'w') as fh:
+    ...         fh.write(text)
+    >>> write('a.txt', 'Hello *world*\\n')
+    >>> write('b.py', "'''Hello **world**'''\\n")
+    >>> write('c.py', 'x = 1\\n')  # no docstring: skipped
+    >>> published, failed = publish_batch([directory], cache_dir=cache_dir, processes=2)
+    >>> [os.path.basename(wiki_path) for source, wiki_path in published], failed
+    (['a.wiki', 'b.wiki'], [])
+    >>> print open(os.path.join(directory, 'a.wiki')).read().strip()
+    Hello _world_
+
+    The unchanged sources are not rendered again:
+
+    >>> rendered = []
+    >>> render = publish_batch.func_globals['_publish_batch_item']
+    >>> publish_batch.func_globals['_publish_batch_item'] = lambda text: rendered.append(text) or render(text)
+    >>> len(publish_batch([directory], cache_dir=cache_dir, processes=1)[0]), rendered
+    (2, [])
+    >>> write('a.txt', 'Hello again\\n')
+    >>> len(publish_batch([directory], cache_dir=cache_dir, processes=1)[0]), rendered
+    (2, ['Hello again\\n'])
+    >>> publish_batch.func_globals['_publish_batch_item'] = render
+    >>> shutil.rmtree(directory), shutil.rmtree(cache_dir)
+    (None, None)
+    """
+    if cache_dir is not None:
+        cache_dir = os.path.expanduser(cache_dir)
+    published, failed, pending = [], [], []
+    wiki_sources = {}  # wiki path -> the source written to it
+    for source, relpath, walked in find_sources(sources):
+        if output_dir is None:
+            wiki_path = os.path.splitext(source)[0] + '.wiki'
+        else:
+            wiki_path = os.path.join(output_dir, os.path.splitext(relpath)[0] + '.wiki')
+        wiki_key = os.path.normcase(os.path.abspath(wiki_path))
+        if wiki_key in wiki_sources:
+            if os.path.abspath(wiki_sources[wiki_key]) != os.path.abspath(source):
+                failed.append((source, "would overwrite %s published from %s" % (wiki_path, wiki_sources[wiki_key])))
+            continue
+        try:
+            text = read_source(source)
+        except NoDocstringError, e:
+            if not walked:
+                failed.append((source, str(e)))
+            continue
+        except (IOError, ValueError), e:
+            failed.append((source, str(e)))
+            continue
+        wiki_sources[wiki_key] = source
+        key = _cache_key(text)
+        cache_path = os.path.join(cache_dir, key[:2], key) if cache_dir is not None else None
+        if cache_path is not None and os.path.exists(cache_path):
+            f = open(cache_path, 'rb')
+            try:
+                _write_if_changed(wiki_path, f.read())
+            finally:
+                f.close()
+            published.append((source, wiki_path))
+        else:
+            pending.append((source, wiki_path, cache_path, text))
+
+    texts = [item[-1] for item in pending]
+    if len(texts) > 1 and processes != 1:
+        import multiprocessing
+        processes = processes or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_publish_batch_item, texts, chunksize=max(1, len(texts) // (4 * processes)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(_publish_batch_item, texts)
+
+    for (source, wiki_path, cache_path, text), (output, error) in zip(pending, results):
+        if error is not None:
+            failed.append((source, error))
+            continue
+        _write_if_changed(wiki_path, output)
+        if cache_path is not None:
+            _write_if_changed(cache_path, output)
+        published.append((source, wiki_path))
+    return published, failed
+
 def main():
     """Publish RST documents in Wiki format
     
     1. finds the top-most docstring of module.py, parses as RST, and prints Wiki format to STDOUT
     2. parses file.txt (or a file with any other extension) as RST and prints Wiki format to STDOUT
+    3. with several sources, directories (walked for .py, .txt and .rst files), dotted module names
+       or the --output-dir option, writes every document to a .wiki file, rendering in parallel
+       and skipping the documents which RST has not changed since they were cached
     """
     p = optparse.OptionParser(usage=('%prog [options] path/to/module.py' "\n" 
-                              '       %prog [options] path/to/file.txt' "\n\n") + inspect.getdoc(main))
+                              '       %prog [options] path/to/file.txt' "\n"
+                              '       %prog [options] SOURCE [SOURCE ...]' "\n\n") + inspect.getdoc(main))
+    p.add_option('-o', '--output-dir', help='write the .wiki files under this directory '
+                                            '(default: next to the sources)')
+    p.add_option('-j', '--jobs', type='int', help='the number of the worker processes (default: the number of CPUs)')
+    p.add_option('--cache-dir', default=default_cache_dir,
+                 help='the cache of the rendered documents (default: %default)')
+    p.add_option('--no-cache', dest='cache_dir', action='store_const', const=None,
+                 help='render every document, without the cache')
     (options, args) = p.parse_args()
-    if len(args)!=1:
+    if not args:
         p.error('incorrect args')
+    if len(args) > 1 or options.output_dir is not None or \
+       os.path.isdir(args[0]) or not os.path.exists(args[0]):
+        try:
+            published, failed = publish_batch(args, options.output_dir, options.cache_dir, options.jobs)
+        except ValueError, e:
+            sys.exit('%s: error: %s' % (p.get_prog_name(), e))
+        for source, wiki_path in published:
+            print wiki_path
+        for source, error in failed:
+            print >> sys.stderr, '%s: %s' % (source, error)
+        sys.exit(1 if failed else 0)
     source = args[0]
     if source.endswith('.py'):
         short_desc, long_desc = split_doc_from_module(source)
@@ -13,6 +13,24 @@ Two module-level variables are available to control the behaviour:
     to contract_epydoc. This may occupy and even leak memory in rare cases (though it is obviously
     less important than enabling the whole functionality).
     Default value it True.
+3. C{REORDER_PRECONDITIONS} - controls whether the preconditions of a function are evaluated
+    in the order of their cost (estimated at first, then measured at runtime) rather than in the order
+    they are declared in the docstring, so that the cheap failing clauses are detected first.
+    Whenever a violation is found, the clauses are re-checked in the declared order,
+    so the reported violation is the same as without the reordering. The preconditions
+    which may be evaluated together are fused in the measured order, once it stops changing.
+    Default value it True.
+
+The violations may be recorded rather than raised, see the L{dbc.report} module.
+The calls and violations may be counted across the processes, see the L{dbc.stats} module.
+The evaluated and violated clauses may be recorded, see the L{dbc.coverage} module.
+The expensive postconditions may be checked in background, see the L{dbc.deferred} module.
+The contracts may be inlined into the functions at import time, see the L{dbc.inline} module.
+The contracts may be stripped at import time in the release builds, see the L{dbc.release} module.
+The contracts may be kept checked even with the docstrings stripped by C{python -OO}, see the L{dbc.sidecar} module.
+The contracts may be checked only for the sampled requests, see the L{dbc.sampling} module.
+The clauses may be marked with their cost tier, to check only the cheap ones, see L{set_tier}.
+The compact typed record classes may be generated from the class docstrings, see the L{dbc.records} module.
 
 @description: This project enables to use the basics of Design by Contract capabilities in Python,
               such as enforcing the contracts defined in the epydoc documentation.
@@ -22,12 +40,19 @@ Two module-level variables are available to control the behaviour:
 @url: http://code.google.com/p/python-dbc/
 """
 
-__all__ = ('typed', 'ntyped', 'consists_of', 'contract_epydoc')
+__all__ = ('typed', 'ntyped', 'consists_of', 'contract_epydoc', 'contract', 'set_tier', 'get_tier')
 
-import sys, inspect
+import os, re, sys, inspect, ast, numbers, warnings
+from repr import Repr
+from abc import ABCMeta
 from itertools import izip, chain
+from collections import namedtuple
+from operator import attrgetter
+from timeit import default_timer as _timer
 from functools import wraps
-from types import NoneType, ClassType
+from types import NoneType, ClassType, CodeType, FunctionType
+from array import array as _array
+from weakref import WeakSet
 
 
 # Is the functionality enabled? May leak memory under load and heavy
@@ -35,7 +60,168 @@ from types import NoneType, ClassType
 ENABLED = True
 # Are the epydoc parsers cached? May hog memory a bit.
 USE_EPYDOC_CACHE = True
+# Are the preconditions evaluated cheapest-first?
+REORDER_PRECONDITIONS = True
+
+# Functions which take the same time regardless of their arguments.
+_CHEAP_CALLS = frozenset(('len', 'isinstance', 'issubclass', 'callable', 'hasattr', 'type', 'id', 'bool', 'abs'))
+# Functions which most likely iterate over their arguments.
+_LINEAR_CALLS = frozenset(('all', 'any', 'sum', 'min', 'max', 'sorted', 'set', 'frozenset', 'list', 'tuple',
+                           'dict', 'map', 'filter', 'reduce', 'zip', 'consists_of'))
+# Every which call the clauses are timed.
+_CLAUSE_TIMING_PERIOD = 16
+# Every which call the clauses are reordered according to their timings.
+_CLAUSE_REORDER_PERIOD = 256
+
+# How many type(value) -> bool results are memoized for every expected type.
+_TYPE_CHECK_CACHE_SIZE = 256
+# How many expected types have their checkers memoized.
+_TYPE_CHECKERS_SIZE = 1024
+# How many immutable sequences are remembered for every expected type as having passed consists_of().
+_VALIDATED_CACHE_SIZE = 256
+# The immutable sequences shorter than that are just rescanned.
+_VALIDATED_MIN_SIZE = 16
+
+# The reporter which records the violations instead of raising them;
+# set by dbc.report.enable() for the report-only mode.
+_reporter = None
+# The cross-process counters of the calls and violations;
+# set by dbc.stats.enable().
+_stats = None
+# The coverage of the contract clauses;
+# set by dbc.coverage.enable().
+_coverage = None
+# The background checker of the deferred postconditions;
+# set by dbc.deferred.enable().
+_deferred = None
+# The thread-local sampling decision of the current request;
+# set by dbc.sampling.enable().
+_sampling = None
+
+# The postconditions ending with this comment are deferred, see the dbc.deferred module.
+_DEFERRED_RE = re.compile(r'#\s*deferred\s*$')
+
+# The cost tiers of the clauses, from the cheapest, see set_tier().
+_TIERS = ('cheap', 'normal', 'expensive', 'paranoid')
+# The tier of the clauses not marked with any.
+_DEFAULT_TIER = _TIERS.index('normal')
+# The clauses ending with the comment naming the tier (maybe followed by the other comment,
+# like "# deferred") are of that tier.
+_TIER_RE = re.compile(r'#\s*(%s)\s*(?=#|$)' % '|'.join(_TIERS))
+# The most expensive tier of the clauses checked, globally and for the modules and packages by name;
+# initially, taken from the DBC_TIER environment variable.
+_tier = len(_TIERS) - 1
+_module_tiers = {}
+# The contracts having the clauses above the cheapest tier, to select their clauses whenever the tier is changed.
+_tiered_contracts = WeakSet()
+
+# The values in the violation messages are shown in the size-bounded form.
+_repr = Repr()
+_repr.maxlevel = 3
+_repr.maxtuple = _repr.maxlist = _repr.maxarray = _repr.maxdict = 10
+_repr.maxset = _repr.maxfrozenset = _repr.maxdeque = 10
+_repr.maxstring = _repr.maxother = 200
+_repr.maxlong = 100
+
+
+class _BoundedRepr(object):
+    """
+    A proxy for a value to be put into a violation message, which C{repr()} is limited in size.
+    """
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return str(self.obj)
+
+    def __repr__(self):
+        return _repr.repr(self.obj)
+
+
+class _ViolationMessage(object):
+    """
+    The message of a contract violation. It is rendered only when it is actually needed
+    (e.g. when the exception is printed), and all the C{%r} values are shown in a size-bounded form.
+
+    >>> str(_ViolationMessage('Value %r is not %s', range(1000000), 'good'))
+    'Value [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...] is not good'
+    """
+    __slots__ = ('template', 'params')
+
+    def __init__(self, template, *params):
+        self.template = template
+        self.params = params
+
+    def __str__(self):
+        return self.template % tuple(_BoundedRepr(p) for p in self.params)
+
+    def __repr__(self):
+        return repr(str(self))
+
+
+def _violation(exc_type, value, template, *params):
+    """
+    Create the exception for a contract violation.
+
+    @param exc_type: The class of the exception, like C{TypeError} or C{ValueError}.
+    @param value: The offending value; it is available as the C{value} attribute of the exception.
+    @param template: The message template; the C{params} are substituted into it
+        only when the message is rendered.
+
+    >>> e = _violation(TypeError, 'abc', 'Value %r is bad', 'abc')
+    >>> e.value, str(e)
+    ('abc', "Value 'abc' is bad")
+    """
+    exc = exc_type(_ViolationMessage(template, *params))
+    exc.value = value
+    return exc
+
 
+class Caller(namedtuple('Caller', 'filename lineno function')):
+    """
+    The place the function was called from, for the violations which are the caller's fault
+    (the argument types and the preconditions); available as the C{caller} attribute of the exception.
+    """
+    __slots__ = ()
+
+
+def _fail(f_path, clause, exc, tb=None, caller=None):
+    """
+    Raise the violation; or, in the report-only mode, just record it.
+
+    @param clause: The violated part of the contract (used to deduplicate the records).
+    @type clause: basestring
+
+    @param tb: The traceback to raise the exception with, if any.
+
+    @param caller: The frame of the caller, if the violation is the caller's fault.
+    """
+    if caller is not None:
+        exc.caller = Caller(caller.f_code.co_filename, caller.f_lineno, caller.f_code.co_name)
+
+    stats = _stats
+    if stats is not None:
+        stats.count(f_path, 1)
+
+    reporter = _reporter
+    if reporter is None:
+        raise exc, None, tb
+    reporter.record(f_path, clause, exc)
+
+
+def _get_caller_frame():
+    """
+    Find the frame which called the wrapped function, looking up from the contract checking code.
+    Called only when the violation is found, so the successful calls don't pay for it.
+
+    @return: The frame, or C{None} if not called from inside the wrapper.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code is not _WRAPPER_CODE:
+        frame = frame.f_back
+    return frame.f_back if frame is not None else None
 
 
 def typed(var, types):
@@ -63,8 +249,11 @@ def typed(var, types):
       ...
     AssertionError: Value None of type <type 'NoneType'> is not among the allowed types: <type 'int'>
     """
-    assert isinstance(var, types), \
-        'Value %r of type %r is not among the allowed types: %r' % (var, type(var), types)
+    if __debug__ and type(var) is not types:
+        checker = _type_checker(types)
+        if not (checker(var) if checker.cached else isinstance(var, types)):
+            raise _violation(AssertionError, var,
+                             'Value %r of type %r is not among the allowed types: %r', var, type(var), types)
     return var
 
 
@@ -90,8 +279,11 @@ def ntyped(var, types):
 
     >>> c = ntyped(None, int) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
     """
-    assert var is None or isinstance(var, types), \
-        'Value %r of type %r is not among the allowed types: NoneType, %r' % (var, type(var), types)
+    if __debug__ and var is not None and type(var) is not types:
+        checker = _type_checker(types)
+        if not (checker(var) if checker.cached else isinstance(var, types)):
+            raise _violation(AssertionError, var,
+                             'Value %r of type %r is not among the allowed types: NoneType, %r', var, type(var), types)
     return var
 
 
@@ -114,8 +306,10 @@ def consists_of(seq, types):
     False
     >>> consists_of([5, 6, 7, 'abc'], (int, str))
     True
+
+    The large tuples and frozensets which passed the check once are not rescanned again.
     """
-    return all(isinstance(element, types) for element in seq)
+    return _type_checker(types).all_of(seq)
 
 
 def _rpdb2():
@@ -147,31 +341,47 @@ def _get_function_base_path_from_stack(stack):
     return '.'.join(base_function_list)
 
 
-def _parse_str_to_value(f_path, value_str, entity_name, _globals, _locals):
+def _parse_str_to_value(f_path, value_str, entity_name, _globals, _locals, code=None, binds_names=True):
     """
     This function performs parsing
+
+    The value is evaluated right in the given namespaces, without copying them;
+    only the locals are copied if the value binds any names (see L{_Expression}).
+
+    @param code: The already compiled C{value_str}, if available.
+    @param binds_names: Whether the value binds any names while evaluated.
     """
     try:
-        expected_value = eval(value_str, dict(_globals), dict(_locals))
+        expected_value = eval(value_str if code is None else code,
+                              _globals,
+                              dict(_locals) if binds_names else _locals)
     except Exception, e:
-        import traceback; traceback.print_exc()
+        # Keep the original traceback, rather than printing it.
         raise SyntaxError('%s:\n'
                           'The following %s '
-                          'could not be parsed: %s\n' % (f_path,
-                                                         entity_name,
-                                                         value_str))
+                          'could not be parsed: %s\n'
+                          '%s: %s' % (f_path,
+                                      entity_name,
+                                      value_str,
+                                      type(e).__name__,
+                                      e)), None, sys.exc_info()[2]
     return expected_value
 
 
-def _parse_str_to_type(f_path, type_str, entity_name, _globals=None, _locals=None):
+def _parse_str_to_type(f_path, type_str, entity_name, _globals=None, _locals=None, code=None, binds_names=True):
     """
+    @param code: The already compiled C{type_str}, if available.
+    @param binds_names: Whether the type definition binds any names while evaluated.
+
     @raises SyntaxError: If the string cannot be parsed as a valid type.
     """
     expected_type = _parse_str_to_value(f_path,
                                         type_str,
                                         'type definition for %s' % entity_name,
                                         _globals,
-                                        _locals)
+                                        _locals,
+                                        code=code,
+                                        binds_names=binds_names)
 
     if not isinstance(expected_type, (type, tuple, ClassType)):
         raise SyntaxError('%s:\n'
@@ -185,6 +395,1701 @@ def _parse_str_to_type(f_path, type_str, entity_name, _globals=None, _locals=Non
     return expected_type
 
 
+def _iter_types(types):
+    """
+    @return: The iterable over all the types in the (possibly nested) tuple of types.
+    """
+    if isinstance(types, tuple):
+        return chain.from_iterable(_iter_types(t) for t in types)
+    else:
+        return (types,)
+
+
+class _TypeChecker(object):
+    """
+    The callable performing C{isinstance(value, types)} check for the given types.
+
+    If any of the types has a custom metaclass (e.g. it is an ABC), where C{isinstance()}
+    may be much slower than for the concrete types, the results are memoized by the type of the value;
+    the memo is bounded in size and is cleared whenever any ABC gains a new registration.
+    The values which C{__class__} differs from their type (like proxies or old-style class instances)
+    are never memoized.
+
+    Also, the large tuples and frozensets (which elements cannot be replaced) which all elements passed
+    the check are remembered by their ids, so checking the same sequence again is O(1).
+    The memo refers to the sequences, so their ids cannot be reused while they are remembered;
+    it is bounded in size, and is cleared together with the memo of the results.
+
+    >>> class Sized(object):
+    ...     __metaclass__ = ABCMeta
+    >>> checker = _TypeChecker((int, Sized))
+    >>> checker.cached, checker(5), checker([]), checker([])
+    (True, True, False, False)
+    >>> Sized.register(list)
+    >>> checker([])
+    True
+    >>> _TypeChecker((int, str)).cached
+    False
+
+    >>> checker = _TypeChecker(int)
+    >>> seq = tuple(xrange(100))
+    >>> checker.all_of(seq), id(seq) in checker.validated
+    (True, True)
+    >>> checker.all_of(seq + ('abc',))
+    False
+    """
+    __slots__ = ('types', 'cached', 'results', 'counter', 'validated')
+
+    def __init__(self, types):
+        self.types = types
+        self.cached = any(type(t) not in (type, ClassType) for t in _iter_types(types))
+        self.results = {}
+        self.counter = ABCMeta._abc_invalidation_counter
+        self.validated = {}  # id(sequence) -> sequence
+
+    def _invalidate(self):
+        """
+        Forget the memoized results if any ABC gained a new registration since they were memoized.
+        """
+        if self.counter != ABCMeta._abc_invalidation_counter:
+            self.results.clear()
+            self.validated.clear()
+            self.counter = ABCMeta._abc_invalidation_counter
+
+    def all_of(self, seq):
+        """
+        @return: Whether all the elements of the sequence pass the check.
+        @rtype: bool
+        """
+        remembered = type(seq) in (tuple, frozenset) and len(seq) >= _VALIDATED_MIN_SIZE
+        if remembered:
+            if self.cached:
+                self._invalidate()
+            if id(seq) in self.validated:
+                return True
+
+        if self.cached:
+            result = all(self(element) for element in seq)
+        else:
+            types = self.types
+            result = all(isinstance(element, types) for element in seq)
+
+        if result and remembered:
+            if len(self.validated) >= _VALIDATED_CACHE_SIZE:
+                self.validated.clear()
+            self.validated[id(seq)] = seq
+        return result
+
+    def __call__(self, value):
+        if not self.cached:
+            return isinstance(value, self.types)
+
+        if self.counter != ABCMeta._abc_invalidation_counter:
+            self._invalidate()
+
+        value_type = type(value)
+        try:
+            return self.results[value_type]
+        except KeyError:
+            result = isinstance(value, self.types)
+            if value_type is getattr(value, '__class__', None):
+                if len(self.results) >= _TYPE_CHECK_CACHE_SIZE:
+                    self.results.clear()
+                self.results[value_type] = result
+            return result
+
+
+_type_checkers = {}
+
+
+def _type_checker(types):
+    """
+    @return: The (shared) checker for the given types.
+    @rtype: _TypeChecker
+    """
+    try:
+        return _type_checkers[types]
+    except KeyError:
+        checker = _TypeChecker(types)
+        if len(_type_checkers) >= _TYPE_CHECKERS_SIZE:
+            _type_checkers.clear()
+        _type_checkers[types] = checker
+        return checker
+    except TypeError:  # unhashable
+        return _TypeChecker(types)
+
+
+class _Everything(object):
+    """
+    The container which contains everything.
+    """
+    __slots__ = ()
+
+    def __contains__(self, item):
+        return True
+
+
+_interned = {}
+
+def _intern(value):
+    """
+    @return: The single shared instance among all the equal values (strings, tuples) passed here.
+    """
+    try:
+        return _interned.setdefault(value, value)
+    except TypeError:  # unhashable
+        return value
+
+
+class _Expression(object):
+    """
+    The compiled text of a type definition or a clause.
+
+    The expressions are shared among all the functions having the same text in their contracts.
+    """
+    __slots__ = ('text', 'code', 'names', 'binds_names', 'cost')
+
+    def __init__(self, text):
+        self.text = text
+        tree = compile(text, '<contract>', 'eval', ast.PyCF_ONLY_AST)
+        self.code = compile(tree, '<contract>', 'eval')
+        self.names = frozenset(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+        # The list comprehensions bind their loop variables in the namespace they are evaluated in,
+        # so such expressions are evaluated in the copy of the locals (not to rebind the arguments).
+        self.binds_names = any(isinstance(node, ast.ListComp) for node in ast.walk(tree))
+        self.cost = _estimate_clause_cost(tree)
+
+
+_expressions = {}
+
+def _compile_expression(f_path, text, entity_name):
+    """
+    @return: The (shared) compiled expression for the text.
+    @rtype: _Expression
+
+    @raises SyntaxError: If the text cannot be compiled.
+    """
+    text = _intern(text.strip())
+    try:
+        return _expressions[text]
+    except KeyError:
+        try:
+            expression = _expressions[text] = _Expression(text)
+        except SyntaxError:
+            raise SyntaxError('%s:\n'
+                              'The following %s '
+                              'could not be parsed: %s\n' % (f_path,
+                                                             entity_name,
+                                                             text))
+        return expression
+
+
+class _TypeDefinition(object):
+    """
+    A C{@type} or C{@rtype} definition, compiled once when the function is decorated.
+
+    The definition is evaluated into a type checker on the first call, and the checker is reused
+    since then, unless the definition refers to any of the names from C{variable_names}
+    (like the function arguments).
+    """
+    __slots__ = ('text', 'entity_name', 'code', 'binds_names', 'constant', 'checker')
+
+    def __init__(self, f_path, text, entity_name, variable_names=()):
+        """
+        @raises SyntaxError: If the definition cannot be compiled.
+        """
+        expression = _compile_expression(f_path, text, 'type definition for %s' % entity_name)
+        self.text = expression.text
+        self.code = expression.code
+        self.binds_names = expression.binds_names
+        self.entity_name = _intern(entity_name)
+        self.constant = not any(name in variable_names for name in expression.names)
+        self.checker = None
+
+    def get_checker(self, f_path, _globals, _locals):
+        """
+        @raises SyntaxError: If the definition cannot be evaluated as a valid type.
+        @rtype: _TypeChecker
+        """
+        checker = self.checker
+        if checker is None:
+            checker = _type_checker(_parse_str_to_type(f_path,
+                                                       self.text,
+                                                       self.entity_name,
+                                                       _globals=_globals,
+                                                       _locals=_locals,
+                                                       code=self.code,
+                                                       binds_names=self.binds_names))
+            if self.constant:
+                self.checker = checker
+        return checker
+
+
+# The range definition: the bounds in the brackets, like [0, 1) or (0, None].
+_RANGE_RE = re.compile(r'^\s*([\[(])(.*)([\])])\s*$', re.DOTALL)
+# The array.array typecodes which may be viewed as numpy arrays.
+_NUMPY_TYPECODES = frozenset('bBhHiIlLfd')
+# The array.array typecodes of the characters, which are not compared to the range bounds.
+_CHARACTER_TYPECODES = frozenset('cu')
+# The types of the real numbers checked for the range without the abstract base class lookup.
+_REAL_TYPES = frozenset((int, long, float, bool))
+
+_range_comparisons = {}
+
+def _range_comparison(lower, upper):
+    """
+    @param lower: The operator comparing the lower bound to the value (C{'<='} or C{'<'}),
+                  or C{None} if there is no lower bound.
+    @param upper: The operator comparing the value to the upper bound, or C{None}.
+
+    @return: The (shared) function C{(value, lower, upper) -> bool}, compiled to the direct comparisons.
+
+    >>> _range_comparison('<=', '<')(1, 0, 1), _range_comparison(None, '<=')(1, None, 1)
+    (False, True)
+    """
+    try:
+        return _range_comparisons[lower, upper]
+    except KeyError:
+        comparisons = filter(None, ('lower %s value' % lower if lower else None,
+                                    'value %s upper' % upper if upper else None))
+        function = _range_comparisons[lower, upper] = \
+            eval('lambda value, lower, upper: %s' % (' and '.join(comparisons) or 'True'))
+        return function
+
+
+class _RangeChecker(object):
+    """
+    The callable checking that the value (or every element of the array) is within the range.
+
+    The scalars are compared to the bounds directly. The NumPy arrays and the C{array.array} sequences
+    are checked by their minimum and maximum only, which takes two passes over the array: the NumPy
+    C{min()} and C{max()} reductions (the numeric C{array.array} sequences are viewed as NumPy arrays,
+    without copying, if NumPy is imported), or else the builtin C{min()} and C{max()}, which box every
+    element. The maximum is not computed if the minimum is already out of the range.
+    The empty arrays are always within the range.
+    Any other values (like the strings, the lists or C{None}) are not compared to the bounds at all.
+
+    >>> from array import array
+    >>> checker = _RangeChecker('[0, 1)', 0, 1, True, False)
+    >>> checker(0), checker(0.5), checker(1), checker(array('d', [0.0, 0.99])), checker(array('d', [0.5, 1.0]))
+    (True, True, False, True, False)
+    >>> checker(array('i')), _RangeChecker('(0, None]', 0, None, False, True)(10 ** 100)
+    (True, True)
+    >>> checker('a'), checker([0.5]), checker(None), checker(array('c', 'a'))
+    (None, None, None, None)
+    """
+    __slots__ = ('text', 'lower', 'upper', 'comparison')
+
+    def __init__(self, text, lower, upper, lower_inclusive, upper_inclusive):
+        """
+        @param text: The range definition, as shown in the violations.
+        @param lower: The lower bound, or C{None} if there is no lower bound.
+        @param upper: The upper bound, or C{None} if there is no upper bound.
+        """
+        self.text = text
+        self.lower = lower
+        self.upper = upper
+        self.comparison = _range_comparison(('<=' if lower_inclusive else '<') if lower is not None else None,
+                                            ('<=' if upper_inclusive else '<') if upper is not None else None)
+
+    def __call__(self, value):
+        """
+        @return: Whether the value is within the range; or C{None} if it is neither a real number
+                 nor an array of them.
+        """
+        comparison = self.comparison
+        numpy = sys.modules.get('numpy')
+        if type(value) is _array:
+            if value.typecode in _CHARACTER_TYPECODES:
+                return None
+            if numpy is None or value.typecode not in _NUMPY_TYPECODES:
+                return not value or (comparison(min(value), self.lower, self.upper) and
+                                     comparison(max(value), self.lower, self.upper))
+            value = numpy.frombuffer(value, value.typecode)
+        elif numpy is None or not isinstance(value, numpy.ndarray):
+            if type(value) not in _REAL_TYPES and not isinstance(value, numbers.Real):
+                return None
+            return comparison(value, self.lower, self.upper)
+        elif value.dtype.kind not in 'biuf':
+            return None
+
+        return not value.size or bool(comparison(value.min(), self.lower, self.upper) and
+                                      comparison(value.max(), self.lower, self.upper))
+
+
+class _RangeDefinition(object):
+    """
+    A C{@range} or C{@rrange} definition, like C{[0, 1)}: the lower and the upper bounds
+    (either of them may be C{None} for no bound), inclusive in the square brackets
+    and exclusive in the parentheses. Compiled once when the function is decorated.
+
+    The bounds are evaluated into a range checker on the first call, and the checker is reused
+    since then, unless the bounds refer to any of the names from C{variable_names}
+    (like the function arguments).
+    """
+    __slots__ = ('text', 'entity_name', 'code', 'binds_names', 'inclusive', 'constant', 'checker')
+
+    def __init__(self, f_path, text, entity_name, variable_names=()):
+        """
+        @raises SyntaxError: If the definition cannot be compiled.
+        """
+        text = text.strip()
+        match = _RANGE_RE.match(text)
+        try:
+            bounds = ast.parse('(%s)' % match.group(2), mode='eval').body if match else None
+        except SyntaxError:
+            bounds = None
+        if not isinstance(bounds, ast.Tuple) or len(bounds.elts) != 2:
+            raise SyntaxError('%s:\n'
+                              'The following range definition for %s '
+                              'could not be parsed: %s\n' % (f_path,
+                                                              entity_name,
+                                                              text))
+
+        expression = _compile_expression(f_path, '(%s)' % match.group(2), 'range definition for %s' % entity_name)
+        self.text = _intern(text)
+        self.code = expression.code
+        self.binds_names = expression.binds_names
+        self.entity_name = _intern(entity_name)
+        self.inclusive = (match.group(1) == '[', match.group(3) == ']')
+        self.constant = not any(name in variable_names for name in expression.names)
+        self.checker = None
+
+    def get_checker(self, f_path, _globals, _locals):
+        """
+        @raises SyntaxError: If the bounds cannot be evaluated.
+        @rtype: _RangeChecker
+        """
+        checker = self.checker
+        if checker is None:
+            lower, upper = _parse_str_to_value(f_path,
+                                               self.text,
+                                               'range definition for %s' % self.entity_name,
+                                               _globals,
+                                               _locals,
+                                               code=self.code,
+                                               binds_names=self.binds_names)
+            checker = _RangeChecker(self.text, lower, upper, *self.inclusive)
+            if self.constant:
+                self.checker = checker
+        return checker
+
+
+# The dtype names of the array.array typecodes, as numpy.dtype(...).name.
+_ARRAY_DTYPES = dict((typecode, '%s%i' % ('float' if typecode in 'fd' else 'int' if typecode.islower() else 'uint',
+                                         _array(typecode).itemsize * 8))
+                         for typecode in 'bBhHiIlLfd')
+
+
+def _array_metadata(value):
+    """
+    @return: The shape and the dtype name of the NumPy array or of the C{array.array} sequence
+             (which is one-dimensional), or C{None} if the value is not an array.
+    @rtype: tuple
+    """
+    if type(value) is _array:
+        return (len(value),), _ARRAY_DTYPES.get(value.typecode, value.typecode)
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        return value.shape, value.dtype.name
+    return None
+
+
+class _ArrayDefinition(object):
+    """
+    The shape and (or) the dtype of an array argument or of the return value.
+
+    The shape is the tuple of the dimensions, every one being either the fixed size, or the name
+    of the symbolic dimension, or C{None} for any size. The dtypes are the names
+    like C{numpy.dtype(...).name} (e.g. C{float64}); any aliases (e.g. C{double}) are normalized
+    by NumPy, if it is imported.
+
+    >>> from array import array
+    >>> definition = _ArrayDefinition(('n', 3), '(n, 3)', None, None)
+    >>> definition.check(array('d', [1.0]), {})
+    ('shape', (1,))
+    >>> definition = _ArrayDefinition(('n',), None, ('float64',), '(n,)')
+    >>> dims = {}
+    >>> definition.check(array('d', [1.0, 2.0]), dims), dims
+    (None, {'n': 2})
+    >>> definition.check(array('d', [1.0]), dims), definition.check(array('i', [1, 2]), dims)
+    (('shape', (1,)), ('dtype', 'int32'))
+    """
+    __slots__ = ('dims', 'symbols', 'shape_text', 'dtypes', 'dtype_text', 'resolved')
+
+    def __init__(self, dims, shape_text, dtypes, dtype_text):
+        """
+        @param dims: The dimensions of the shape, or C{None} if the shape is not defined.
+        @param shape_text: The shape definition, as shown in the violations.
+        @param dtypes: The dtype names, or C{None} if the dtype is not defined.
+        @param dtype_text: The dtype definition, as shown in the violations.
+        """
+        self.dims = dims
+        self.symbols = tuple(d for d in dims or () if isinstance(d, basestring))
+        self.shape_text = _intern(shape_text) if shape_text is not None else None
+        self.dtypes = frozenset(dtypes) if dtypes is not None else None
+        self.dtype_text = _intern(dtype_text) if dtype_text is not None else None
+        self.resolved = False
+
+    def check(self, value, dims):
+        """
+        Check the array against the definition, binding the symbolic dimensions
+        not bound yet to the actual sizes.
+
+        @param dims: The sizes of the symbolic dimensions, by their names.
+        @type dims: dict
+
+        @return: C{None} if the array passed the check; otherwise, C{('array', None)} if the value
+                 is not an array, or C{('shape', the actual shape)}, or C{('dtype', the actual dtype name)}.
+        @rtype: tuple
+        """
+        metadata = _array_metadata(value)
+        if metadata is None:
+            return ('array', None)
+        shape, dtype = metadata
+
+        if self.dtypes is not None:
+            if not self.resolved:
+                self._resolve()
+            if dtype not in self.dtypes:
+                return ('dtype', dtype)
+
+        if self.dims is not None:
+            if len(shape) != len(self.dims):
+                return ('shape', shape)
+            for expected, size in izip(self.dims, shape):
+                if expected is None:
+                    continue
+                elif isinstance(expected, basestring):
+                    if dims.setdefault(expected, size) != size:
+                        return ('shape', shape)
+                elif expected != size:
+                    return ('shape', shape)
+        return None
+
+    def _resolve(self):
+        """
+        Normalize the dtype names by NumPy, if it is imported.
+        """
+        numpy = sys.modules.get('numpy')
+        if numpy is not None:
+            try:
+                self.dtypes = frozenset(numpy.dtype(name).name for name in self.dtypes)
+            except TypeError:
+                pass  # not known to NumPy, compared as is
+            self.resolved = True
+
+    def violation(self, f_path, entity_name, value, failure, dims):
+        """
+        @param failure: The result of the failed L{check}.
+
+        @return: The exception to raise for the failed check.
+        @rtype: Exception
+        """
+        kind, actual = failure
+        if kind == 'array':
+            return _violation(TypeError, value,
+                              '%s:\n'
+                              'The %s is of %r while must be an array; its value is %r',
+                              f_path, entity_name, type(value), value)
+        elif kind == 'dtype':
+            return _violation(TypeError, value,
+                              '%s:\n'
+                              'The %s is of %s dtype while must be of %s dtype; its value is %r',
+                              f_path, entity_name, actual, self.dtype_text, value)
+        else:
+            bound = ', '.join('%s=%r' % (symbol, dims[symbol])
+                                  for symbol in sorted(set(self.symbols))
+                                  if symbol in dims)
+            return _violation(ValueError, value,
+                              '%s:\n'
+                              'The %s is of %r shape while must be of %s shape%s; its value is %r',
+                              f_path, entity_name, actual, self.shape_text,
+                              ' (where %s)' % bound if bound else '', value)
+
+
+def _parse_shape(f_path, text, entity_name):
+    """
+    @return: The dimensions of the shape definition, like C{(n, 3)}.
+    @rtype: tuple
+
+    @raises SyntaxError: If the definition cannot be parsed.
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval').body
+    except SyntaxError:
+        tree = None
+    dims = []
+    for node in tree.elts if isinstance(tree, ast.Tuple) else [None]:
+        if isinstance(node, ast.Num) and isinstance(node.n, (int, long)) and node.n >= 0:
+            dims.append(node.n)
+        elif isinstance(node, ast.Name):
+            dims.append(None if node.id in ('None', '_') else _intern(node.id))
+        else:
+            raise SyntaxError('%s:\n'
+                              'The following shape definition for %s '
+                              'could not be parsed: %s\n' % (f_path,
+                                                              entity_name,
+                                                              text.strip()))
+    return tuple(dims)
+
+
+def _parse_dtypes(text):
+    """
+    @return: The dtype names of the dtype definition, like C{float32, float64} or C{numpy.float64}.
+    @rtype: tuple
+    """
+    return tuple(name.strip().rpartition('.')[2] for name in text.split(','))
+
+
+class _ArrayContract(object):
+    """
+    The shapes and the dtypes of the array arguments and of the return value of a single function,
+    with the symbolic dimensions unified across all of them on every call.
+    Only the metadata of the arrays is checked, not their elements.
+
+    The symbolic dimensions named as the arguments of the function are bound
+    to the values of these arguments.
+    """
+    __slots__ = ('arguments', 'result', 'bound_arguments')
+
+    def __init__(self, arguments, result, posargs):
+        """
+        @param arguments: The pairs of the argument name and its L{_ArrayDefinition},
+                          in the order of the arguments.
+        @param result: The L{_ArrayDefinition} of the return value, or C{None}.
+        """
+        self.arguments = tuple(arguments)
+        self.result = result
+        symbols = set(symbol
+                          for definition in [d for a, d in self.arguments] + [result]
+                          if definition is not None
+                          for symbol in definition.symbols)
+        self.bound_arguments = tuple(a for a in posargs if a in symbols)
+
+    def check_arguments(self, f_path, values):
+        """
+        @raises TypeError: If any argument is not an array, or is of the wrong dtype.
+        @raises ValueError: If any argument is of the wrong shape.
+
+        @return: The sizes of the symbolic dimensions, by their names.
+        @rtype: dict
+        """
+        dims = dict((a, values[a]) for a in self.bound_arguments)
+        for argument, definition in self.arguments:
+            value = values[argument]
+            failure = definition.check(value, dims)
+            if failure is not None:
+                _fail(f_path, "'%s' argument" % argument,
+                      definition.violation(f_path, "'%s' argument" % argument, value, failure, dims),
+                      caller=_get_caller_frame())
+        return dims
+
+    def check_result(self, f_path, result, dims):
+        """
+        @param dims: The sizes of the symbolic dimensions, as bound by the arguments.
+
+        @raises TypeError: If the result is not an array, or is of the wrong dtype.
+        @raises ValueError: If the result is of the wrong shape.
+        """
+        failure = self.result.check(result, dims)
+        if failure is not None:
+            _fail(f_path, 'return value', self.result.violation(f_path, 'return value', result, failure, dims))
+
+
+def _array_contract(f_path, posargs, shapes, return_shape, dtypes, return_dtype):
+    """
+    @param shapes: The shape definitions (either as the texts, or as the tuples of the dimensions),
+                   by the argument name.
+    @param dtypes: The dtype definitions (either as the texts, or as the dtype names or the NumPy dtypes,
+                   or the tuples of them), by the argument name.
+
+    @return: The compiled shapes and dtypes, or C{None} if none of them are defined.
+    @rtype: _ArrayContract
+
+    @raises SyntaxError: If any of the definitions cannot be parsed.
+    """
+    def make(shape, dtype, entity_name):
+        if isinstance(shape, basestring):
+            shape, shape_text = _parse_shape(f_path, shape, entity_name), shape.strip()
+        elif shape is not None:
+            shape_text = '(%s%s)' % (', '.join(str(d) for d in shape), ',' if len(shape) == 1 else '')
+        else:
+            shape_text = None
+        if isinstance(dtype, basestring):
+            dtype, dtype_text = _parse_dtypes(dtype), dtype.strip()
+        elif dtype is not None:
+            dtype = tuple(d if isinstance(d, basestring) else getattr(d, '__name__', None) or str(d)
+                              for d in (dtype if isinstance(dtype, tuple) else (dtype,)))
+            dtype_text = ', '.join(dtype)
+        else:
+            dtype_text = None
+        return _ArrayDefinition(shape, shape_text, dtype, dtype_text)
+
+    if not shapes and not dtypes and return_shape is None and return_dtype is None:
+        return None
+    order = dict((argument, i) for i, argument in enumerate(posargs))
+    arguments = [(_intern(argument), make(shapes.get(argument), dtypes.get(argument), "'%s' argument" % argument))
+                     for argument in sorted(set(shapes) | set(dtypes), key=lambda a: (order.get(a), a))]
+    result = (make(return_shape, return_dtype, 'return value')
+                  if return_shape is not None or return_dtype is not None
+                  else None)
+    return _ArrayContract(arguments, result, posargs)
+
+
+def _estimate_clause_cost(tree):
+    """
+    Estimate the relative cost of evaluating a clause, using its syntax tree only.
+
+    >>> cost = lambda s: _estimate_clause_cost(ast.parse(s, mode='eval'))
+    >>> cost('x > 0') < cost('len(x) > 0') < cost('f(x) > 0') < cost('all(i > 0 for i in x)')
+    True
+
+    @type tree: ast.AST
+    @rtype: int
+    """
+    cost = 0
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                name = node.func.id
+            else:
+                name = getattr(node.func, 'attr', None)
+
+            if name in _CHEAP_CALLS:
+                cost += 2
+            elif name in _LINEAR_CALLS:
+                cost += 100
+            else:
+                cost += 20
+        elif isinstance(node, (ast.GeneratorExp, ast.ListComp, ast.SetComp, ast.DictComp)):
+            cost += 100
+        else:
+            cost += 1
+    return cost
+
+
+def _tier_index(tier):
+    """
+    @param tier: The name of the cost tier.
+
+    @rtype: int
+
+    @raises ValueError: If the tier is unknown.
+    """
+    try:
+        return _TIERS.index(tier)
+    except ValueError:
+        raise ValueError('Unknown tier %r, should be one of: %s' % (tier, ', '.join(_TIERS)))
+
+
+def _clause_tier(text):
+    """
+    @return: The index of the cost tier of the clause, by the comment at its end.
+    @rtype: int
+    """
+    match = _TIER_RE.search(text)
+    return _TIERS.index(match.group(1)) if match is not None else _DEFAULT_TIER
+
+
+def _module_tier(module):
+    """
+    @param module: The name of the module, or C{None}.
+
+    @return: The index of the most expensive tier of the clauses checked in the module:
+             chosen for the module, or for the innermost package containing it, or globally.
+    @rtype: int
+    """
+    while module:
+        if module in _module_tiers:
+            return _module_tiers[module]
+        module = module.rpartition('.')[0]
+    return _tier
+
+
+class _Clause(object):
+    """
+    A single precondition or postcondition, compiled once when the function is decorated.
+
+    If the contract coverage is being recorded when the clause is compiled,
+    the clause is registered in the coverage and marks it whenever evaluated.
+    """
+    __slots__ = ('text', 'code', 'binds_names', 'tier', 'static_cost', 'timed_calls', 'total_time',
+                 'coverage', 'coverage_index')
+
+    def __init__(self, f_path, text, kind, code=None, tier=None):
+        """
+        @param kind: Either C{'precondition'} or C{'postcondition'}.
+
+        @param code: The already compiled clause; then, the C{text} is just its description.
+
+        @param tier: The index of the cost tier of the clause; by default, taken from the comment
+                     at the end of the clause (see L{set_tier}).
+
+        @raises SyntaxError: If the clause cannot be compiled.
+        """
+        if code is None:
+            expression = _compile_expression(f_path, text, '%s definition' % kind)
+            self.text = expression.text
+            self.code = expression.code
+            self.binds_names = expression.binds_names
+            self.static_cost = expression.cost
+        else:
+            self.text = _intern(text)
+            self.code = code
+            self.binds_names = False
+            self.static_cost = 20  # as for any call, see _estimate_clause_cost()
+        self.tier = _clause_tier(self.text) if tier is None else tier
+        self.timed_calls = 0
+        self.total_time = 0.0
+        self.coverage = _coverage
+        if self.coverage is not None:
+            self.coverage_index = self.coverage.register(f_path, kind, self.text)
+
+    def measured_cost(self):
+        """
+        @return: The average measured evaluation time, or the estimated cost if the clause was never timed.
+            The clauses that were never timed go after the timed ones.
+        @rtype: tuple
+        """
+        if self.timed_calls:
+            return (0, self.total_time / self.timed_calls)
+        else:
+            return (1, self.static_cost)
+
+
+def _register_epydoc_fields():
+    """
+    Make epydoc accept the C{@range}, C{@shape} and C{@dtype} fields, and their counterparts
+    for the return value (and show them in the generated documentation).
+    """
+    from epydoc import docstringparser
+    known = set(field.singular for field in docstringparser.STANDARD_FIELDS)
+    docstringparser.STANDARD_FIELDS.extend(
+        field
+            for field in (docstringparser.DocstringField(['range'], 'Range', 'Ranges', takes_arg=True),
+                          docstringparser.DocstringField(['rrange', 'returnrange'], 'Return Range', multivalue=0),
+                          docstringparser.DocstringField(['shape'], 'Shape', 'Shapes', takes_arg=True),
+                          docstringparser.DocstringField(['rshape', 'returnshape'], 'Return Shape', multivalue=0),
+                          docstringparser.DocstringField(['dtype'], 'Dtype', 'Dtypes', takes_arg=True),
+                          docstringparser.DocstringField(['rdtype', 'returndtype'], 'Return Dtype', multivalue=0))
+            if field.singular not in known)
+
+
+def _routine_contract(routine_doc, linker):
+    """
+    @param routine_doc: The epydoc documentation of the function.
+    @type routine_doc: epydoc.apidoc.RoutineDoc
+
+    @param linker: The epydoc linker to render the documentation.
+    @type linker: epydoc.markup.DocstringLinker
+
+    @return: The texts of the contract definitions: the dictionary with C{arg_types} (the dictionary
+             of the type definitions by the argument name), C{return_type} (the type definition or C{None}),
+             C{arg_ranges} and C{return_range} (the same for the range definitions),
+             C{arg_shapes}, C{return_shape}, C{arg_dtypes} and C{return_dtype} (the same for the shape
+             and the dtype definitions),
+             C{preconditions} and C{postconditions} (the lists of the clauses) keys.
+    @rtype: dict
+    """
+    def fields(name):
+        return dict((argument, description.to_plaintext(linker))
+                        for field, argument, description in routine_doc.metadata
+                        if field.singular == name)
+
+    return {'arg_types': dict((argument, description.to_plaintext(linker))
+                                  for argument, description in routine_doc.arg_types.iteritems()),
+            'return_type': (routine_doc.return_type.to_plaintext(linker)
+                                if routine_doc.return_type is not None
+                                else None),
+            'arg_ranges': fields('Range'),
+            'return_range': fields('Return Range').get(None),
+            'arg_shapes': fields('Shape'),
+            'return_shape': fields('Return Shape').get(None),
+            'arg_dtypes': fields('Dtype'),
+            'return_dtype': fields('Return Dtype').get(None),
+            'preconditions': [description.to_plaintext(linker)
+                                  for field, argument, description in routine_doc.metadata
+                                  if field.singular == 'Precondition'],
+            'postconditions': [description.to_plaintext(linker)
+                                   for field, argument, description in routine_doc.metadata
+                                   if field.singular == 'Postcondition']}
+
+
+class _Contract(object):
+    """
+    The compiled contract of a single function.
+
+    After the function is decorated, only this structure is kept for it; it refers neither
+    to the epydoc structures nor to the stack frames, and the compiled expressions are shared
+    among the functions. The only exception is the locals of the code where the function is defined
+    (the C{f_locals} dictionary of its frame, not the frame itself): the type definitions may refer
+    to the names defined after the function, so they are evaluated on the first call, and the locals
+    are kept until then; if there are no such definitions, they are not kept at all.
+
+    All the clauses are compiled once, but only those up to the tier chosen for the module
+    (see L{set_tier}) are selected to be checked.
+    """
+    __slots__ = ('f_path', 'module', 'posargs', 'defaults', 'argument_types', 'return_type',
+                 'argument_ranges', 'return_range', 'arrays', 'clauses', 'tier', 'fusable',
+                 'preconditions', 'precondition_schedule', 'fused_preconditions',
+                 'postconditions', 'deferred_postconditions', 'fused_postconditions',
+                 'def_globals', 'def_locals', '__weakref__')
+
+    def __init__(self, f_path, posargs, defaults, kwarg, contract, def_globals, def_locals):
+        """
+        @param posargs: The names of the positional arguments of the function.
+        @param defaults: The default values for every positional argument (C{None} if there is no default).
+        @param kwarg: The name of the C{**kwargs} argument of the function, if any.
+
+        @param contract: The texts of the contract definitions, as returned by L{_routine_contract}.
+        @type contract: dict
+
+        @raises SyntaxError: If any part of the contract cannot be compiled.
+        """
+        self.f_path = f_path
+        self.module = def_globals.get('__name__')
+        self.posargs = _intern(tuple(posargs))
+        self.defaults = tuple(defaults)
+        self.def_globals = def_globals
+        self.def_locals = def_locals
+
+        self.argument_types = tuple((_intern(argument),
+                                     _TypeDefinition(f_path, text, "'%s' argument" % argument))
+                                        for argument, text in contract['arg_types'].iteritems())
+        if contract['return_type'] is not None:
+            # The return type is evaluated with the function arguments available.
+            self.return_type = _TypeDefinition(f_path,
+                                               contract['return_type'],
+                                               'return value',
+                                               variable_names=frozenset(posargs)
+                                                              if kwarg is None
+                                                              else _Everything())
+        else:
+            self.return_type = None
+
+        # The bounds referring to the arguments are evaluated on every call, with the arguments available.
+        variable_names = frozenset(posargs) if kwarg is None else _Everything()
+        self.argument_ranges = tuple((_intern(argument),
+                                      _RangeDefinition(f_path, text, "'%s' argument" % argument, variable_names))
+                                         for argument, text in sorted(contract['arg_ranges'].iteritems()))
+        if contract['return_range'] is not None:
+            self.return_range = _RangeDefinition(f_path, contract['return_range'], 'return value', variable_names)
+        else:
+            self.return_range = None
+        self.arrays = _array_contract(f_path, self.posargs,
+                                      contract['arg_shapes'], contract['return_shape'],
+                                      contract['arg_dtypes'], contract['return_dtype'])
+
+        preconditions = tuple(_Clause(f_path, text, 'precondition')
+                                  for text in contract['preconditions'])
+        postconditions = [_Clause(f_path, text, 'postcondition')
+                              for text in contract['postconditions']]
+        self.clauses = (preconditions,
+                        tuple(c for c in postconditions if not _DEFERRED_RE.search(c.text)),
+                        tuple(c for c in postconditions if _DEFERRED_RE.search(c.text)))
+
+        # The clauses are evaluated together, if they refer to the arguments by names only,
+        # and the coverage of the individual clauses is not recorded.
+        self.fusable = _coverage is None and kwarg is None and \
+                       all(isinstance(argument, basestring) for argument in self.posargs)
+        self.tier = None
+        self.select_clauses(_module_tier(self.module))
+        if any(c.tier for clauses in self.clauses for c in clauses):
+            _tiered_contracts.add(self)
+        self.types_resolved()
+
+    def _selected(self, tier):
+        """
+        @return: The preconditions, the postconditions and the deferred postconditions
+                 up to the given tier.
+        @rtype: tuple
+        """
+        return tuple(tuple(c for c in clauses if c.tier <= tier) for clauses in self.clauses)
+
+    def select_clauses(self, tier):
+        """
+        Select the clauses up to the given tier to be checked on every call;
+        the clauses of the more expensive tiers are not evaluated at all.
+
+        @param tier: The index of the most expensive tier of the clauses checked.
+        @type tier: int
+        """
+        if tier == self.tier:
+            return
+        self.tier = tier
+        preconditions, postconditions, deferred_postconditions = self._selected(tier)
+        if REORDER_PRECONDITIONS and len(preconditions) > 1:
+            precondition_schedule = _PreconditionSchedule(preconditions)
+        else:
+            precondition_schedule = None
+
+        fused_preconditions = fused_postconditions = None
+        if self.fusable:
+            try:
+                if precondition_schedule is not None:
+                    # Fused in the measured order, when the schedule settles (see _fuse_schedule).
+                    precondition_schedule.settled = self._fuse_schedule
+                elif preconditions:
+                    fused_preconditions = _FusedClauses(preconditions, 'precondition', preconditions,
+                                                        self.posargs, self.def_globals)
+                if postconditions:
+                    fused_postconditions = _FusedClauses(postconditions, 'postcondition', postconditions,
+                                                         _intern(self.posargs + ('result',)), self.def_globals)
+            except SyntaxError:
+                pass
+
+        (self.preconditions, self.precondition_schedule, self.fused_preconditions,
+         self.postconditions, self.fused_postconditions, self.deferred_postconditions) = \
+            (preconditions, precondition_schedule, fused_preconditions,
+             postconditions, fused_postconditions, deferred_postconditions)
+
+    def _fuse_schedule(self, schedule):
+        """
+        Evaluate the preconditions together, in the order settled by their schedule.
+
+        @type schedule: _PreconditionSchedule
+        """
+        schedule.settled = None
+        if schedule is not self.precondition_schedule:
+            return  # the clauses were selected again meanwhile
+        try:
+            self.fused_preconditions = _FusedClauses(self.preconditions, 'precondition', schedule.ordered,
+                                                     self.posargs, self.def_globals)
+        except SyntaxError:
+            return
+        self.precondition_schedule = None
+
+    def types_resolved(self):
+        """
+        Forget the locals of the code where the function is defined,
+        if they are not needed anymore.
+        """
+        if all(definition.checker is not None for argument, definition in self.argument_types) and \
+           all(definition.checker is not None or not definition.constant
+                   for argument, definition in self.argument_ranges):
+            self.def_locals = None
+
+
+class _ResolvedType(object):
+    """
+    The type definition given as the type objects themselves (see L{contract}).
+    """
+    __slots__ = ('checker',)
+
+    def __init__(self, types):
+        self.checker = _type_checker(types)
+
+
+class _ResolvedRange(object):
+    """
+    The range definition given as the C{(lower, upper)} bounds themselves (both inclusive),
+    or as the text with the constant bounds (see L{contract}).
+    """
+    __slots__ = ('checker',)
+
+    def __init__(self, f_path, definition, entity_name):
+        """
+        @raises SyntaxError: If the range definition cannot be compiled or evaluated.
+        """
+        if isinstance(definition, basestring):
+            self.checker = _RangeDefinition(f_path, definition, entity_name).get_checker(
+                               f_path, {'__builtins__': __builtins__}, {})
+        else:
+            lower, upper = definition
+            self.checker = _RangeChecker('[%r, %r]' % (lower, upper), lower, upper, True, True)
+
+
+def _clause_arguments(function):
+    """
+    @return: The names of the arguments of the callable clause.
+    @rtype: tuple
+
+    @raises TypeError: If the arguments cannot be found (e.g. for a builtin function).
+    """
+    if not inspect.isfunction(function) and not inspect.ismethod(function):
+        function = function.__call__  # a callable object
+    args = inspect.getargspec(function).args
+    return tuple(args[1:] if inspect.ismethod(function) else args)
+
+
+class _CallableContract(_Contract):
+    """
+    The compiled contract of a single function, given as the type objects and the callables
+    rather than the docstring (see L{contract}).
+    """
+    __slots__ = ('callables',)
+
+    def __init__(self, f_path, f, types, rtype, ranges, rrange, shapes, rshape, dtypes, rdtype,
+                 preconditions, postconditions, deferred_postconditions):
+        """
+        @raises TypeError: If any of the callable clauses takes the unknown arguments.
+        @raises SyntaxError: If any of the range definitions cannot be compiled or evaluated.
+        """
+        argspec = inspect.getargspec(f)
+        self.f_path = f_path
+        self.module = f.__module__
+        self.posargs = _intern(tuple(argspec.args))
+        self.defaults = (None,) * (len(argspec.args) - len(argspec.defaults or ())) + tuple(argspec.defaults or ())
+        self.argument_types = tuple((_intern(argument), _ResolvedType(t))
+                                        for argument, t in sorted(types.iteritems()))
+        self.return_type = _ResolvedType(rtype) if rtype is not None else None
+        self.argument_ranges = tuple((_intern(argument), _ResolvedRange(f_path, r, "'%s' argument" % argument))
+                                         for argument, r in sorted(ranges.iteritems()))
+        self.return_range = _ResolvedRange(f_path, rrange, 'return value') if rrange is not None else None
+        self.arrays = _array_contract(f_path, self.posargs, shapes, rshape, dtypes, rdtype)
+
+        # The clauses are evaluated as the calls of the callables stored in the private namespace.
+        self.def_globals = {'__builtins__': __builtins__}
+        self.def_locals = None
+
+        known_names = frozenset(argspec.args) if argspec.keywords is None else _Everything()
+        clauses = {}
+        for kind, callables in (('precondition', preconditions),
+                                ('postcondition', postconditions),
+                                ('deferred postcondition', deferred_postconditions)):
+            clauses[kind] = compiled = []
+            for function in callables:
+                if isinstance(function, tuple):
+                    function, tier = function
+                    tier = _tier_index(tier)
+                else:
+                    tier = _DEFAULT_TIER
+                names = _clause_arguments(function)
+                unknown = [name for name in names
+                               if name not in known_names and not (kind != 'precondition' and name == 'result')]
+                if unknown:
+                    raise TypeError('%s:\n'
+                                    'The %s %r refers to the unknown arguments: %s' % (f_path,
+                                                                                        kind,
+                                                                                        function,
+                                                                                        ', '.join(unknown)))
+                global_name = '_dbc_clause_%i' % len(self.def_globals)
+                self.def_globals[global_name] = function
+                call = ast.Expression(body=ast.Call(func=ast.Name(id=global_name, ctx=ast.Load()),
+                                                    args=[ast.Name(id=name, ctx=ast.Load()) for name in names],
+                                                    keywords=[], starargs=None, kwargs=None))
+                code = compile(ast.fix_missing_locations(call), '<contract>', 'eval')
+                clause = _Clause(f_path,
+                                 '%s(%s)' % (getattr(function, '__name__', type(function).__name__),
+                                             ', '.join(names)),
+                                 kind.rpartition(' ')[2],
+                                 code=code,
+                                 tier=tier)
+                compiled.append((clause, function, names))
+
+        self.clauses = tuple(tuple(c for c, function, names in clauses[kind])
+                                 for kind in ('precondition', 'postcondition', 'deferred postcondition'))
+        self.callables = dict((c, (function, names))
+                                  for compiled in clauses.itervalues()
+                                  for c, function, names in compiled)
+        # With the coverage being recorded, the clauses are checked one by one.
+        self.fusable = _coverage is None
+        self.tier = None
+        self.select_clauses(_module_tier(self.module))
+        if any(c.tier for clauses in self.clauses for c in clauses):
+            _tiered_contracts.add(self)
+
+    def select_clauses(self, tier):
+        if tier == self.tier:
+            return
+        self.tier = tier
+        preconditions, postconditions, deferred_postconditions = self._selected(tier)
+
+        fused_preconditions = fused_postconditions = None
+        if self.fusable:
+            if preconditions:
+                fused_preconditions = _CallableClauses(preconditions, 'precondition',
+                                                       (self.callables[c] for c in preconditions))
+            if postconditions:
+                fused_postconditions = _CallableClauses(postconditions, 'postcondition',
+                                                        (self.callables[c] for c in postconditions))
+
+        (self.preconditions, self.precondition_schedule, self.fused_preconditions,
+         self.postconditions, self.fused_postconditions, self.deferred_postconditions) = \
+            (preconditions, None, fused_preconditions,
+             postconditions, fused_postconditions, deferred_postconditions)
+
+
+def _check_clauses(f_path, clauses, kind, _globals, _locals):
+    """
+    Evaluate the clauses one by one, in the given order.
+
+    @param kind: Either C{'precondition'} or C{'postcondition'}.
+
+    @raises ValueError: If any of the clauses results in logical False.
+    """
+    for clause in clauses:
+        try:
+            value = _parse_str_to_value(f_path,
+                                        clause.text,
+                                        '%s definition' % kind,
+                                        _globals=_globals,
+                                        _locals=_locals,
+                                        code=clause.code,
+                                        binds_names=clause.binds_names)
+        except SyntaxError, e:
+            if clause.coverage is not None:
+                clause.coverage.hit(clause.coverage_index, False)
+            _fail(f_path, clause.text, e, sys.exc_info()[2],
+                  caller=_get_caller_frame() if kind == 'precondition' else None)
+            continue
+
+        if clause.coverage is not None:
+            clause.coverage.hit(clause.coverage_index, value)
+        if not value:
+            _fail(f_path, clause.text, _violation(ValueError, value,
+                             '%s:\n'
+                             'The following %s results in logical False; '
+                             'its definition is:\n'
+                             '\t%s\n'
+                             'and its real value is %r', f_path,
+                                                         kind,
+                                                         clause.text,
+                                                         value),
+                  caller=_get_caller_frame() if kind == 'precondition' else None)
+
+
+class _PreconditionSchedule(object):
+    """
+    The preconditions of a single function, evaluated cheapest-first.
+
+    The initial order is based on the estimated cost of every clause; then, every
+    C{_CLAUSE_TIMING_PERIOD}-th call is timed, and every C{_CLAUSE_REORDER_PERIOD}-th call
+    the clauses are reordered by their measured cost.
+    If any clause fails (or even raises an exception, as it might rely upon some other clause
+    declared before it), all the clauses are re-checked in the declared order,
+    so that the violation is reported exactly as declared.
+    """
+    __slots__ = ('declared', 'ordered', 'calls', 'settled')
+
+    def __init__(self, clauses, settled=None):
+        """
+        @param settled: Called with the schedule when the clauses are not reordered anymore,
+                        i.e. their measured costs keep the same order.
+        """
+        self.declared = tuple(clauses)
+        self.ordered = tuple(sorted(self.declared, key=attrgetter('static_cost')))
+        self.calls = 0
+        self.settled = settled
+
+    def check(self, f_path, _globals, _locals):
+        """
+        @raises ValueError: If any of the preconditions results in logical False.
+        """
+        self.calls += 1
+        calls = self.calls
+        timed = not calls % _CLAUSE_TIMING_PERIOD
+
+        try:
+            for clause in self.ordered:
+                if timed:
+                    start = _timer()
+                    value = eval(clause.code, _globals, dict(_locals) if clause.binds_names else _locals)
+                    clause.total_time += _timer() - start
+                    clause.timed_calls += 1
+                else:
+                    value = eval(clause.code, _globals, dict(_locals) if clause.binds_names else _locals)
+                if clause.coverage is not None:
+                    clause.coverage.hit(clause.coverage_index, value)
+                if not value:
+                    break
+            else:
+                # The fast path: every clause is satisfied.
+                if not calls % _CLAUSE_REORDER_PERIOD:
+                    # Don't sort in place, as the other threads may be iterating over it.
+                    ordered = tuple(sorted(self.declared, key=_Clause.measured_cost))
+                    if ordered == self.ordered and self.settled is not None:
+                        self.settled(self)
+                    self.ordered = ordered
+                return
+        except Exception:
+            pass
+
+        _check_clauses(f_path, self.declared, 'precondition', _globals, _locals)
+
+
+
+def _is_pure(node):
+    """
+    @return: Whether the expression may be evaluated once and reused within a single call,
+             i.e. it consists of the names, constants, attributes, subscripts, operators
+             and the calls of the cheap builtins only.
+    @rtype: bool
+    """
+    if isinstance(node, (ast.Name, ast.Num, ast.Str)):
+        return True
+    elif isinstance(node, ast.Attribute):
+        return _is_pure(node.value)
+    elif isinstance(node, ast.Subscript):
+        return isinstance(node.slice, ast.Index) and _is_pure(node.value) and _is_pure(node.slice.value)
+    elif isinstance(node, ast.BinOp):
+        return _is_pure(node.left) and _is_pure(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        return _is_pure(node.operand)
+    elif isinstance(node, ast.Compare):
+        return _is_pure(node.left) and all(_is_pure(c) for c in node.comparators)
+    elif isinstance(node, ast.Tuple):
+        return all(_is_pure(e) for e in node.elts)
+    elif isinstance(node, ast.Call):
+        return (isinstance(node.func, ast.Name) and node.func.id in _CHEAP_CALLS and
+                not node.keywords and node.starargs is None and node.kwargs is None and
+                all(_is_pure(a) for a in node.args))
+    else:
+        return False
+
+
+def _iter_subexpressions(node, unconditional=True):
+    """
+    @return: The iterable over the C{(subexpression, unconditional)} pairs for all the subexpressions
+             of the expression, where C{unconditional} tells whether the subexpression is always evaluated
+             when the whole expression is. The insides of the lambdas and comprehensions are skipped.
+
+    >>> [(ast.dump(n), u) for n, u in _iter_subexpressions(ast.parse('0 < n < len(x)', mode='eval').body)
+    ...                   if isinstance(n, ast.Call)]
+    [("Call(func=Name(id='len', ctx=Load()), args=[Name(id='x', ctx=Load())], keywords=[], starargs=None, kwargs=None)", False)]
+    """
+    yield node, unconditional
+    if isinstance(node, (ast.Lambda, ast.GeneratorExp, ast.ListComp, ast.SetComp, ast.DictComp)):
+        return
+    elif isinstance(node, ast.BoolOp):
+        for i, value in enumerate(node.values):
+            for pair in _iter_subexpressions(value, unconditional and i == 0):
+                yield pair
+    elif isinstance(node, ast.Compare):
+        # The chained comparisons stop at the first false one.
+        for i, value in enumerate([node.left] + node.comparators):
+            for pair in _iter_subexpressions(value, unconditional and i < 2):
+                yield pair
+    elif isinstance(node, ast.IfExp):
+        for pair in chain(_iter_subexpressions(node.test, unconditional),
+                          _iter_subexpressions(node.body, False),
+                          _iter_subexpressions(node.orelse, False)):
+            yield pair
+    else:
+        for child in ast.iter_child_nodes(node):
+            for pair in _iter_subexpressions(child, unconditional):
+                yield pair
+
+
+class _ReplaceSubexpressions(ast.NodeTransformer):
+    """
+    Replaces the already computed subexpressions with the names they are stored in;
+    the insides of the lambdas and comprehensions are left intact, as they may rebind the names.
+    """
+    def __init__(self, names):
+        self.names = names  # ast.dump() of the subexpression -> name
+
+    def visit(self, node):
+        if isinstance(node, ast.expr) and not isinstance(node, ast.Name):
+            name = self.names.get(ast.dump(node))
+            if name is not None:
+                return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+        if isinstance(node, (ast.Lambda, ast.GeneratorExp, ast.ListComp, ast.SetComp, ast.DictComp)):
+            return node
+        return self.generic_visit(node)
+
+
+def _compile_fused(clauses, arg_names):
+    """
+    Compile the clauses into a single function, which takes the C{arg_names} arguments
+    and returns the index of the first false clause, or -1 if all of them are true.
+
+    The pure subexpressions (see L{_is_pure}) occurring more than once are computed only once,
+    just before the first clause which always evaluates them. The clauses with the list comprehensions
+    are evaluated in their own scopes, as the comprehensions bind their loop variables
+    in the enclosing one, and so could rebind the arguments the following clauses refer to.
+
+    >>> code = _compile_fused(['len(a) > 2', 'b or len(a) < 5', 'len(a) != b'], ('a', 'b'))
+    >>> from types import FunctionType
+    >>> f = FunctionType(code, globals())
+    >>> f('abc', 0), f('abcdef', 0), f('abc', 3), f('a', 0)
+    (-1, 1, 2, 0)
+
+    >>> f = FunctionType(_compile_fused(['all([x > 0 for x in xs])', 'x > 0'], ('x', 'xs')), globals())
+    >>> f(-1, [5]), f(1, [5])
+    (1, -1)
+
+    @type clauses: list
+    @type arg_names: tuple
+
+    @return: The code of the function.
+    @rtype: CodeType
+
+    @raises SyntaxError: If the clauses cannot be compiled together.
+    """
+    trees = [ast.parse(text, mode='eval').body for text in clauses]
+    for index, tree in enumerate(trees):
+        if any(isinstance(node, ast.ListComp) for node in ast.walk(tree)):
+            trees[index] = ast.Call(func=ast.Lambda(args=ast.arguments(args=[ast.Name(id=a, ctx=ast.Param())
+                                                                                 for a in arg_names],
+                                                                       vararg=None, kwarg=None, defaults=[]),
+                                                    body=tree),
+                                    args=[ast.Name(id=a, ctx=ast.Load()) for a in arg_names],
+                                    keywords=[], starargs=None, kwargs=None)
+
+    occurrences = {}  # ast.dump() of the subexpression -> how many times it occurs
+    for tree in trees:
+        for node, unconditional in _iter_subexpressions(tree):
+            if isinstance(node, ast.expr) and not isinstance(node, (ast.Name, ast.Num, ast.Str)) and \
+               _is_pure(node):
+                key = ast.dump(node)
+                occurrences[key] = occurrences.get(key, 0) + 1
+
+    body = []
+    names = {}  # ast.dump() of the computed subexpression -> the name it is stored in
+    for index, tree in enumerate(trees):
+        # Compute the repeated subexpressions which this clause always evaluates, smaller ones first.
+        computed = {}
+        for node, unconditional in _iter_subexpressions(tree):
+            if unconditional and isinstance(node, ast.expr):
+                key = ast.dump(node)
+                if occurrences.get(key, 0) > 1 and key not in names:
+                    computed[key] = node
+        for key, node in sorted(computed.iteritems(), key=lambda (key, node): len(key)):
+            value = _ReplaceSubexpressions(names).visit(node)
+            names[key] = name = '_dbc_cse_%i' % len(names)
+            if name in arg_names:
+                raise SyntaxError('The name %s is reserved' % name)
+            body.append(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value))
+
+        body.append(ast.If(test=ast.UnaryOp(op=ast.Not(), operand=_ReplaceSubexpressions(names).visit(tree)),
+                           body=[ast.Return(value=ast.Num(n=index))],
+                           orelse=[]))
+    body.append(ast.Return(value=ast.Num(n=-1)))
+
+    function = ast.FunctionDef(name='<contract>',
+                               args=ast.arguments(args=[ast.Name(id=a, ctx=ast.Param()) for a in arg_names],
+                                                  vararg=None, kwarg=None, defaults=[]),
+                               body=body,
+                               decorator_list=[])
+    module = ast.fix_missing_locations(ast.Module(body=[function]))
+    return next(c for c in compile(module, '<contract>', 'exec').co_consts if isinstance(c, CodeType))
+
+
+_fused_codes = {}
+
+class _FusedClauses(object):
+    """
+    All the preconditions or all the postconditions of a single function, evaluated together
+    by a single function call, with the common subexpressions computed once (see L{_compile_fused}).
+
+    Only if any clause is false (or the evaluation fails), the clauses are re-checked one by one
+    in the declared order, to report the violation exactly as declared.
+    The compiled code is shared among the functions having the same clauses and arguments.
+
+    >>> @contract_epydoc
+    ... def f(x, xs):
+    ...     '''
+    ...     @postcondition: all([x > 0 for x in xs])
+    ...     @postcondition: x > 0
+    ...     '''
+    ...     return x
+    >>> f._dbc_contract.fused_postconditions is not None
+    True
+    >>> f(-1, [5]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: dbc module (...), f():
+    The following postcondition results in logical False; its definition is:
+        x > 0
+    and its real value is False
+    """
+    __slots__ = ('declared', 'kind', 'function')
+
+    def __init__(self, clauses, kind, ordered_clauses, arg_names, _globals):
+        """
+        @param clauses: The clauses, in the declared order.
+        @param ordered_clauses: The clauses, in the order they should be evaluated.
+        @param arg_names: The names of the variables the clauses may refer to.
+
+        @raises SyntaxError: If the clauses cannot be compiled together.
+        """
+        self.declared = tuple(clauses)
+        self.kind = kind
+        key = (tuple(c.text for c in ordered_clauses), arg_names)
+        code = _fused_codes.get(key)
+        if code is None:
+            code = _fused_codes[key] = _compile_fused(key[0], arg_names)
+        self.function = FunctionType(code, _globals)
+
+    def check(self, f_path, _globals, _locals):
+        """
+        @param _locals: The values for all the C{arg_names}.
+
+        @raises ValueError: If any of the clauses results in logical False.
+        """
+        try:
+            failed = self.function(**_locals)
+        except Exception:
+            failed = 0
+        if failed >= 0:
+            _check_clauses(f_path, self.declared, self.kind, _globals, _locals)
+
+
+class _CallableClauses(object):
+    """
+    All the preconditions or all the postconditions of a single function, given as the callables
+    (see L{contract}); they are called directly with the arguments they need.
+
+    Only if any clause is false (or the call fails), the clauses are re-checked one by one
+    in the declared order, to report the violation exactly as declared.
+    """
+    __slots__ = ('declared', 'kind', 'calls')
+
+    def __init__(self, clauses, kind, calls):
+        """
+        @param clauses: The clauses, in the declared order.
+        @param calls: The C{(callable, argument names)} pairs, in the declared order.
+        """
+        self.declared = tuple(clauses)
+        self.kind = kind
+        self.calls = tuple(calls)
+
+    def check(self, f_path, _globals, _locals):
+        """
+        @raises ValueError: If any of the clauses results in logical False.
+        """
+        try:
+            for function, names in self.calls:
+                if not function(*[_locals[name] for name in names]):
+                    break
+            else:
+                return
+        except Exception:
+            pass
+        _check_clauses(f_path, self.declared, self.kind, _globals, _locals)
+
+
+def _wrap(f, compiled_contract):
+    """
+    Wrap the function to validate its calls against the compiled contract.
+
+    @type compiled_contract: _Contract
+    """
+    @wraps(f)
+    def wrapped_f(*args, **kwargs):
+        # Do we actually want to use the globals with NoneType already imported?
+        #def_globals_with_nonetype = dict(def_globals); def_globals_with_nonetype["NoneType"] = NoneType
+
+        # Not checking (nor counting) the calls of the unsampled requests at all.
+        sampling = _sampling
+        if sampling is not None and not sampling.sampled:
+            return f(*args, **kwargs)
+
+        f_path = compiled_contract.f_path
+        def_globals = compiled_contract.def_globals
+
+        stats = _stats
+        if stats is not None:
+            stats.count(f_path, 0)
+
+        # All values:
+        # First try to use the default values;
+        # then add the positional arguments,
+        # then add the named arguments.
+        values = dict(chain(izip(compiled_contract.posargs, compiled_contract.defaults),
+                            izip(compiled_contract.posargs, args),
+                            kwargs.iteritems()))
+
+        # Validate arguments
+        def_locals = compiled_contract.def_locals
+        for argument, type_definition in compiled_contract.argument_types:
+            assert argument in values, _ViolationMessage('%r not in %r', argument, values)
+            value = values[argument]
+            checker = type_definition.checker or type_definition.get_checker(f_path, def_globals, def_locals)
+
+            if not checker(value):
+                _fail(f_path, "'%s' argument" % argument,
+                      _violation(TypeError, value,
+                                 '%s:\n'
+                                 "The '%s' argument is of %r while must be of %r; "
+                                 'its value is %r', f_path,
+                                                    argument,
+                                                    type(value),
+                                                    checker.types,
+                                                    value),
+                      caller=sys._getframe(1))
+
+        for argument, range_definition in compiled_contract.argument_ranges:
+            value = values[argument]
+            checker = range_definition.checker or \
+                      range_definition.get_checker(f_path, def_globals,
+                                                   def_locals if range_definition.constant else values)
+            in_range = checker(value)
+            if in_range is None:
+                _fail(f_path, "'%s' argument" % argument,
+                      _violation(TypeError, value,
+                                 '%s:\n'
+                                 "The '%s' argument is of %r while must be a real number "
+                                 'or an array of them, within the %s range; its value is %r', f_path,
+                                                                                              argument,
+                                                                                              type(value),
+                                                                                              checker.text,
+                                                                                              value),
+                      caller=sys._getframe(1))
+            elif not in_range:
+                _fail(f_path, "'%s' argument" % argument,
+                      _violation(ValueError, value,
+                                 '%s:\n'
+                                 "The '%s' argument is out of the %s range; "
+                                 'its value is %r', f_path,
+                                                    argument,
+                                                    checker.text,
+                                                    value),
+                      caller=sys._getframe(1))
+
+        arrays = compiled_contract.arrays
+        if arrays is not None:
+            dims = arrays.check_arguments(f_path, values)
+
+        if def_locals is not None:
+            compiled_contract.types_resolved()
+
+        # Validate preconditions.
+        # Preconditions may use the globals from the function definition,
+        # as well as the function arguments.
+        locals_for_preconditions = values
+        if compiled_contract.fused_preconditions is not None:
+            compiled_contract.fused_preconditions.check(f_path, def_globals, locals_for_preconditions)
+        elif compiled_contract.precondition_schedule is not None:
+            compiled_contract.precondition_schedule.check(f_path, def_globals, locals_for_preconditions)
+        else:
+            _check_clauses(f_path, compiled_contract.preconditions, 'precondition',
+                           def_globals, locals_for_preconditions)
+
+        #
+        # Call the desired function
+        #
+        result = f(*args, **kwargs)  # IGNORE THIS LINE
+
+        # Validate return value
+        return_type = compiled_contract.return_type
+        if return_type is not None:
+            checker = return_type.checker or return_type.get_checker(f_path, def_globals, values)
+            if not checker(result):
+                _fail(f_path, 'return value',
+                      _violation(TypeError, result,
+                                 '%s:\n'
+                                 'The following return value is of %r while must be of %r: '
+                                 '%r', f_path,
+                                       type(result),
+                                       checker.types,
+                                       result))
+
+        return_range = compiled_contract.return_range
+        if return_range is not None:
+            checker = return_range.checker or return_range.get_checker(f_path, def_globals, values)
+            in_range = checker(result)
+            if in_range is None:
+                _fail(f_path, 'return value',
+                      _violation(TypeError, result,
+                                 '%s:\n'
+                                 'The return value is of %r while must be a real number '
+                                 'or an array of them, within the %s range: %r', f_path,
+                                                                                 type(result),
+                                                                                 checker.text,
+                                                                                 result))
+            elif not in_range:
+                _fail(f_path, 'return value',
+                      _violation(ValueError, result,
+                                 '%s:\n'
+                                 'The following return value is out of the %s range: '
+                                 '%r', f_path,
+                                       checker.text,
+                                       result))
+
+        if arrays is not None and arrays.result is not None:
+            arrays.check_result(f_path, result, dims)
+
+        # Validate postconditions.
+        # Postconditions may use the globals from the function definition,
+        # as well as the function arguments and the special "result" parameter;
+        # the arguments are not needed anymore, so they are reused rather than copied.
+        locals_for_postconditions = values
+        locals_for_postconditions['result'] = result
+        if compiled_contract.fused_postconditions is not None:
+            compiled_contract.fused_postconditions.check(f_path, def_globals, locals_for_postconditions)
+        else:
+            _check_clauses(f_path, compiled_contract.postconditions, 'postcondition',
+                           def_globals, locals_for_postconditions)
+        if compiled_contract.deferred_postconditions:
+            deferred = _deferred
+            if deferred is None:
+                _check_clauses(f_path, compiled_contract.deferred_postconditions, 'postcondition',
+                               def_globals, locals_for_postconditions)
+            else:
+                deferred.submit(f_path, compiled_contract.deferred_postconditions,
+                                def_globals, locals_for_postconditions)
+
+        # Validations are successful
+        return result
+
+    # For the introspection tools, like dbc.overhead.
+    wrapped_f.__wrapped__ = f
+    wrapped_f._dbc_contract = compiled_contract
+
+    return wrapped_f
+
+
+def _function_base_path(frame):
+    """
+    @param frame: The frame where the function is defined.
+
+    @return: The names of the namespaces (classes and functions) the function is defined in,
+             up to the module, like L{_get_function_base_path_from_stack} but without inspecting the stack.
+    @rtype: basestring
+    """
+    base_function_list = []
+    while frame is not None and frame.f_code.co_name != '<module>':
+        base_function_list.insert(0, frame.f_code.co_name)
+        frame = frame.f_back
+    return '.'.join(base_function_list)
+
+
+def _f_path(f, frame):
+    """
+    @param frame: The frame where the function is defined.
+
+    @return: The path to the function, as shown in the violations.
+    @rtype: basestring
+    """
+    module = sys.modules.get(f.__module__)
+    return '%(mod_name)s module (%(mod_file_path)s), %(func_name)s()' % {
+               'mod_name': f.__module__,
+               'mod_file_path': getattr(module, '__file__', f.func_code.co_filename),
+               'func_name': '.'.join(filter(None, (_function_base_path(frame), f.__name__)))}
+
+
+def _sidecar_contract(f, def_frame):
+    """
+    Find the contract of the function without the docstring (like with C{python -OO})
+    in the sidecar file of its module, see the L{dbc.sidecar} module.
+
+    @param def_frame: The frame where the function is defined.
+
+    @return: The compiled contract, or C{None} if not found.
+    @rtype: _Contract
+    """
+    module_path = getattr(sys.modules.get(f.__module__), '__file__', None)
+    if module_path is None:
+        return None
+
+    from dbc import sidecar
+    contract = sidecar.load(module_path, f.__name__, f.func_code.co_firstlineno)
+    if contract is None:
+        return None
+
+    argspec = inspect.getargspec(f)
+    defaults = argspec.defaults or ()
+    return _Contract(_f_path(f, def_frame),
+                     argspec.args,
+                     (None,) * (len(argspec.args) - len(defaults)) + defaults,
+                     argspec.keywords,
+                     contract,
+                     def_frame.f_globals,
+                     def_frame.f_locals)
+
 
 def contract_epydoc(f):
     """
@@ -197,25 +2102,59 @@ def contract_epydoc(f):
     Inside the epydoc contracts, it supports the following fields:
 
     - C{@type arg:} - the type of the C{arg} argument is validated before the function is called.
+        The type definitions are evaluated on the first call, and reused since then.
 
     - C{@rtype:} - the return type of the function is validated after the function is called.
 
+    - C{@range arg:} - the range of the C{arg} argument, like C{[0, 1)}: the lower and the upper bounds
+        (either may be C{None}), inclusive in the square brackets and exclusive in the parentheses.
+        For the NumPy arrays and the C{array.array} sequences, all the elements should be within the range,
+        which is checked by their minimum and maximum only. The bounds may refer to the arguments
+        (like C{[0, len(a))}); otherwise, they are evaluated on the first call, and reused since then.
+
+    - C{@rrange:} - the range of the return value, the same way as C{@range}.
+
+    - C{@shape arg:} and C{@dtype arg:} - the shape (like C{(n, 3)}) and the dtype (like C{float64},
+        or several of them separated by commas) of the C{arg} array (a NumPy array or an C{array.array}).
+        The dimensions are the fixed sizes, C{None} for any size, or the names of the symbolic dimensions,
+        which should have the same size across all the arrays (and are equal to the arguments
+        of the same name, if any). Only the metadata of the arrays is checked, not their elements.
+
+    - C{@rshape:} and C{@rdtype:} - the shape and the dtype of the returned array, the same way;
+        the symbolic dimensions are bound by the arguments.
+
     - C{@precondition:} - the precondition (that may involve the arguments of the function)
         that should be satisfied before the function is executed.
 
     - C{@postcondition:} - the postcondition (that may involve the result of the function given as C{result} variable)
-        that should be satisfied after the function is executed.
+        that should be satisfied after the function is executed. The postconditions ending
+        with the C{# deferred} comment may be checked in background, see the L{dbc.deferred} module.
+
+    If the function has no docstring (like with C{python -OO}), the contract is looked for
+    in the sidecar file of the module, see the L{dbc.sidecar} module.
+
+    The violations raise C{TypeError} or C{ValueError}, which message is rendered only when needed,
+    with the values shown in a size-bounded form; the offending value itself
+    is available as the C{value} attribute of the exception. For the violations of the argument types
+    and of the preconditions, the place the function was called from is available
+    as the C{caller} attribute (see L{Caller}).
 
     @param f: The function which epydoc documentation should be verified.
     @precondition: callable(f)
     """
     if ENABLED:
+        if getattr(f, '__doc__', '') is None and not isinstance(f, (staticmethod, classmethod)):
+            compiled_contract = _sidecar_contract(f, sys._getframe(1))
+            if compiled_contract is not None:
+                return _wrap(f, compiled_contract)
+
         try:
-            from epydoc import apidoc, docbuilder, markup
+            from epydoc import apidoc, docbuilder, docintrospecter, markup
         except ImportError:
             raise ImportError('To use contract_epydoc() function, '
                               'you must have the epydoc module (often called python-epydoc) installed.\n'
                               'For more details about epydoc installation, see http://epydoc.sourceforge.net/')
+        _register_epydoc_fields()
 
         # Given a method/function, get the module where the function is defined.
         module = inspect.getmodule(f)
@@ -237,12 +2176,6 @@ def contract_epydoc(f):
         # Parse function contract
         contract = docbuilder.build_doc(f)
         
-        preconditions = (description.to_plaintext(_dbc_ds_linker)
-                             for field, argument, description in contract.metadata
-                             if field.singular == 'Precondition')
-        postconditions = (description.to_plaintext(_dbc_ds_linker)
-                              for field, argument, description in contract.metadata
-                              if field.singular == 'Postcondition')
         requirements = (description.to_plaintext(_dbc_ds_linker)
                             for field, argument, description in contract.metadata
                             if field.singular == 'Requires')
@@ -302,141 +2235,206 @@ def contract_epydoc(f):
         def_locals = def_frame.f_locals
         del def_frame
 
-        # Take some data from contract
-        arguments_to_validate = list(contract.arg_types)
+        # Compile the contract; after that, neither the epydoc structures
+        # nor the stack frame are referred to.
+        compiled_contract = _Contract(f_path,
+                                      contract.posargs,
+                                      ((df.pyval if df is not None else None) for df in contract.posarg_defaults),
+                                      contract.kwarg,
+                                      _routine_contract(contract, _dbc_ds_linker),
+                                      def_globals,
+                                      def_locals)
+        # epydoc caches the documentation for every function it has seen, forever.
+        docintrospecter._valuedoc_cache.pop(id(f), None)
+        docintrospecter._introspected_values.pop(id(f), None)
+        docbuilder._name_scores.pop(contract, None)
+        del contract, def_globals, def_locals
+
+        return _wrap(f, compiled_contract)
+    else:
+        return f
 
-        #
-        # At this stage we have "f_path" variable containing the fully qualified name
-        # of the called function.
-        #
-        # Also, "def_globals" and "def_locals" contain the globals/locals of the code
-        # where the decorated function was defined.
-        #
-        # Other available variables are:
-        # * arguments_to_validate
-        # * contract (TODO: is it possible to avoid keeping it in memory?)
-        # * _dbc_ds_linker (TODO: is it possible to avoid keeping it in memory?)
 
+def contract(types=None, rtype=None, ranges=None, rrange=None, shapes=None, rshape=None, dtypes=None, rdtype=None,
+             preconditions=(), postconditions=(), deferred_postconditions=()):
+    """
+    The decorator for the functions which contract is given as the type objects and the callables,
+    rather than as the epydoc-formatted docstring; so the decoration requires
+    neither the docstring parsing nor C{eval()}, nor epydoc at all.
+    The contract is validated the same way as by L{contract_epydoc}, with the same violations.
+
+    >>> @contract(types={'a': int, 'b': (int, long)}, rtype=int,
+    ...           preconditions=[lambda a: a > 0],
+    ...           postconditions=[lambda result, b: result > b])
+    ... def f(a, b=1):
+    ...     return a + b
+    >>> f(1), f(2, b=3)
+    (2, 5)
+
+    >>> f('a') # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: dbc module (...), f():
+    The 'a' argument is of <type 'str'> while must be of <type 'int'>; its value is 'a'
 
-        @wraps(f)
-        def wrapped_f(*args, **kwargs):
-            _stack = inspect.stack()
+    >>> f(-1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: dbc module (...), f():
+    The following precondition results in logical False; its definition is:
+        <lambda>(a)
+    and its real value is False
 
-            # Do we actually want to use the globals with NoneType already imported?
-            #def_globals_with_nonetype = dict(def_globals); def_globals_with_nonetype["NoneType"] = NoneType
+    @param types: The types of the arguments (as for C{isinstance()}), by the argument name.
+    @type types: dict
 
-            # Stack now:
-            # [0] is the level inside wrapped_f.
-            # [1] is the caller.
+    @param rtype: The type of the return value (as for C{isinstance()}).
 
-            # For "globals" dictionary, we should use the globals of the code
-            # that called the wrapper function.
-            call_frame = _stack[1][0]
+    @param ranges: The ranges of the arguments, by the argument name: either as the C{(lower, upper)} tuples
+        of the inclusive bounds (either may be C{None}), or as the range definitions
+        with the constant bounds, like C{'[0, 1)'} (see L{contract_epydoc}).
+    @type ranges: dict
 
-            call_globals = call_frame.f_globals
-            call_locals = call_frame.f_locals
+    @param rrange: The range of the return value, the same way as in C{ranges}.
 
+    @param shapes: The shapes of the array arguments, by the argument name: as the tuples of the dimensions
+        (the fixed sizes, the names of the symbolic dimensions, or C{None} for any size),
+        or as the shape definitions, like C{'(n, 3)'} (see L{contract_epydoc}).
+    @type shapes: dict
 
-            try:
-                expected_types = dict((argument,
-                                       _parse_str_to_type(f_path,
-                                                          contract.arg_types[argument].to_plaintext(_dbc_ds_linker),
-                                                          "'%s' argument" % argument,
-                                                          _globals=def_globals,
-                                                          _locals=def_locals))
-                                          for argument in arguments_to_validate)
-            except Exception, e:
-                raise e
-
-            # All values:
-            # First try to use the default values;
-            # then add the positional arguments,
-            # then add the named arguments.
-            values = dict(chain(izip(contract.posargs,
-                                     ((df.pyval if df is not None else None)
-                                          for df in contract.posarg_defaults)),
-                                izip(contract.posargs, args),
-                                kwargs.iteritems()))
-
-            # Validate arguments
-            for argument in arguments_to_validate:
-                assert argument in values, '%r not in %r' % (argument, values)
-                value = values[argument]
-                expected_type = expected_types[argument]
-
-                if not isinstance(value, expected_type):
-                    raise TypeError('%s:\n'
-                                    "The '%s' argument is of %r while must be of %r; "
-                                    'its value is %r' % (f_path,
-                                                         argument,
-                                                         type(value),
-                                                         expected_type,
-                                                         value))
-
-            # Validate preconditions.
-            # Preconditions may use the globals from the function definition,
-            # as well as the function arguments.
-            locals_for_preconditions = values
-            for description_str in preconditions:
-                value = _parse_str_to_value(f_path,
-                                            description_str,
-                                            'precondition definition',
-                                            _globals=def_globals,
-                                            _locals=locals_for_preconditions)
-                if not value:
-                    raise ValueError('%s:\n'
-                                     'The following precondition results in logical False; '
-                                     'its definition is:\n'
-                                     '\t%s\n'
-                                     'and its real value is %r' % (f_path,
-                                                                   description_str.strip(),
-                                                                   value))
-
-            #
-            # Call the desired function
-            #
-            result = f(*args, **kwargs)  # IGNORE THIS LINE
-
-            # Validate return value
-            if contract.return_type is not None:
-
-                expected_type = _parse_str_to_type(f_path,
-                                                   contract.return_type.to_plaintext(_dbc_ds_linker),
-                                                   'return value',
-                                                   _globals=def_globals,
-                                                   _locals=values)
-                if not isinstance(result, expected_type):
-                    raise TypeError('%s:\n'
-                                    'The following return value is of %r while must be of %r: '
-                                    '%r' % (f_path,
-                                            type(result),
-                                            expected_type,
-                                            result))
-
-            # Validate postconditions.
-            # Postconditions may use the globals from the function definition,
-            # as well as the function arguments and the special "result" parameter.
-            locals_for_postconditions = dict(locals_for_preconditions)
-            locals_for_postconditions['result'] = result
-            for description_str in postconditions:
-                value = _parse_str_to_value(f_path,
-                                            description_str,
-                                            'postcondition definition',
-                                            _globals=def_globals,
-                                            _locals=locals_for_postconditions)
+    @param rshape: The shape of the returned array, the same way as in C{shapes}.
 
-                if not value:
-                    raise ValueError('%s:\n'
-                                     'The following postcondition results in logical False; '
-                                     'its definition is:\n'
-                                     '\t%s\n'
-                                     'and its real value is %r' % (f_path,
-                                                                   description_str.strip(),
-                                                                   value))
-
-            # Validations are successful
-            return result
+    @param dtypes: The dtypes of the array arguments, by the argument name: as the dtype names
+        (or the tuples of them), or as the NumPy dtypes.
+    @type dtypes: dict
+
+    @param rdtype: The dtype of the returned array, the same way as in C{dtypes}.
+
+    @param preconditions: The callables which should return true before the function is executed;
+        the names of their arguments should be the names of the arguments of the function.
+        Any of the clauses may be given as the C{(callable, tier)} pair, with the name of its cost tier
+        (see L{set_tier}); otherwise, it is of the C{normal} tier.
+    @param postconditions: The callables which should return true after the function is executed;
+        besides the arguments of the function, they may take the C{result} argument.
+    @param deferred_postconditions: The postconditions which may be checked
+        in background, see the L{dbc.deferred} module.
+
+    @raises TypeError: If any of the callables takes the unknown arguments.
+    @raises ValueError: If any of the clause tiers is unknown.
+    @raises SyntaxError: If any of the range definitions cannot be compiled or evaluated.
+    """
+    def decorator(f):
+        if not ENABLED:
+            return f
+        if isinstance(f, (staticmethod, classmethod)):
+            raise NotImplementedError('The @contract decorator is not supported '
+                                      'for either staticmethod or classmethod functions; '
+                                      'please use it before (below) turning a function into '
+                                      'a static method or a class method.')
+
+        compiled_contract = _CallableContract(_f_path(f, sys._getframe(1)), f, types or {}, rtype,
+                                              ranges or {}, rrange, shapes or {}, rshape, dtypes or {}, rdtype,
+                                              preconditions, postconditions, deferred_postconditions)
+        return _wrap(f, compiled_contract)
 
-        return wrapped_f
+    return decorator
+
+
+def set_tier(tier, module=None):
+    """
+    Choose the most expensive cost tier of the clauses checked, globally or for the module.
+
+    The clause is marked with its tier by the comment at its end: C{# cheap}, C{# normal},
+    C{# expensive} or C{# paranoid}, from the cheapest (it may be followed by the C{# deferred} comment);
+    the unmarked clauses are of the C{normal} tier. The clauses of the more expensive tiers
+    are left out of the contracts, both of the already decorated functions and of those decorated later,
+    rather than skipped on every call. Initially, all the clauses are checked, unless
+    the C{DBC_TIER} environment variable chooses the tiers, like C{cheap,mypackage.db=expensive}.
+
+    >>> @contract_epydoc
+    ... def f(a):
+    ...     '''
+    ...     @precondition: a > 0  # cheap
+    ...     @precondition: a % 2 == 0
+    ...     @precondition: a not in [x for x in xrange(100, 200)]  # expensive
+    ...     '''
+    ...     return a
+    >>> set_tier('cheap', module=__name__)
+    >>> f(3), get_tier(__name__), get_tier()
+    (3, 'cheap', 'paranoid')
+    >>> f(-1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: dbc module (...), f():
+    The following precondition results in logical False; its definition is:
+        a > 0  # cheap
+    and its real value is False
+
+    >>> set_tier('normal')
+    >>> set_tier(None, module=__name__)
+    >>> f(150)
+    150
+    >>> f(3) # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    ValueError: ...
+    >>> set_tier('paranoid')
+
+    @param tier: The name of the tier, or C{None} to check the module by the global tier again.
+
+    @param module: The name of the module, or of the package (for all its modules);
+                   by default, the global tier is chosen.
+
+    @raises ValueError: If the tier is unknown.
+    """
+    global _tier
+    if module is None:
+        _tier = _tier_index(tier)
+    elif tier is None:
+        _module_tiers.pop(module, None)
     else:
-        return f
+        _module_tiers[module] = _tier_index(tier)
+
+    for compiled_contract in list(_tiered_contracts):
+        compiled_contract.select_clauses(_module_tier(compiled_contract.module))
+
+
+def get_tier(module=None):
+    """
+    @param module: The name of the module; by default, the global tier is returned.
+
+    @return: The name of the most expensive cost tier of the clauses checked in the module (see L{set_tier}).
+    @rtype: str
+    """
+    return _TIERS[_module_tier(module)]
+
+
+def _set_tiers_from_environment():
+    """
+    Choose the tiers by the C{DBC_TIER} environment variable, like C{cheap,mypackage.db=expensive}.
+    The unknown tiers are warned about and ignored, so C{import dbc} never fails because of them.
+
+    >>> import warnings
+    >>> os.environ['DBC_TIER'] = 'dbc.example=cheapest'
+    >>> with warnings.catch_warnings(record=True) as caught:
+    ...     warnings.simplefilter('always')
+    ...     _set_tiers_from_environment()
+    >>> print caught[0].message
+    Ignoring 'dbc.example=cheapest' in DBC_TIER: Unknown tier 'cheapest', should be one of: cheap, normal, expensive, paranoid
+    >>> get_tier('dbc.example')
+    'paranoid'
+    >>> del os.environ['DBC_TIER']
+    """
+    for item in filter(None, os.environ.get('DBC_TIER', '').split(',')):
+        module, _, tier = item.strip().rpartition('=')
+        try:
+            set_tier(tier.strip(), module=module.strip() or None)
+        except ValueError, e:
+            warnings.warn('Ignoring %r in DBC_TIER: %s' % (item.strip(), e), RuntimeWarning)
+
+_set_tiers_from_environment()
+
+
+# The code of the wrapper functions, to find their callers.
+_WRAPPER_CODE = next(c for c in _wrap.func_code.co_consts
+                         if isinstance(c, CodeType) and c.co_name == 'wrapped_f')
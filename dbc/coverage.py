@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+Coverage of the contract clauses.
+
+When enabled, every C{@precondition} and C{@postcondition} clause compiled since then
+is registered, and every evaluation of the clause sets the bits in the preallocated bitmaps:
+whether the clause was ever evaluated, and whether it was ever false (or failed to evaluate).
+There are neither dict writes nor allocations per call.
+
+At exit, every process dumps its report to its own file in the directory; the reports
+from all the processes are merged by the command line tool::
+
+    python -m dbc.coverage DIRECTORY
+
+Enable the coverage before importing the modules to be covered, as the clauses compiled
+before that are not registered.
+
+>>> import tempfile, shutil
+>>> from dbc import contract_epydoc
+>>> directory = tempfile.mkdtemp()
+>>> coverage = enable(directory)
+
+>>> @contract_epydoc
+... def f(a):
+...     '''
+...     @precondition: a > 0
+...     @precondition: a != 42
+...     @postcondition: result > 0
+...     '''
+...     return a
+>>> f(1)
+1
+>>> f(-1) # doctest: +ELLIPSIS
+Traceback (most recent call last):
+  ...
+ValueError: ...
+
+>>> disable()
+>>> print format_report(merge(directory)) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+evaluated  was false  clause
+      yes        yes  dbc.coverage module (...), f(): precondition a > 0
+      yes         no  dbc.coverage module (...), f(): precondition a != 42
+      yes         no  dbc.coverage module (...), f(): postcondition result > 0
+<BLANKLINE>
+3 clauses, 0 never evaluated, 2 never false.
+>>> shutil.rmtree(directory)
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('ContractCoverage', 'enable', 'disable', 'merge', 'format_report')
+
+import os, glob, json, atexit, optparse
+
+import dbc
+
+
+_FILE_PATTERN = 'dbc-coverage-%i.json'
+
+
+class ContractCoverage(object):
+    """
+    The coverage of the contract clauses in the current process.
+    """
+
+    def __init__(self, directory):
+        """
+        @param directory: The directory to dump the report to.
+        @type directory: basestring
+        """
+        self.directory = directory
+        self.clauses = []  # (function path, kind, clause text) for every registered clause
+        self.evaluated = bytearray()
+        self.false = bytearray()
+
+    def register(self, f_path, kind, text):
+        """
+        Register a new clause; called when the clause is compiled.
+
+        @return: The index of the clause in the bitmaps.
+        @rtype: int
+        """
+        index = len(self.clauses)
+        self.clauses.append((f_path, kind, text))
+        if index >> 3 >= len(self.evaluated):
+            self.evaluated.append(0)
+            self.false.append(0)
+        return index
+
+    def hit(self, index, value):
+        """
+        Mark the clause as evaluated to the value.
+        """
+        byte, bit = index >> 3, 1 << (index & 7)
+        self.evaluated[byte] |= bit
+        if not value:
+            self.false[byte] |= bit
+
+    def report(self):
+        """
+        @return: The records (as dictionaries) for every registered clause.
+        @rtype: list
+        """
+        return [{'function': f_path,
+                 'kind': kind,
+                 'clause': text,
+                 'evaluated': bool(self.evaluated[index >> 3] & 1 << (index & 7)),
+                 'false': bool(self.false[index >> 3] & 1 << (index & 7))}
+                    for index, (f_path, kind, text) in enumerate(self.clauses)]
+
+    def dump(self):
+        """
+        Write the report to the file named after the current process id.
+
+        @return: The path to the file.
+        @rtype: basestring
+        """
+        path = os.path.join(self.directory, _FILE_PATTERN % os.getpid())
+        with open(path, 'w') as fh:
+            json.dump(self.report(), fh, indent=1)
+        return path
+
+
+def merge(directory):
+    """
+    Merge the reports of all the processes in the directory.
+
+    @return: The merged records, in the order the clauses were first seen.
+    @rtype: list
+    """
+    merged = {}
+    order = []
+    for path in sorted(glob.glob(os.path.join(directory, _FILE_PATTERN.replace('%i', '*')))):
+        with open(path) as fh:
+            for record in json.load(fh):
+                key = (record['function'], record['kind'], record['clause'])
+                if key in merged:
+                    merged[key]['evaluated'] |= record['evaluated']
+                    merged[key]['false'] |= record['false']
+                else:
+                    merged[key] = record
+                    order.append(key)
+    return [merged[k] for k in order]
+
+
+def format_report(records):
+    """
+    @param records: The result of L{merge} or L{ContractCoverage.report}.
+    @rtype: basestring
+    """
+    yes_no = lambda flag: 'yes' if flag else 'no'
+    lines = ['%9s %10s  %s' % ('evaluated', 'was false', 'clause')]
+    lines.extend('%9s %10s  %s: %s %s' % (yes_no(r['evaluated']), yes_no(r['false']),
+                                          r['function'], r['kind'], r['clause'])
+                     for r in records)
+    lines.append('')
+    lines.append('%i clauses, %i never evaluated, %i never false.' % (
+                     len(records),
+                     sum(1 for r in records if not r['evaluated']),
+                     sum(1 for r in records if r['evaluated'] and not r['false'])))
+    return '\n'.join(lines)
+
+
+def enable(directory):
+    """
+    Start recording the coverage of the clauses compiled since now;
+    the report is dumped to the directory at exit.
+
+    @rtype: ContractCoverage
+    """
+    disable()
+    coverage = ContractCoverage(directory)
+    dbc._coverage = coverage
+    return coverage
+
+
+def disable():
+    """
+    Stop registering the new clauses, and dump the report.
+    """
+    coverage, dbc._coverage = dbc._coverage, None
+    if coverage is not None:
+        coverage.dump()
+
+
+atexit.register(disable)
+
+
+def main():
+    """Merge the contract coverage reports of all the processes
+
+    Merges all the coverage reports in the directory, and prints
+    whether every clause was ever evaluated, and whether it was ever false.
+    """
+    p = optparse.OptionParser(usage='%prog [options] DIRECTORY\n\n' + main.__doc__)
+    options, args = p.parse_args()
+    if len(args) != 1:
+        p.error('incorrect args')
+    print format_report(merge(args[0]))
+
+
+if __name__ == '__main__':
+    main()
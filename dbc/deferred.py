@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+Deferred postconditions, checked in background off the calling thread.
+
+Some postconditions (like verifying that the result is sorted and has no duplicates) may cost
+more than the function itself. Such postconditions may be marked as deferred, with
+the C{# deferred} comment at the end of the clause::
+
+    @postcondition: result == sorted(set(result))  # deferred
+
+Until the deferred checking is enabled, they are checked as usual. When it is enabled,
+the wrapped function returns the result immediately, and the deferred postconditions are checked
+by the pool of background threads. They see the shallow snapshot of the arguments and of the result
+(the lists, dicts, sets and bytearrays are copied; any other values, supposedly immutable, are not).
+The violations are not raised, but delivered to the sink: to the reporter,
+if the report-only mode (see L{dbc.report}) is enabled; otherwise, to the given callable
+or just logged to the C{dbc} logger.
+
+The queue of the pending checks is bounded: when it is more than half full, only every
+C{sample_period}-th check is queued; when it is full, the checks are dropped.
+Both are counted, as C{sampled_out} and C{dropped} attributes of the L{DeferredChecker}.
+
+The functions inlined by L{dbc.inline} check all their postconditions immediately.
+
+>>> from dbc import contract_epydoc
+>>> violations = []
+>>> checker = enable(sink=lambda f_path, clause, exc: violations.append(clause))
+
+>>> @contract_epydoc
+... def f(a):
+...     '''
+...     @type a: list
+...     @postcondition: result == sorted(set(result))  # deferred
+...     '''
+...     return a
+>>> f([1, 2, 3]), f([2, 1])
+([1, 2, 3], [2, 1])
+>>> checker.join()
+>>> for clause in violations:
+...     print clause
+result == sorted(set(result))  # deferred
+
+>>> disable()
+>>> f([2, 1]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+ValueError: dbc.deferred module (...), f():
+The following postcondition results in logical False; its definition is:
+    result == sorted(set(result))  # deferred
+and its real value is False
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('DeferredChecker', 'enable', 'disable')
+
+import atexit, logging, threading, Queue
+
+import dbc
+
+
+# The mutable types which values are copied for the deferred checks.
+_COPIED_TYPES = (list, dict, set, bytearray)
+
+
+def _snapshot(value):
+    """
+    @return: The shallow copy of the value if it is of the known mutable type; otherwise, the value itself.
+    """
+    return type(value)(value) if type(value) in _COPIED_TYPES else value
+
+
+def _log_violation(f_path, clause, exc):
+    logging.getLogger('dbc').warning('%s: %s', type(exc).__name__, exc)
+
+
+class DeferredChecker(object):
+    """
+    The pool of background threads checking the deferred postconditions.
+    """
+
+    def __init__(self, workers=2, queue_size=1024, sample_period=10, sink=None):
+        """
+        @param workers: The number of the background threads.
+        @type workers: int
+
+        @param queue_size: How many checks may be pending.
+        @type queue_size: int
+
+        @param sample_period: When the queue is more than half full, only every C{sample_period}-th
+                              check is queued.
+        @type sample_period: int
+
+        @param sink: The callable to deliver the violations to, as C{sink(f_path, clause, exc)};
+                     by default, the violations are logged.
+
+        @precondition: workers > 0
+        @precondition: queue_size > 0
+        @precondition: sample_period > 0
+        """
+        self.workers = workers
+        self.sample_period = sample_period
+        self.sink = sink if sink is not None else _log_violation
+
+        # How many checks were not queued, as the queue was full or more than half full.
+        self.dropped = 0
+        self.sampled_out = 0
+
+        self._queue = Queue.Queue(queue_size)
+        self._busy_calls = 0
+        self._threads = []
+
+    def submit(self, f_path, clauses, _globals, _locals):
+        """
+        Queue the check of the clauses; called by the wrapped functions instead of checking them.
+        """
+        queue = self._queue
+        if queue.qsize() * 2 >= queue.maxsize:
+            self._busy_calls += 1
+            if self._busy_calls % self.sample_period:
+                self.sampled_out += 1
+                return
+
+        snapshot = dict((name, _snapshot(value)) for name, value in _locals.iteritems())
+        try:
+            queue.put_nowait((f_path, clauses, _globals, snapshot))
+        except Queue.Full:
+            self.dropped += 1
+
+    def _check(self, f_path, clauses, _globals, _locals):
+        for clause in clauses:
+            try:
+                dbc._check_clauses(f_path, (clause,), 'postcondition', _globals, _locals)
+            except (ValueError, SyntaxError), e:
+                self.sink(f_path, clause.text, e)
+
+    def _run(self):
+        queue = self._queue
+        while True:
+            item = queue.get()
+            try:
+                if item is None:
+                    return
+                self._check(*item)
+            except Exception:
+                logging.getLogger('dbc').exception('Deferred postcondition check failed')
+            finally:
+                queue.task_done()
+
+    def join(self):
+        """
+        Wait until all the queued checks are done.
+        """
+        self._queue.join()
+
+    def start(self):
+        """
+        Start the background threads.
+        """
+        for i in xrange(self.workers):
+            thread = threading.Thread(target=self._run, name='dbc-deferred-%i' % i)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Finish all the queued checks, and stop the background threads.
+        """
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        del self._threads[:]
+
+
+def enable(**kwargs):
+    """
+    Enable checking the deferred postconditions in background.
+
+    @param kwargs: The arguments for L{DeferredChecker}.
+
+    @return: The new checker, already started.
+    @rtype: DeferredChecker
+    """
+    disable()
+    checker = DeferredChecker(**kwargs)
+    checker.start()
+    dbc._deferred = checker
+    return checker
+
+
+def disable():
+    """
+    Check the deferred postconditions immediately again, finishing the queued checks.
+    """
+    checker, dbc._deferred = dbc._deferred, None
+    if checker is not None:
+        checker.stop()
+
+
+atexit.register(disable)
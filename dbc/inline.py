@@ -0,0 +1,829 @@
+#!/usr/bin/env python
+"""
+Import hook that inlines the contracts into the functions, instead of wrapping them.
+
+For the modules opted in via L{install}, every function decorated with C{contract_epydoc}
+is rewritten when the module is imported: the C{@type} checks and the preconditions are called
+at the top of the function body, and the C{@rtype} check and the postconditions before every
+C{return}; the decorator itself is removed. So there is no wrapper frame and no argument repacking
+on every call. The checks are generated as the separate functions at the module level,
+so the clauses see only the arguments and the globals, like in C{contract_epydoc}: neither the locals
+of the function, nor the ones of the enclosing functions. If any C{return} is inside the C{try}
+or C{with} block, the function body is moved into the inner function and its result is checked
+outside it, so the exception handlers of the function do not intercept the violations.
+Also, the C{typed(x, T)} and C{ntyped(x, T)} calls (where C{x} is a plain name)
+are rewritten into the inline C{isinstance()} checks.
+
+The violations raise (or are reported) the same way as in C{contract_epydoc}.
+The following functions are not inlined and stay wrapped by C{contract_epydoc}:
+the generators; the functions with the tuple-unpacking arguments or with the C{@type} fields
+for the arguments not in the signature; the functions with the C{@range}, C{@shape} or C{@dtype} fields
+(or their counterparts for the return value); the methods which contracts refer to the names
+defined in the class body (as they are not visible from the method body); and the nested functions
+which type definitions refer to the names defined in the enclosing functions.
+
+The inlined functions are not counted by L{dbc.stats} (though their violations are),
+and their clauses are not recorded by L{dbc.coverage}. Only the clauses up to the tier
+chosen for the module (see L{dbc.set_tier}) when it is imported are inlined;
+choosing the tier later does not affect the inlined functions.
+
+>>> import os, sys, tempfile, shutil
+>>> directory = tempfile.mkdtemp()
+>>> with open(os.path.join(directory, 'dbc_inline_example.py'), 'w') as fh:
+...     fh.write('''
+... from dbc import contract_epydoc, typed
+...
+... @contract_epydoc
+... def f(a, b=1):
+...     \"\"\"
+...     @type a: int
+...     @precondition: a > 0
+...     @rtype: int
+...     @postcondition: result > a
+...     \"\"\"
+...     if a == 42:
+...         return a
+...     return a + typed(b, int)
+...
+... @contract_epydoc
+... def g(a):
+...     \"\"\"
+...     @precondition: a in range(10)
+...     @rtype: int
+...     \"\"\"
+...     range = None
+...     try:
+...         return a
+...     except TypeError:
+...         return 7
+... ''')
+>>> sys.path.insert(0, directory)
+>>> install('dbc_inline_example')
+
+>>> import dbc_inline_example
+>>> dbc_inline_example.f(5)
+6
+>>> hasattr(dbc_inline_example.f, '__wrapped__')
+False
+
+>>> dbc_inline_example.f(-1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+ValueError: dbc_inline_example module (...dbc_inline_example.py), f():
+The following precondition results in logical False; its definition is:
+    a > 0
+and its real value is False
+
+>>> try:
+...     dbc_inline_example.f(-1)
+... except ValueError, e:
+...     print e.caller.function
+<module>
+
+>>> dbc_inline_example.f(42) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+ValueError: dbc_inline_example module (...dbc_inline_example.py), f():
+The following postcondition results in logical False; its definition is:
+    result > a
+and its real value is False
+
+>>> dbc_inline_example.f(5, 'x') # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+AssertionError: Value 'x' of type <type 'str'> is not among the allowed types: <type 'int'>
+
+>>> dbc_inline_example.g(5), hasattr(dbc_inline_example.g, '__wrapped__')
+(5, False)
+>>> dbc_inline_example.g(5.0) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+TypeError: dbc_inline_example module (...dbc_inline_example.py), g():
+The following return value is of <type 'float'> while must be of <type 'int'>: 5.0
+
+>>> uninstall()
+>>> del sys.modules['dbc_inline_example']
+>>> sys.path.remove(directory)
+>>> shutil.rmtree(directory)
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('install', 'uninstall', 'transform', 'DbcTransformer', 'SourceImporter')
+
+import os, sys, imp, ast, struct, marshal
+
+import dbc
+from dbc import _violation, _fail
+
+
+# The name the helper module is imported as, into every transformed module.
+_HELPER = '_dbc_inline'
+# The name the return value is stored in.
+_RESULT = '_dbc_result'
+# The prefix for the names the original argument values are stored in, for the postconditions.
+_ARGUMENT = '_dbc_arg_'
+# The name of the inner function the body is moved into, when it cannot be checked in place.
+_BODY = '_dbc_body'
+# The prefix for the names of the generated functions checking the contracts.
+_CHECK = '_dbc_check_'
+# Increment on every change of the transformations, to invalidate the cached bytecode.
+_CACHE_VERSION = 6
+
+
+#
+# The helpers called by the generated checking functions, only when a check fails;
+# so the frame of the checking function is sys._getframe(1), the frame of the inlined function
+# is sys._getframe(2), and its caller is sys._getframe(3).
+#
+
+def argument_violation(f_path, argument, value, expected_type):
+    _fail(f_path, "'%s' argument" % argument,
+          _violation(TypeError, value,
+                     '%s:\n'
+                     "The '%s' argument is of %r while must be of %r; "
+                     'its value is %r', f_path, argument, type(value), expected_type, value),
+          caller=sys._getframe(3))
+
+
+def return_violation(f_path, value, expected_type):
+    _fail(f_path, 'return value',
+          _violation(TypeError, value,
+                     '%s:\n'
+                     'The following return value is of %r while must be of %r: '
+                     '%r', f_path, type(value), expected_type, value))
+
+
+def clause_violation(f_path, kind, text, value):
+    _fail(f_path, text,
+          _violation(ValueError, value,
+                     '%s:\n'
+                     'The following %s results in logical False; '
+                     'its definition is:\n'
+                     '\t%s\n'
+                     'and its real value is %r', f_path, kind, text, value),
+          caller=sys._getframe(3) if kind == 'precondition' else None)
+
+
+def typed_violation(var, types):
+    dbc.typed(var, types)  # raises
+    return var
+
+
+def ntyped_violation(var, types):
+    dbc.ntyped(var, types)  # raises
+    return var
+
+
+#
+# Parsing the contracts.
+#
+
+def parse_contract(docstring):
+    """
+    Parse the epytext docstring into the contract.
+
+    >>> sorted(parse_contract('''
+    ...     @type a: int
+    ...     @precond: a >
+    ...         0
+    ...     @rtype: int
+    ... ''').iteritems()) # doctest: +NORMALIZE_WHITESPACE
+    [('arg_dtypes', {}), ('arg_ranges', {}), ('arg_shapes', {}), ('arg_types', {'a': 'int'}),
+     ('postconditions', []), ('preconditions', ['a > 0']),
+     ('return_dtype', None), ('return_range', None), ('return_shape', None), ('return_type', 'int')]
+
+    @return: The dictionary with C{arg_types}, C{return_type}, C{arg_ranges}, C{return_range},
+             C{arg_shapes}, C{return_shape}, C{arg_dtypes}, C{return_dtype},
+             C{preconditions} and C{postconditions} keys, all the definitions being the stripped plain text.
+    @rtype: dict
+
+    @raises SyntaxError: If the docstring cannot be parsed.
+    """
+    from epydoc import docstringparser
+    from epydoc.markup import epytext
+
+    singular = dict((tag, field.singular)
+                        for field in docstringparser.STANDARD_FIELDS
+                        for tag in field.tags)
+    errors = []
+    parsed = epytext.parse_docstring(docstring, errors)
+    body, fields = parsed.split_fields(errors)
+    if any(e.is_fatal() for e in errors):
+        raise SyntaxError('Cannot parse the docstring: %s' % '; '.join(str(e) for e in errors))
+
+    contract = {'arg_types': {}, 'return_type': None, 'arg_ranges': {}, 'return_range': None,
+                'arg_shapes': {}, 'return_shape': None, 'arg_dtypes': {}, 'return_dtype': None,
+                'preconditions': [], 'postconditions': []}
+    for field in fields:
+        tag = field.tag()
+        text = field.body().to_plaintext(None).strip()
+        if tag == 'type' and field.arg() is not None:
+            contract['arg_types'][field.arg()] = text
+        elif tag in ('rtype', 'returntype'):
+            contract['return_type'] = text
+        elif tag in ('range', 'shape', 'dtype') and field.arg() is not None:
+            contract['arg_%ss' % tag][field.arg()] = text
+        elif tag in ('rrange', 'returnrange'):
+            contract['return_range'] = text
+        elif tag in ('rshape', 'returnshape'):
+            contract['return_shape'] = text
+        elif tag in ('rdtype', 'returndtype'):
+            contract['return_dtype'] = text
+        elif singular.get(tag) == 'Precondition':
+            contract['preconditions'].append(text)
+        elif singular.get(tag) == 'Postcondition':
+            contract['postconditions'].append(text)
+    return contract
+
+
+#
+# Transforming the syntax tree.
+#
+
+def _parse_expression(text):
+    return ast.parse(text, mode='eval').body
+
+
+def _names(node):
+    return set(n.id for n in ast.walk(node) if isinstance(n, ast.Name))
+
+
+def _walk_own(nodes):
+    """
+    Walk the nodes, not descending into the nested functions, lambdas and classes.
+    """
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (ast.FunctionDef, ast.Lambda, ast.ClassDef)):
+                stack.append(child)
+
+
+def _helper_call(name, *args):
+    """
+    @return: The C{_dbc_inline.name(*args)} call expression.
+    """
+    return ast.Call(func=ast.Attribute(value=ast.Name(id=_HELPER, ctx=ast.Load()), attr=name, ctx=ast.Load()),
+                    args=list(args), keywords=[], starargs=None, kwargs=None)
+
+
+def _str(s):
+    return ast.Str(s=s)
+
+
+def _type_check(f_path, value, type_text, violation_args):
+    """
+    @return: The statement: if not isinstance(value, T): violation.
+    """
+    return ast.If(test=ast.UnaryOp(op=ast.Not(),
+                                   operand=ast.Call(func=ast.Name(id='isinstance', ctx=ast.Load()),
+                                                    args=[value, _parse_expression(type_text)],
+                                                    keywords=[], starargs=None, kwargs=None)),
+                  body=[ast.Expr(value=_helper_call(*violation_args + (_parse_expression(type_text),)))],
+                  orelse=[])
+
+
+def _clause_checks(f_path, kind, texts, params):
+    """
+    @param params: The names of the arguments of the checking function the clauses are evaluated in.
+
+    @return: The statements evaluating every clause and reporting the violation if it is false.
+    """
+    value_name = '_dbc_value'
+    statements = []
+    for text in texts:
+        expression = _parse_expression(text)
+        if any(isinstance(n, ast.ListComp) for n in ast.walk(expression)):
+            # The list comprehensions bind their loop variables in the enclosing scope,
+            # so such clauses are evaluated in their own one, not to rebind the arguments.
+            expression = ast.Call(func=ast.Lambda(args=_arguments(params), body=expression),
+                                  args=[ast.Name(id=p, ctx=ast.Load()) for p in params],
+                                  keywords=[], starargs=None, kwargs=None)
+        statements.append(ast.Assign(targets=[ast.Name(id=value_name, ctx=ast.Store())], value=expression))
+        statements.append(ast.If(test=ast.UnaryOp(op=ast.Not(), operand=ast.Name(id=value_name, ctx=ast.Load())),
+                                 body=[ast.Expr(value=_helper_call('clause_violation',
+                                                                   _str(f_path), _str(kind), _str(text),
+                                                                   ast.Name(id=value_name, ctx=ast.Load())))],
+                                 orelse=[]))
+    return statements
+
+
+def _arguments(names):
+    """
+    @return: The arguments of the function taking the given names positionally.
+    @rtype: ast.arguments
+    """
+    return ast.arguments(args=[ast.Name(id=name, ctx=ast.Param()) for name in names],
+                         vararg=None, kwarg=None, defaults=[])
+
+
+def _call(name, args, starargs=None, kwargs=None):
+    """
+    @return: The C{name(*args)} call statement.
+    """
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[ast.Name(id=a, ctx=ast.Load()) for a in args],
+                    keywords=[],
+                    starargs=ast.Name(id=starargs, ctx=ast.Load()) if starargs else None,
+                    kwargs=ast.Name(id=kwargs, ctx=ast.Load()) if kwargs else None)
+
+
+def _bound_names(node):
+    """
+    @return: The names bound in the function itself (but not in the nested functions).
+    @rtype: set
+    """
+    args = node.args
+    names = set(n.id for n in ast.walk(args) if isinstance(n, ast.Name)) | set(filter(None, [args.vararg, args.kwarg]))
+    for n in _walk_own(node.body):
+        if isinstance(n, ast.Name) and isinstance(n.ctx, (ast.Store, ast.Param)):
+            names.add(n.id)
+        elif isinstance(n, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in n.names)
+        for child in ast.iter_child_nodes(n):
+            if isinstance(child, (ast.FunctionDef, ast.ClassDef)):
+                names.add(child.name)
+    for child in node.body:
+        if isinstance(child, (ast.FunctionDef, ast.ClassDef)):
+            names.add(child.name)
+    return names
+
+
+def _returns_in_handlers(nodes):
+    """
+    @return: Whether any C{return} of the function (but not of the nested functions)
+             is inside the C{try} or C{with} block, which could intercept the violation.
+    """
+    return any(isinstance(n, ast.Return)
+                   for block in _walk_own(nodes)
+                   if isinstance(block, (ast.TryExcept, ast.TryFinally, ast.With))
+                   for n in _walk_own([block]))
+
+
+class _ReturnRewriter(ast.NodeTransformer):
+    """
+    Rewrites every C{return X} of the function (but not of the nested functions)
+    into storing the result, checking it, and returning it.
+    """
+    def __init__(self, make_checks):
+        self.make_checks = make_checks
+
+    def visit_FunctionDef(self, node):
+        return node
+
+    visit_Lambda = visit_ClassDef = visit_FunctionDef
+
+    def visit_Return(self, node):
+        value = node.value if node.value is not None else ast.Name(id='None', ctx=ast.Load())
+        statements = [ast.Assign(targets=[ast.Name(id=_RESULT, ctx=ast.Store())], value=value)]
+        statements.extend(self.make_checks())
+        statements.append(ast.Return(value=ast.Name(id=_RESULT, ctx=ast.Load())))
+        return [ast.copy_location(s, node) for s in statements]
+
+
+class DbcTransformer(ast.NodeTransformer):
+    """
+    The base for the module syntax tree transformations, which tracks the names
+    the dbc module and its functions are imported as.
+    """
+
+    def __init__(self):
+        self.decorator_names = set()  # the names contract_epydoc is imported as
+        self.dbc_names = set()  # the names dbc module is imported as
+        self.typed_names = {}  # the names typed/ntyped are imported as -> the original name
+        self.changed = False
+
+    def visit_ImportFrom(self, node):
+        if node.module == 'dbc' and not node.level:
+            for alias in node.names:
+                if alias.name == 'contract_epydoc':
+                    self.decorator_names.add(alias.asname or alias.name)
+                elif alias.name in ('typed', 'ntyped'):
+                    self.typed_names[alias.asname or alias.name] = alias.name
+        return node
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name == 'dbc':
+                self.dbc_names.add(alias.asname or alias.name)
+        return node
+
+    def _is_contract_decorator(self, node):
+        if isinstance(node, ast.Name):
+            return node.id in self.decorator_names
+        elif isinstance(node, ast.Attribute):
+            return (node.attr == 'contract_epydoc' and
+                    isinstance(node.value, ast.Name) and node.value.id in self.dbc_names)
+        return False
+
+    def _typed_kind(self, node):
+        """
+        @param node: The call.
+        @type node: ast.Call
+
+        @return: C{'typed'} or C{'ntyped'} if the node is the C{typed(var, types)}
+                 or C{ntyped(var, types)} call; otherwise C{None}.
+        """
+        if isinstance(node.func, ast.Name) and node.func.id in self.typed_names:
+            kind = self.typed_names[node.func.id]
+        elif (isinstance(node.func, ast.Attribute) and node.func.attr in ('typed', 'ntyped') and
+              isinstance(node.func.value, ast.Name) and node.func.value.id in self.dbc_names):
+            kind = node.func.attr
+        else:
+            return None
+        if len(node.args) != 2 or node.keywords or node.starargs or node.kwargs:
+            return None
+        return kind
+
+
+class ContractInliner(DbcTransformer):
+    """
+    Transforms the module syntax tree, inlining the contracts.
+    """
+
+    def __init__(self, module_name, filename):
+        DbcTransformer.__init__(self)
+        self.module_name = module_name
+        self.filename = filename
+        self.scopes = []  # the enclosing (class or function) definitions
+        # The generated checking functions, to be defined at the module level.
+        self.checks = []
+        self.check_count = 0
+
+    def visit_ClassDef(self, node):
+        self.scopes.append(node)
+        self.generic_visit(node)
+        self.scopes.pop()
+        return node
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if sys.flags.optimize:
+            return node  # typed() and ntyped() do nothing anyway
+
+        kind = self._typed_kind(node)
+        if kind is None or not isinstance(node.args[0], ast.Name):
+            return node
+
+        var, types = node.args
+        test = ast.Call(func=ast.Name(id='isinstance', ctx=ast.Load()), args=[var, types],
+                        keywords=[], starargs=None, kwargs=None)
+        if kind == 'ntyped':
+            test = ast.BoolOp(op=ast.Or(), values=[ast.Compare(left=ast.Name(id=var.id, ctx=ast.Load()),
+                                                               ops=[ast.Is()],
+                                                               comparators=[ast.Name(id='None', ctx=ast.Load())]),
+                                                   test])
+        self.changed = True
+        return ast.copy_location(ast.IfExp(test=test,
+                                           body=ast.Name(id=var.id, ctx=ast.Load()),
+                                           orelse=_helper_call('%s_violation' % kind,
+                                                               ast.Name(id=var.id, ctx=ast.Load()),
+                                                               types)),
+                                 node)
+
+    def visit_FunctionDef(self, node):
+        self.scopes.append(node)
+        self.generic_visit(node)
+        self.scopes.pop()
+
+        decorators = [d for d in node.decorator_list if self._is_contract_decorator(d)]
+        if not decorators:
+            return node
+        contract = self._get_contract(node)
+        if contract is None:
+            return node  # leave it wrapped
+
+        node.decorator_list = [d for d in node.decorator_list if d not in decorators]
+        self.checks.extend(ast.copy_location(c, node) for c in self._inline(node, contract))
+        self.changed = True
+        return node
+
+    def _get_contract(self, node):
+        """
+        @return: The contract of the function, or C{None} if it cannot be inlined.
+        """
+        docstring = ast.get_docstring(node, clean=False)
+        if docstring is None:
+            return None
+        try:
+            contract = parse_contract(docstring)
+        except SyntaxError:
+            return None
+
+        args = node.args
+        if any(not isinstance(a, ast.Name) for a in args.args):
+            return None  # tuple-unpacking arguments
+        arg_names = set(a.id for a in args.args) | set(filter(None, (args.vararg, args.kwarg)))
+        if not set(contract['arg_types']) <= arg_names:
+            return None
+        if any(isinstance(n, ast.Yield) for n in _walk_own(node.body)):
+            return None  # generator
+        if any(isinstance(n, ast.Exec) or isinstance(n, ast.ImportFrom) and n.names[0].name == '*'
+                   for n in _walk_own(node.body)):
+            return None  # the body could not be moved into the inner function
+        if any(contract[key] for key in ('arg_ranges', 'return_range', 'arg_shapes', 'return_shape',
+                                         'arg_dtypes', 'return_dtype')):
+            return None
+
+        texts = (contract['arg_types'].values() + contract['preconditions'] +
+                 contract['postconditions'] + filter(None, [contract['return_type']]))
+        try:
+            used_names = set().union(*(_names(_parse_expression(text)) for text in texts))
+        except SyntaxError:
+            return None
+        if self.scopes and isinstance(self.scopes[-1], ast.ClassDef):
+            class_names = set()
+            for statement in self.scopes[-1].body:
+                for n in ast.walk(statement):
+                    if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store):
+                        class_names.add(n.id)
+                if isinstance(statement, (ast.FunctionDef, ast.ClassDef)):
+                    class_names.add(statement.name)
+            if used_names & class_names:
+                return None
+        type_texts = contract['arg_types'].values() + filter(None, [contract['return_type']])
+        type_names = set().union(*(_names(_parse_expression(text)) for text in type_texts))
+        if any(type_names & _bound_names(scope) for scope in self.scopes if isinstance(scope, ast.FunctionDef)):
+            return None  # the types defined in the enclosing functions are not visible from the checks
+
+        tier = dbc._module_tier(self.module_name)
+        for key in ('preconditions', 'postconditions'):
+            contract[key] = [text for text in contract[key] if dbc._clause_tier(text) <= tier]
+        contract['arg_names'] = [a.id for a in args.args]
+        contract['all_names'] = contract['arg_names'] + filter(None, [args.vararg, args.kwarg])
+        return contract
+
+    def _f_path(self, node):
+        func_name = '.'.join([s.name for s in self.scopes] + [node.name])
+        return '%s module (%s), %s()' % (self.module_name, self.filename, func_name)
+
+    def _check_function(self, node, params, statements):
+        """
+        @return: The new function taking the C{params} and executing the statements.
+        @rtype: ast.FunctionDef
+        """
+        self.check_count += 1
+        return ast.FunctionDef(name='%s%s_%i' % (_CHECK, node.name, self.check_count),
+                               args=_arguments(params),
+                               body=statements or [ast.Pass()],
+                               decorator_list=[])
+
+    def _inline(self, node, contract):
+        """
+        Insert the checks into the function. The clauses are evaluated in the generated checking functions,
+        seeing only the arguments and the globals (as by C{contract_epydoc}), not the locals of the function.
+
+        @return: The checking functions, to be defined before the function.
+        @rtype: list
+        """
+        f_path = self._f_path(node)
+        names = contract['all_names']
+        vararg, kwarg = node.args.vararg, node.args.kwarg
+
+        pre_statements = []
+        for argument in names:
+            if argument in contract['arg_types']:
+                pre_statements.append(_type_check(f_path,
+                                                  ast.Name(id=argument, ctx=ast.Load()),
+                                                  contract['arg_types'][argument],
+                                                  ('argument_violation', _str(f_path), _str(argument),
+                                                   ast.Name(id=argument, ctx=ast.Load()))))
+        pre_statements.extend(_clause_checks(f_path, 'precondition', contract['preconditions'], names))
+        checks = []
+        prologue = []
+        if pre_statements:
+            pre = self._check_function(node, names, pre_statements)
+            checks.append(pre)
+            prologue.append(ast.Expr(value=_call(pre.name, names)))
+
+        body = node.body
+        docstring = body[:1] if ast.get_docstring(node, clean=False) is not None else []
+        body = body[len(docstring):]
+
+        if contract['return_type'] is not None or contract['postconditions']:
+            # The postconditions see the result rather than the argument named "result", if any.
+            post_params = [a for a in names if a != 'result'] + ['result']
+            post_statements = []
+            if contract['return_type'] is not None:
+                post_statements.append(_type_check(f_path,
+                                                   ast.Name(id='result', ctx=ast.Load()),
+                                                   contract['return_type'],
+                                                   ('return_violation', _str(f_path),
+                                                    ast.Name(id='result', ctx=ast.Load()))))
+            post_statements.extend(_clause_checks(f_path, 'postcondition', contract['postconditions'], post_params))
+            post = self._check_function(node, post_params, post_statements)
+            checks.append(post)
+
+            if _returns_in_handlers(body):
+                # The body is moved into the inner function, so its exception handlers
+                # do not intercept the violations of the return value.
+                inner = ast.FunctionDef(name=_BODY,
+                                        args=ast.arguments(args=[ast.Name(id=a, ctx=ast.Param())
+                                                                     for a in contract['arg_names']],
+                                                           vararg=vararg, kwarg=kwarg, defaults=[]),
+                                        body=body or [ast.Pass()],
+                                        decorator_list=[])
+                post_args = [a if a != 'result' else _RESULT for a in post_params[:-1]] + [_RESULT]
+                body = [inner,
+                        ast.Assign(targets=[ast.Name(id=_RESULT, ctx=ast.Store())],
+                                   value=_call(_BODY, contract['arg_names'], vararg, kwarg)),
+                        ast.Expr(value=_call(post.name, post_args)),
+                        ast.Return(value=ast.Name(id=_RESULT, ctx=ast.Load()))]
+            else:
+                # The names the postconditions refer to should have the values from the call,
+                # even if the function rebinds them.
+                prologue.extend(ast.Assign(targets=[ast.Name(id=_ARGUMENT + a, ctx=ast.Store())],
+                                           value=ast.Name(id=a, ctx=ast.Load()))
+                                    for a in post_params[:-1])
+                post_args = [_ARGUMENT + a for a in post_params[:-1]] + [_RESULT]
+
+                def make_checks():
+                    return [ast.Expr(value=_call(post.name, post_args))]
+
+                body = body + [ast.copy_location(ast.Return(value=None), node)]
+                body = [_ReturnRewriter(make_checks).visit(s) for s in body]
+                body = [s for statement in body for s in (statement if isinstance(statement, list) else [statement])]
+        node.body = docstring + prologue + body
+        return checks
+
+
+def transform(source, module_name, filename):
+    """
+    Inline the contracts in the module source.
+
+    @return: The code object of the transformed module.
+    """
+    tree = ast.parse(source, filename)
+    inliner = ContractInliner(module_name, filename)
+    tree = inliner.visit(tree)
+    if inliner.changed:
+        # Import the helpers after the docstring and the __future__ imports.
+        position = 0
+        for i, statement in enumerate(tree.body):
+            if (i == 0 and isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Str)) or \
+               (isinstance(statement, ast.ImportFrom) and statement.module == '__future__'):
+                position = i + 1
+        tree.body[position:position] = [ast.Import(names=[ast.alias(name='dbc.inline', asname=_HELPER)])] + \
+                                        inliner.checks
+    ast.fix_missing_locations(tree)
+    return compile(tree, filename, 'exec', 0, True)
+
+
+#
+# The import hook.
+#
+
+class SourceImporter(object):
+    """
+    The PEP 302 finder and loader for the source modules, which syntax tree is transformed
+    before compilation; the subclasses define the transformation (by default, the module
+    is compiled unchanged).
+
+    Like the usual C{.pyc} files, the transformed bytecode is cached next to the source
+    (in the C{<module>.<cache tag>.pyc} file), unless C{sys.dont_write_bytecode} is set.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = tuple(prefixes)
+        self._found = {}
+
+    def _matches(self, fullname):
+        return any(fullname == p or fullname.startswith(p + '.') for p in self.prefixes)
+
+    def active(self):
+        """
+        @return: Whether the modules should be transformed at the moment.
+        @rtype: bool
+        """
+        return True
+
+    def transform(self, source, module_name, filename):
+        """
+        @return: The code object of the transformed module.
+        """
+        return compile(source, filename, 'exec', 0, True)
+
+    def cache_tag(self, fullname):
+        """
+        @param fullname: The name of the module.
+
+        @return: The tag for the file names of the cached bytecode, depending on how it is transformed;
+                 or C{None} if it should not be cached.
+        @rtype: basestring
+        """
+        return None
+
+    def _cache_header(self, filename):
+        return imp.get_magic() + struct.pack('<II', _CACHE_VERSION, int(os.stat(filename).st_mtime))
+
+    def _get_code(self, fullname, filename):
+        """
+        @return: The code object of the transformed module, from the cache if it is up to date.
+        """
+        tag = self.cache_tag(fullname)
+        cache_path = '%s.%s.pyc' % (os.path.splitext(filename)[0], tag) if tag is not None else None
+        header = self._cache_header(filename)
+        if cache_path is not None:
+            try:
+                with open(cache_path, 'rb') as fh:
+                    if fh.read(len(header)) == header:
+                        return marshal.load(fh)
+            except (IOError, EOFError, ValueError, TypeError):
+                pass
+
+        with open(filename, 'rU') as fh:
+            source = fh.read()
+        code = self.transform(source, fullname, filename)
+
+        if cache_path is not None and not sys.dont_write_bytecode:
+            try:
+                with open(cache_path, 'wb') as fh:
+                    fh.write(header)
+                    marshal.dump(code, fh)
+            except IOError:
+                pass
+        return code
+
+    def find_module(self, fullname, path=None):
+        if not self.active() or not self._matches(fullname):
+            return None
+        try:
+            fh, filename, (suffix, mode, kind) = imp.find_module(fullname.rpartition('.')[2], path)
+        except ImportError:
+            return None
+        if fh is not None:
+            fh.close()
+        if kind == imp.PKG_DIRECTORY:
+            init = os.path.join(filename, '__init__.py')
+            if not os.path.exists(init):
+                return None
+            self._found[fullname] = (init, filename)
+        elif kind == imp.PY_SOURCE:
+            self._found[fullname] = (filename, None)
+        else:
+            return None
+        return self
+
+    def load_module(self, fullname):
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+        filename, package_path = self._found.pop(fullname)
+        code = self._get_code(fullname, filename)
+
+        module = imp.new_module(fullname)
+        module.__file__ = filename
+        module.__loader__ = self
+        if package_path is not None:
+            module.__path__ = [package_path]
+            module.__package__ = fullname
+        else:
+            module.__package__ = fullname.rpartition('.')[0]
+        sys.modules[fullname] = module
+        try:
+            exec code in module.__dict__
+        except:
+            del sys.modules[fullname]
+            raise
+        return module
+
+
+class InlineImporter(SourceImporter):
+    """
+    The importer for the modules with the contracts to be inlined.
+    """
+
+    def active(self):
+        return dbc.ENABLED
+
+    def transform(self, source, module_name, filename):
+        return transform(source, module_name, filename)
+
+    def cache_tag(self, fullname):
+        tier = dbc.get_tier(fullname)
+        return ('dbc-inline' +
+                ('-' + tier if tier != dbc._TIERS[-1] else '') +
+                ('-O' if sys.flags.optimize else ''))
+
+
+_importer = None
+
+def install(*prefixes):
+    """
+    Inline the contracts in the modules (and packages) imported since now, which names
+    are equal to or start with any of the prefixes (like C{'mypackage'} for the whole package).
+    """
+    uninstall()
+    global _importer
+    _importer = InlineImporter(prefixes)
+    sys.meta_path.insert(0, _importer)
+
+
+def uninstall():
+    global _importer
+    if _importer is not None:
+        sys.meta_path.remove(_importer)
+        _importer = None
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+"""
+Contract overhead map, measured by the automatically generated microbenchmarks.
+
+For every function decorated with C{contract_epydoc} in the given modules, the input values
+satisfying the declared C{@type} fields and C{@precondition} clauses are generated;
+then the function is timed both with the contract checks and undecorated,
+and the contract overhead is reported::
+
+    python -m dbc.overhead [--min-time=SECONDS] MODULE [MODULE ...]
+
+Only the module-level functions and the static methods of the module-level classes are measured;
+the functions with C{*args} or C{**kwargs} are skipped, as well as the functions for which
+no satisfying input values could be generated, or which fail when timed. As the functions may
+modify their arguments, every call gets its own copy of the mutable ones (the time of copying
+is not counted).
+
+>>> from dbc import contract_epydoc
+>>> @contract_epydoc
+... def f(a, b):
+...     '''
+...     @type a: int
+...     @type b: (list, tuple)
+...     @precondition: a > 1
+...     @precondition: len(b) > 0
+...     '''
+...     return a * len(b)
+>>> generate_arguments(f)
+(2, [1, 2, 3])
+
+>>> result = measure_function('f', f, min_time=0.01)
+>>> result.name, result.contracted > result.raw
+('f', True)
+
+>>> @contract_epydoc
+... def g(b):
+...     '''
+...     @type b: list
+...     @precondition: b
+...     '''
+...     return b.pop()
+>>> measure_function('g', g, min_time=0.01).name
+'g'
+>>> [v for v in SAMPLE_VALUES if isinstance(v, list)]  # not modified
+[[], [1, 2, 3], ['a', 'b']]
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('generate_arguments', 'measure_function', 'measure_module', 'format_results')
+
+import sys, copy, inspect, optparse
+from itertools import product, islice
+from timeit import default_timer as _timer
+from types import NoneType, FunctionType
+
+
+# The sample values to try for the arguments, from simplest to more complex.
+SAMPLE_VALUES = (0, 1, 2, 10, 100, -1,
+                 0L, 1L, 2L,
+                 0.0, 0.5, 1.0, 2.5, 100.0, -1.0,
+                 True, False,
+                 None,
+                 '', 'a', 'abc', 'hello world',
+                 u'', u'a', u'abc',
+                 [], [1, 2, 3], ['a', 'b'],
+                 (), (1, 2, 3), ('a', 'b'),
+                 {}, {'a': 1}, {1: 'a'},
+                 set(), set([1, 2, 3]), frozenset(), frozenset([1, 2, 3]))
+
+# How many argument combinations may be tried for every function.
+MAX_COMBINATIONS = 10000
+
+
+# The types of the values which are not copied for every call.
+_IMMUTABLE_TYPES = (int, long, float, bool, complex, basestring, NoneType)
+
+
+class Result(object):
+    """
+    The measured time per call of a single function.
+    """
+    __slots__ = ('name', 'raw', 'contracted')
+
+    def __init__(self, name, raw, contracted):
+        self.name = name
+        self.raw = raw
+        self.contracted = contracted
+
+    @property
+    def overhead(self):
+        return self.contracted - self.raw
+
+
+def _candidates(checker):
+    """
+    @return: The sample values satisfying the type checker (or all of them, if there is no checker);
+             for the classes not among the samples, their instances constructed without arguments.
+    @rtype: list
+    """
+    if checker is None:
+        return list(SAMPLE_VALUES)
+
+    result = [v for v in SAMPLE_VALUES if checker(v)]
+    types = checker.types if isinstance(checker.types, tuple) else (checker.types,)
+    for t in types:
+        if isinstance(t, type) and t is not NoneType and not any(type(v) is t for v in result):
+            try:
+                value = t()
+            except Exception:
+                continue
+            if checker(value):
+                result.append(value)
+    return result
+
+
+def _is_immutable(value):
+    """
+    @return: Whether the value cannot be modified by the function it is passed to.
+    @rtype: bool
+    """
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return True
+    return isinstance(value, (tuple, frozenset)) and all(_is_immutable(v) for v in value)
+
+
+def _pass(*args):
+    pass
+
+
+def generate_arguments(function):
+    """
+    Generate the positional arguments, satisfying the contract of the function.
+
+    @param function: The function decorated with C{contract_epydoc}.
+
+    @return: The arguments, or C{None} if they could not be generated.
+    @rtype: tuple
+    """
+    contract = function._dbc_contract
+    raw = function.__wrapped__
+    if any(not isinstance(a, basestring) for a in contract.posargs):
+        return None  # tuple-unpacking arguments
+
+    types = dict(contract.argument_types)
+    defaults = raw.func_defaults or ()
+    n_required = len(contract.posargs) - len(defaults)
+
+    pools = []
+    for i, argument in enumerate(contract.posargs):
+        if argument in types:
+            definition = types[argument]
+            checker = definition.checker or definition.get_checker(contract.f_path,
+                                                                   contract.def_globals,
+                                                                   contract.def_locals)
+            pool = _candidates(checker)
+        else:
+            pool = _candidates(None)
+        if i >= n_required:
+            # Try the default value first.
+            pool.insert(0, defaults[i - n_required])
+        if not pool:
+            return None
+        pools.append(pool)
+
+    for args in islice(product(*pools), MAX_COMBINATIONS):
+        values = dict(zip(contract.posargs, copy.deepcopy(args)))
+        try:
+            if all(eval(clause.code, contract.def_globals, dict(values))
+                       for clause in contract.preconditions):
+                function(*copy.deepcopy(args))
+                return args
+        except Exception:
+            continue
+    return None
+
+
+def _time(function, args, min_time):
+    """
+    @return: The best time per call, in seconds; if the arguments are mutable,
+             including the time of copying them for every call.
+    @rtype: float
+    """
+    copying = not _is_immutable(args)
+    deepcopy = copy.deepcopy
+    number = 1
+    while True:
+        start = _timer()
+        if copying:
+            for i in xrange(number):
+                function(*deepcopy(args))
+        else:
+            for i in xrange(number):
+                function(*args)
+        elapsed = _timer() - start
+        if elapsed >= min_time:
+            return elapsed / number
+        number *= 10 if elapsed * 10 < min_time else 2
+
+
+def measure_function(name, function, min_time=0.1):
+    """
+    Measure the time per call of the function, with and without the contract checks.
+
+    @param function: The function decorated with C{contract_epydoc}.
+
+    @return: The measurements, or C{None} if no arguments could be generated.
+    @rtype: Result
+    """
+    args = generate_arguments(function)
+    if args is None:
+        return None
+    raw = _time(function.__wrapped__, args, min_time)
+    contracted = _time(function, args, min_time)
+    if not _is_immutable(args):
+        copying = _time(_pass, args, min_time)
+        raw, contracted = max(raw - copying, 0.0), max(contracted - copying, 0.0)
+    return Result(name, raw=raw, contracted=contracted)
+
+
+def _iter_contracted_functions(module):
+    """
+    @return: The iterable over the C{(name, function)} pairs for the suitable functions of the module.
+    """
+    for name, value in sorted(vars(module).iteritems()):
+        if inspect.isclass(value) and value.__module__ == module.__name__:
+            for attr_name, attr in sorted(vars(value).iteritems()):
+                if isinstance(attr, staticmethod):
+                    function = attr.__get__(None, value)
+                    if hasattr(function, '_dbc_contract'):
+                        yield '%s.%s' % (name, attr_name), function
+        elif isinstance(value, FunctionType) and hasattr(value, '_dbc_contract'):
+            yield name, value
+
+
+def measure_module(module, min_time=0.1):
+    """
+    Measure all the suitable contracted functions in the module.
+
+    @return: The measurements, and the names of the skipped functions.
+    @rtype: tuple
+    """
+    results, skipped = [], []
+    for name, function in _iter_contracted_functions(module):
+        argspec = inspect.getargspec(function.__wrapped__)
+        if argspec.varargs is not None or argspec.keywords is not None:
+            skipped.append(name)
+            continue
+        try:
+            result = measure_function('%s.%s' % (module.__name__, name), function, min_time)
+        except Exception:
+            result = None  # fails on the arguments satisfying its contract, or on the repeated calls
+        if result is None:
+            skipped.append(name)
+        else:
+            results.append(result)
+    return results, skipped
+
+
+def format_results(results):
+    """
+    @param results: The measurements.
+    @type results: list
+
+    @return: The table of the measurements, the largest overhead first.
+    @rtype: basestring
+    """
+    lines = ['%12s %12s %12s %8s  %s' % ('raw, us', 'checked, us', 'overhead, us', 'ratio', 'function')]
+    lines.extend('%12.3f %12.3f %12.3f %8.1f  %s' % (r.raw * 1e6,
+                                                     r.contracted * 1e6,
+                                                     r.overhead * 1e6,
+                                                     r.contracted / r.raw if r.raw else float('inf'),
+                                                     r.name)
+                     for r in sorted(results, key=lambda r: r.overhead, reverse=True))
+    return '\n'.join(lines)
+
+
+def main():
+    """Measure the contract overhead of every contracted function in the modules
+
+    Generates the input values satisfying the contracts, and times the functions
+    with and without the contract checks.
+    """
+    p = optparse.OptionParser(usage='%prog [options] MODULE [MODULE ...]\n\n' + main.__doc__)
+    p.add_option('-t', '--min-time', type='float', default=0.1,
+                 help='how long to time every function, in seconds (default: 0.1)')
+    options, args = p.parse_args()
+    if not args:
+        p.error('no modules')
+
+    results = []
+    for module_name in args:
+        __import__(module_name)
+        module_results, skipped = measure_module(sys.modules[module_name], options.min_time)
+        results.extend(module_results)
+        for name in skipped:
+            sys.stderr.write('Skipped %s.%s.\n' % (module_name, name))
+    print format_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""
+Compact typed record classes, generated from the C{@ivar} and C{@type} fields of the class docstring.
+
+The class decorated with L{record} is replaced with the record class: its instance variables
+(declared by the C{@ivar} fields, in that order) are stored in the C{__slots__}, so the instances
+have no per-instance C{__dict__}; and assigning any instance variable which has the C{@type} field
+checks the value against it. The setters are generated once per class, and the type definitions
+are evaluated (in the namespace the class is defined in) on the first assignment, and reused since then.
+The values assigned to the class variables with the same names as the instance variables
+are their default values. Unless the class defines C{__init__} and C{__repr__} itself,
+the ones taking and showing all the instance variables are generated.
+
+The record class may be subclassed by another record class, adding more instance variables.
+The instances are compact only if all the base classes are the record classes (or C{object}).
+
+If the functionality is disabled (C{dbc.ENABLED = False}) when the class is decorated,
+the record class has the plain unchecked slots. The docstring is needed when the class is decorated,
+so the record classes cannot be used with C{python -OO}.
+
+>>> @record
+... class Point(object):
+...     '''
+...     The point on the plane.
+...
+...     @ivar x: The abscissa.
+...     @type x: float
+...     @ivar y: The ordinate.
+...     @type y: float
+...     @ivar label: The name of the point, if any.
+...     @type label: (str, type(None))
+...     '''
+...     label = None
+...
+...     def norm(self):
+...         return (self.x ** 2 + self.y ** 2) ** 0.5
+
+>>> p = Point(3.0, 4.0)
+>>> p, p.norm(), Point.__slots__, hasattr(p, '__dict__')
+(Point(x=3.0, y=4.0, label=None), 5.0, ('x', 'y', 'label'), False)
+
+>>> p.label = 42 # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+TypeError: dbc.records module (...), Point:
+The 'label' attribute is of <type 'int'> while must be of (<type 'str'>, <type 'NoneType'>); its value is 42
+
+>>> Point(3, 4.0) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+Traceback (most recent call last):
+  ...
+TypeError: dbc.records module (...), Point:
+The 'x' attribute is of <type 'int'> while must be of <type 'float'>; its value is 3
+
+>>> @record
+... class NamedPoint(Point):
+...     '''
+...     @ivar z: The applicate.
+...     @type z: float
+...     '''
+...     z = 0.0
+...     label = 'origin'
+>>> NamedPoint(1.0, 2.0), NamedPoint.__slots__
+(NamedPoint(x=1.0, y=2.0, label='origin', z=0.0), ('z',))
+
+>>> import dbc
+>>> dbc.ENABLED = False
+>>> @record
+... class UncheckedPoint(object):
+...     '''
+...     @ivar x: The abscissa.
+...     @type x: float
+...     '''
+>>> dbc.ENABLED = True
+>>> UncheckedPoint('a')
+UncheckedPoint(x='a')
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('record',)
+
+import sys
+
+import dbc
+from dbc import _TypeDefinition, _fail, _violation, _function_base_path
+
+
+# The file name of the generated code, to tell its frames from the caller ones.
+_GENERATED = '<dbc record>'
+
+
+def _parse_fields(docstring):
+    """
+    Parse the epytext class docstring into the instance variables.
+
+    >>> _parse_fields('''
+    ...     @ivar a: The first one.
+    ...     @type a: int
+    ...     @ivar b: The second one.
+    ...     @cvar c: Not an instance variable.
+    ... ''')
+    (['a', 'b'], {'a': 'int'})
+
+    @return: The names of the instance variables (in the order of their C{@ivar} fields),
+             and the texts of their type definitions by the name.
+    @rtype: tuple
+
+    @raises SyntaxError: If the docstring cannot be parsed.
+    """
+    from epydoc.markup import epytext
+
+    errors = []
+    parsed = epytext.parse_docstring(docstring, errors)
+    body, fields = parsed.split_fields(errors)
+    if any(e.is_fatal() for e in errors):
+        raise SyntaxError('Cannot parse the docstring: %s' % '; '.join(str(e) for e in errors))
+
+    names, types = [], {}
+    for field in fields:
+        tag, name = field.tag(), field.arg()
+        if name is None:
+            continue
+        if tag in ('ivar', 'ivariable'):
+            if name not in names:
+                names.append(name)
+        elif tag == 'type':
+            types[name] = field.body().to_plaintext(None).strip()
+    return names, dict((name, types[name]) for name in names if name in types)
+
+
+def _make_init(names, defaults):
+    """
+    @return: The C{__init__} method taking the values for all the instance variables.
+
+    @raises SyntaxError: If the instance variable without the default value follows the one having it.
+    """
+    arguments = []
+    for name in names:
+        if name in defaults:
+            arguments.append('%s=_defaults[%r]' % (name, name))
+        elif arguments and '=' in arguments[-1]:
+            raise SyntaxError('The instance variable %r without the default value '
+                              'follows the ones having it' % name)
+        else:
+            arguments.append(name)
+    source = 'def __init__(self%s):\n%s' % (''.join(', ' + a for a in arguments),
+                                            ''.join('    self.%s = %s\n' % (name, name) for name in names) or
+                                            '    pass\n')
+    namespace = {'_defaults': defaults}
+    exec compile(source, _GENERATED, 'exec') in namespace
+    return namespace['__init__']
+
+
+def _repr(self):
+    """
+    The C{__repr__} of the record classes, showing all the instance variables which are set.
+    """
+    cls = type(self)
+    return '%s(%s)' % (cls.__name__,
+                       ', '.join('%s=%r' % (name, getattr(self, name))
+                                     for name in cls._dbc_fields
+                                     if hasattr(self, name)))
+
+
+def _checked_setter(f_path, name, definition, set_slot, def_globals, def_locals):
+    """
+    @return: The setter of the instance variable, checking the value against its type definition.
+
+    @type definition: _TypeDefinition
+    @param set_slot: The setter of the slot the value is stored in.
+    """
+    def setter(self, value):
+        checker = definition.checker or definition.get_checker(f_path, def_globals, def_locals)
+        # For the concrete types, the checker would just call isinstance().
+        if not (checker(value) if checker.cached else isinstance(value, checker.types)):
+            caller = sys._getframe(1)
+            if caller.f_code.co_filename == _GENERATED:
+                caller = caller.f_back
+            _fail(f_path, "'%s' attribute" % name,
+                  _violation(TypeError, value,
+                             '%s:\n'
+                             "The '%s' attribute is of %r while must be of %r; "
+                             'its value is %r', f_path,
+                                                name,
+                                                type(value),
+                                                checker.types,
+                                                value),
+                  caller=caller)
+        set_slot(self, value)
+    return setter
+
+
+def record(cls):
+    """
+    The class decorator generating the compact typed record class from the C{@ivar} and C{@type}
+    fields of the class docstring (see the L{dbc.records} module).
+
+    @return: The new record class, replacing the decorated class.
+
+    @raises TypeError: If the class is not a new-style class, or already defines C{__slots__}.
+    @raises SyntaxError: If the class has no docstring, or it cannot be parsed,
+        or any type definition cannot be compiled.
+    """
+    if not isinstance(cls, type):
+        raise TypeError('The @record decorator supports only the new-style classes, not %r' % cls)
+    if '__slots__' in cls.__dict__:
+        raise TypeError('%r already defines __slots__' % cls)
+    if cls.__doc__ is None:
+        raise SyntaxError('%r has no docstring to take the instance variables from '
+                          '(are the docstrings stripped by python -OO?)' % cls)
+    names, types = _parse_fields(cls.__doc__)
+
+    def_frame = sys._getframe(1)
+    module = sys.modules.get(cls.__module__)
+    f_path = '%(mod_name)s module (%(mod_file_path)s), %(class_name)s' % {
+                 'mod_name': cls.__module__,
+                 'mod_file_path': getattr(module, '__file__', def_frame.f_code.co_filename),
+                 'class_name': '.'.join(filter(None, (_function_base_path(def_frame), cls.__name__)))}
+
+    # The instance variables of the base record classes go first.
+    fields = []
+    defaults = {}
+    for base in reversed(cls.__mro__[1:]):
+        fields.extend(name for name in base.__dict__.get('_dbc_fields', ()) if name not in fields)
+        defaults.update(base.__dict__.get('_dbc_defaults', {}))
+    own_fields = tuple(name for name in names if name not in fields)
+    fields = tuple(fields) + own_fields
+
+    namespace = dict(cls.__dict__)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    for name in fields:
+        if name in namespace:
+            defaults[name] = namespace.pop(name)
+    namespace.update(__slots__=own_fields, _dbc_fields=fields, _dbc_defaults=defaults)
+
+    inherited_init = getattr(cls.__init__, 'im_func', None)
+    if '__init__' not in namespace and \
+       (cls.__init__ is object.__init__ or
+        getattr(inherited_init, 'func_code', None) is not None and
+        inherited_init.func_code.co_filename == _GENERATED):
+        namespace['__init__'] = _make_init(fields, defaults)
+    if '__repr__' not in namespace and cls.__repr__ is object.__repr__:
+        namespace['__repr__'] = _repr
+
+    definitions = [(name, _TypeDefinition(f_path, types[name], "'%s' attribute" % name))
+                       for name in own_fields
+                       if name in types]
+    new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+
+    if dbc.ENABLED:
+        for name, definition in definitions:
+            slot = new_cls.__dict__[name]
+            setattr(new_cls, name, property(slot.__get__,
+                                            _checked_setter(f_path, name, definition, slot.__set__,
+                                                            def_frame.f_globals, def_frame.f_locals),
+                                            slot.__delete__))
+    return new_cls
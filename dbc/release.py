@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Release mode: the import hook that strips the contracts before the modules are compiled.
+
+Even with C{dbc.ENABLED = False}, C{contract_epydoc} is still called for every decorated function
+when the module is imported. For the modules opted in via L{install}, the C{contract_epydoc}
+decorators are removed from the syntax tree instead, and the C{typed(x, T)} and C{ntyped(x, T)}
+calls are replaced with just C{x}; the imports of these names from C{dbc} are removed as well,
+if they are not used otherwise. So the functions are compiled into the same bytecode
+as if they had no contracts, and the modules import without any decoration cost.
+Optionally, the docstrings of the stripped functions (where the contracts are defined)
+are removed as well.
+
+Note that the C{T} expression of C{typed(x, T)} is not evaluated in the release mode.
+
+>>> import os, sys, tempfile, shutil
+>>> directory = tempfile.mkdtemp()
+>>> with open(os.path.join(directory, 'dbc_release_example.py'), 'w') as fh:
+...     fh.write('''
+... from dbc import contract_epydoc, typed
+...
+... @contract_epydoc
+... def f(a):
+...     \"\"\"
+...     @type a: int
+...     @precondition: a > 0
+...     \"\"\"
+...     return typed(a, int) * 2
+... ''')
+>>> sys.path.insert(0, directory)
+>>> install('dbc_release_example', strip_docstrings=True)
+
+>>> import dbc_release_example
+>>> dbc_release_example.f(-1), dbc_release_example.f('ab')
+(-2, 'abab')
+>>> hasattr(dbc_release_example, 'contract_epydoc'), dbc_release_example.f.__doc__
+(False, None)
+
+>>> uninstall()
+>>> del sys.modules['dbc_release_example']
+>>> sys.path.remove(directory)
+>>> shutil.rmtree(directory)
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('install', 'uninstall', 'transform')
+
+import sys, ast
+
+from dbc.inline import DbcTransformer, SourceImporter
+
+
+class ContractStripper(DbcTransformer):
+    """
+    Transforms the module syntax tree, removing the contracts.
+    """
+
+    def __init__(self, strip_docstrings=False):
+        DbcTransformer.__init__(self)
+        self.strip_docstrings = strip_docstrings
+
+    def visit_FunctionDef(self, node):
+        self.generic_visit(node)
+        decorators = [d for d in node.decorator_list if not self._is_contract_decorator(d)]
+        if len(decorators) == len(node.decorator_list):
+            return node
+
+        node.decorator_list = decorators
+        if self.strip_docstrings and ast.get_docstring(node, clean=False) is not None:
+            node.body = node.body[1:] or [ast.copy_location(ast.Pass(), node)]
+        self.changed = True
+        return node
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if self._typed_kind(node) is None:
+            return node
+        self.changed = True
+        return node.args[0]
+
+    def strip_imports(self, tree):
+        """
+        Remove the imports of C{contract_epydoc}, C{typed} and C{ntyped} from C{dbc},
+        if these names are not used in the module anymore.
+        """
+        unused = (self.decorator_names | set(self.typed_names)) - \
+                 set(n.id for n in ast.walk(tree) if isinstance(n, ast.Name))
+
+        class _ImportStripper(ast.NodeTransformer):
+            def visit_ImportFrom(self, node):
+                if node.module == 'dbc' and not node.level:
+                    node.names = [a for a in node.names if (a.asname or a.name) not in unused]
+                    if not node.names:
+                        return ast.copy_location(ast.Pass(), node)
+                return node
+
+        return _ImportStripper().visit(tree)
+
+
+def transform(source, module_name, filename, strip_docstrings=False):
+    """
+    Strip the contracts from the module source.
+
+    @return: The code object of the transformed module.
+    """
+    tree = ast.parse(source, filename)
+    stripper = ContractStripper(strip_docstrings)
+    tree = stripper.visit(tree)
+    if stripper.changed:
+        tree = stripper.strip_imports(tree)
+    ast.fix_missing_locations(tree)
+    return compile(tree, filename, 'exec', 0, True)
+
+
+class ReleaseImporter(SourceImporter):
+    """
+    The importer for the modules with the contracts to be stripped.
+    """
+
+    def __init__(self, prefixes, strip_docstrings=False):
+        SourceImporter.__init__(self, prefixes)
+        self.strip_docstrings = strip_docstrings
+
+    def transform(self, source, module_name, filename):
+        return transform(source, module_name, filename, self.strip_docstrings)
+
+    def cache_tag(self, fullname):
+        return 'dbc-release-nodoc' if self.strip_docstrings else 'dbc-release'
+
+
+_importer = None
+
+def install(*prefixes, **kwargs):
+    """
+    Strip the contracts from the modules (and packages) imported since now, which names
+    are equal to or start with any of the prefixes (like C{'mypackage'} for the whole package).
+
+    @keyword strip_docstrings: Whether the docstrings of the stripped functions should be removed as well
+                               (default: C{False}).
+    """
+    uninstall()
+    global _importer
+    _importer = ReleaseImporter(prefixes, **kwargs)
+    sys.meta_path.insert(0, _importer)
+
+
+def uninstall():
+    global _importer
+    if _importer is not None:
+        sys.meta_path.remove(_importer)
+        _importer = None
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""
+Report-only mode for the contract violations.
+
+When the report-only mode is enabled, the violations found by C{contract_epydoc} are recorded
+rather than raised (with the place the function was called from, for the violations
+which are the caller's fault). The compact records are put into a fixed-size in-memory ring buffer,
+deduplicated by the (function, clause) pair and rate-limited; a background thread flushes them
+to a local file or a logging handler, so a flood of violations cannot stall the calling threads on I/O.
+
+>>> import logging
+>>> from dbc import contract_epydoc
+>>> class ListHandler(logging.Handler):
+...     def emit(self, record):
+...         print record.getMessage()
+
+>>> reporter = enable(handler=ListHandler(), flush_interval=60)
+
+>>> @contract_epydoc
+... def f(a):
+...     '''
+...     @type a: int
+...     @precondition: a > 0
+...     '''
+...     return a
+>>> f(-1), f(-2), f('abc')
+(-1, -2, 'abc')
+
+>>> disable() # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+ValueError: dbc.report module (...), f(): The following precondition results in logical False;
+its definition is: a > 0 and its real value is False [called from <doctest dbc.report[...]>:1, <module>()]
+(repeated 2 times)
+TypeError: dbc.report module (...), f(): The 'a' argument is of <type 'str'> while must be of <type 'int'>;
+its value is 'abc' [called from <doctest dbc.report[...]>:1, <module>()]
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('ViolationReporter', 'enable', 'disable')
+
+import time, atexit, logging, threading
+from itertools import count
+
+import dbc
+
+
+class _Record(object):
+    """
+    A single violation, as stored in the ring buffer.
+
+    The message is not rendered until the record is flushed.
+    """
+    __slots__ = ('index', 'time', 'f_path', 'clause', 'exc', 'repeats')
+
+    def __init__(self, index, f_path, clause, exc):
+        self.index = index
+        self.time = time.time()
+        self.f_path = f_path
+        self.clause = clause
+        self.exc = exc
+        self.repeats = 1
+
+    def render(self):
+        """
+        @return: The single-line text of the record.
+        @rtype: basestring
+        """
+        message = ' '.join(('%s: %s' % (type(self.exc).__name__, self.exc)).split())
+        caller = getattr(self.exc, 'caller', None)
+        if caller is not None:
+            message += ' [called from %s:%i, %s()]' % caller
+        if self.repeats > 1:
+            message += ' (repeated %i times)' % self.repeats
+        return message
+
+
+class ViolationReporter(object):
+    """
+    Records the contract violations and flushes them in background.
+
+    The calling threads never wait for any lock or I/O: the records are put into the preallocated
+    ring buffer (if the flushing thread lags behind, the oldest records are overwritten);
+    a repeated violation of the same clause of the same function, until it is flushed,
+    only increments the counter of the already stored record; and the violations beyond C{max_rate}
+    per second are only counted as dropped.
+    """
+
+    def __init__(self, path=None, handler=None, capacity=1024, max_rate=100, flush_interval=1.0):
+        """
+        @param path: The local file to append the records to.
+        @type path: basestring
+
+        @param handler: The logging handler to emit the records to.
+        @type handler: logging.Handler
+
+        @param capacity: The size of the ring buffer.
+        @type capacity: int
+
+        @param max_rate: How many violations per second may be recorded.
+        @type max_rate: int
+
+        @param flush_interval: How often the records are flushed, in seconds.
+        @type flush_interval: float
+
+        @precondition: (path is None) != (handler is None)
+        @precondition: capacity > 0
+        """
+        if (path is None) == (handler is None):
+            raise ValueError('Exactly one of path or handler should be given.')
+        self.path = path
+        self.handler = handler
+        self.capacity = capacity
+        self.max_rate = max_rate
+        self.flush_interval = flush_interval
+
+        # How many violations were not recorded due to the rate limit
+        # or were overwritten before being flushed.
+        self.dropped = 0
+        self.overwritten = 0
+
+        self._slots = [None] * capacity
+        self._counter = count()  # next() on it is atomic
+        self._head = 0  # the index after the last stored record
+        self._tail = 0  # the index of the first record not flushed yet
+        self._pending = {}  # (f_path, clause) -> _Record not flushed yet
+
+        self._tokens = float(max_rate)
+        self._tokens_time = time.time()
+
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, f_path, clause, exc):
+        """
+        Record a single violation; called by the wrapped functions instead of raising C{exc}.
+
+        The record overwritten in the ring buffer before being flushed is not pending anymore,
+        so the later violations of its clause are recorded anew:
+
+        >>> class ListHandler(logging.Handler):
+        ...     def emit(self, record):
+        ...         print record.getMessage()
+        >>> reporter = ViolationReporter(handler=ListHandler(), capacity=2)
+        >>> for clause in 'ABC':
+        ...     reporter.record('f()', clause, ValueError(clause))
+        >>> reporter.flush()
+        ValueError: B
+        ValueError: C
+        >>> reporter.record('f()', 'A', ValueError('A again'))
+        >>> reporter.flush()
+        ValueError: A again
+        >>> reporter.overwritten
+        1
+        """
+        pending = self._pending.get((f_path, clause))
+        if pending is not None:
+            pending.repeats += 1
+            return
+
+        # Token bucket; the races may let through a few extra records, which is fine.
+        now = time.time()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._tokens_time) * self.max_rate)
+        self._tokens_time = now
+        if self._tokens < 1:
+            self.dropped += 1
+            return
+        self._tokens -= 1
+
+        index = next(self._counter)
+        record = _Record(index, f_path, clause, exc)
+        evicted = self._slots[index % self.capacity]
+        if evicted is not None:
+            key = (evicted.f_path, evicted.clause)
+            if self._pending.get(key) is evicted:
+                self._pending.pop(key, None)
+        self._slots[index % self.capacity] = record
+        self._pending[(f_path, clause)] = record
+        if index >= self._head:
+            self._head = index + 1
+
+    def flush(self):
+        """
+        Write out all the records stored so far.
+        """
+        with self._flush_lock:
+            head = self._head
+            start = self._tail
+            if head - start > self.capacity:
+                self.overwritten += head - start - self.capacity
+                start = head - self.capacity
+
+            records = []
+            for index in xrange(start, head):
+                record = self._slots[index % self.capacity]
+                # The slot may have been already reused by a newer record.
+                if record is not None and record.index == index:
+                    records.append(record)
+                    self._slots[index % self.capacity] = None
+                    self._pending.pop((record.f_path, record.clause), None)
+            self._tail = head
+
+            if records:
+                self._write(records)
+
+    def _write(self, records):
+        if self.handler is not None:
+            for record in records:
+                log_record = logging.LogRecord('dbc', logging.WARNING, record.f_path, 0,
+                                               '%s', (record.render(),), None)
+                log_record.created = record.time
+                self.handler.handle(log_record)
+        else:
+            with open(self.path, 'a') as fh:
+                for record in records:
+                    fh.write('%s %s\n' % (time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.time)),
+                                          record.render()))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """
+        Start the background flushing thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='dbc-report')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background flushing thread and flush the remaining records.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+def enable(**kwargs):
+    """
+    Enable the report-only mode: the violations are recorded rather than raised.
+
+    @param kwargs: The arguments for L{ViolationReporter}.
+
+    @return: The new reporter, already started.
+    @rtype: ViolationReporter
+    """
+    disable()
+    reporter = ViolationReporter(**kwargs)
+    reporter.start()
+    dbc._reporter = reporter
+    return reporter
+
+
+def disable():
+    """
+    Disable the report-only mode, flushing all the records.
+    """
+    reporter, dbc._reporter = dbc._reporter, None
+    if reporter is not None:
+        reporter.stop()
+
+
+atexit.register(disable)
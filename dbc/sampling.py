@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Request-scoped sampling: the contracts are checked for the whole call tree of the sampled requests only.
+
+Checking a random fraction of the calls misses the violations which show up only across a chain
+of calls. Instead, the sampling decision is made once per request, at its entry point
+(like the request handler of a server), and is kept in the thread-local state while the request
+is handled: all the functions decorated with C{contract_epydoc} (or L{dbc.contract}) called
+while handling a sampled request are checked, and none of the functions called while handling
+an unsampled one. For the unsampled requests, every wrapped function pays just a single read
+of the thread-local state before calling the original function. The calls made outside
+of any request are not checked either, unless C{outside_requests} is true.
+
+The decision may also be given explicitly (for example, propagated from the sampled flag
+of the upstream trace), so the whole distributed trace is checked coherently.
+The work handed over to another thread keeps the decision of the request if wrapped by L{bind}.
+
+The functions inlined by L{dbc.inline} are always checked, as they have no wrapper.
+
+>>> from dbc import contract_epydoc
+>>> sampler = enable(rate=0.5)
+
+>>> @contract_epydoc
+... def f(a):
+...     '''
+...     @precondition: a > 0
+...     '''
+...     return a
+
+>>> with request(sampled=False):
+...     f(-1)
+-1
+>>> with request(sampled=True):
+...     f(-1) # doctest: +ELLIPSIS
+Traceback (most recent call last):
+  ...
+ValueError: ...
+>>> with request(sampled=True):
+...     with request(sampled=False):  # the nested requests keep the decision of the entry point
+...         current()
+True
+
+>>> @entry_point
+... def handle(a):
+...     return f(a)
+>>> sampler.rate = 0.0
+>>> handle(-1), sampler.requests, sampler.sampled_requests
+(-1, 4, 2)
+
+>>> disable()
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('Sampler', 'enable', 'disable', 'request', 'entry_point', 'bind', 'current')
+
+import random, threading
+from contextlib import contextmanager
+from functools import wraps
+
+import dbc
+
+
+class _RequestState(threading.local):
+    """
+    The sampling decision for the request handled by the current thread.
+    """
+
+    def __init__(self, outside_requests):
+        # Read by every wrapped function.
+        self.sampled = outside_requests
+        # How deep the current thread is in the nested requests.
+        self.depth = 0
+
+
+class Sampler(object):
+    """
+    Makes the sampling decisions for the requests.
+    """
+
+    def __init__(self, rate=0.01, outside_requests=False, random=random.random):
+        """
+        @param rate: The fraction of the requests to check the contracts for.
+        @type rate: float
+
+        @param outside_requests: Whether the calls made outside of any request are checked.
+        @type outside_requests: bool
+
+        @param random: The function returning the random number in M{[0, 1)}.
+
+        @precondition: 0.0 <= rate <= 1.0
+        """
+        self.rate = rate
+        self.random = random
+        self.state = _RequestState(outside_requests)
+
+        # How many requests were handled, and how many of them were sampled
+        # (approximately, as they are not counted under a lock).
+        self.requests = 0
+        self.sampled_requests = 0
+
+    @contextmanager
+    def request(self, sampled=None):
+        """
+        Handle the request in the current thread: check the contracts of all the calls made inside
+        (in the current thread) if the request is sampled, and none of them otherwise.
+        The nested requests keep the decision of the outermost one.
+
+        @param sampled: The decision made elsewhere (like by the upstream service);
+                        by default, the request is sampled at random, with the probability of C{rate}.
+
+        @return: The context manager, which value is whether the request is sampled.
+        """
+        state = self.state
+        if state.depth:
+            state.depth += 1
+            try:
+                yield state.sampled
+            finally:
+                state.depth -= 1
+            return
+
+        if sampled is None:
+            sampled = self.random() < self.rate
+        self.requests += 1
+        if sampled:
+            self.sampled_requests += 1
+
+        outside = state.sampled
+        state.sampled, state.depth = sampled, 1
+        try:
+            yield sampled
+        finally:
+            state.sampled, state.depth = outside, 0
+
+
+_sampler = None
+
+
+def enable(**kwargs):
+    """
+    Enable the request-scoped sampling.
+
+    @param kwargs: The arguments for L{Sampler}.
+
+    @return: The new sampler.
+    @rtype: Sampler
+    """
+    global _sampler
+    _sampler = Sampler(**kwargs)
+    dbc._sampling = _sampler.state
+    return _sampler
+
+
+def disable():
+    """
+    Check all the calls again.
+    """
+    global _sampler
+    _sampler = dbc._sampling = None
+
+
+@contextmanager
+def request(sampled=None):
+    """
+    Handle the request, with the sampling decision made by the current sampler
+    (see L{Sampler.request}); if the sampling is not enabled, all the calls are checked.
+    """
+    sampler = _sampler
+    if sampler is None:
+        yield True
+    else:
+        with sampler.request(sampled) as decision:
+            yield decision
+
+
+def entry_point(function):
+    """
+    The decorator for the function handling the requests, like the request handler of a server:
+    every call of the function is handled as a L{request}.
+    """
+    @wraps(function)
+    def wrapped(*args, **kwargs):
+        with request():
+            return function(*args, **kwargs)
+    return wrapped
+
+
+def current():
+    """
+    @return: Whether the calls in the current thread are checked.
+    @rtype: bool
+    """
+    sampler = _sampler
+    return sampler is None or sampler.state.sampled
+
+
+def bind(function):
+    """
+    @return: The function which runs with the sampling decision of the current request,
+             for handing the work over to another thread (like a thread pool).
+    """
+    sampled = current()
+
+    @wraps(function)
+    def bound(*args, **kwargs):
+        with request(sampled):
+            return function(*args, **kwargs)
+    return bound
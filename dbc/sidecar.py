@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Contract sidecar files, to keep checking the contracts when the docstrings are stripped by C{python -OO}.
+
+At build time, export the contracts from the sources::
+
+    python -m dbc.sidecar PATH [PATH ...]
+
+For every module (or every module in the directory) having the functions decorated with
+C{contract_epydoc}, the contracts are written to the compact C{<module>.dbc.json} file next to it.
+When the decorated function has no docstring, C{contract_epydoc} looks for its contract
+in the sidecar file of its module (by the name of the function and its first line number,
+which are the same in the source and at runtime, unlike the enclosing scopes of the nested functions),
+without using epydoc at all. Re-export the contracts whenever the sources are changed,
+as the stale contracts are not found by the changed line numbers.
+
+>>> import os, sys, tempfile, shutil, subprocess
+>>> directory = tempfile.mkdtemp()
+>>> with open(os.path.join(directory, 'dbc_sidecar_example.py'), 'w') as fh:
+...     fh.write('''
+... from dbc import contract_epydoc
+...
+... @contract_epydoc
+... def f(a):
+...     \\"\\"\\"
+...     @type a: int
+...     @precondition: a > 0
+...     \\"\\"\\"
+...     return a
+...
+... def make():
+...     @contract_epydoc
+...     def g(b):
+...         \\"\\"\\"
+...         @precondition: b > 0
+...         \\"\\"\\"
+...         return b
+...     return g
+... ''')
+>>> export(directory) # doctest: +ELLIPSIS
+['.../dbc_sidecar_example.dbc.json']
+
+>>> env = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, os.path.dirname(os.path.dirname(__file__))]))
+>>> stderr = subprocess.Popen([sys.executable, '-OO', '-c', 'import dbc_sidecar_example as m; m.f(-1)'],
+...                           env=env, stderr=subprocess.PIPE).communicate()[1]
+>>> print stderr[stderr.index('ValueError'):] # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+ValueError: dbc_sidecar_example module (...), f():
+The following precondition results in logical False; its definition is:
+    a > 0
+and its real value is False
+
+>>> stderr = subprocess.Popen([sys.executable, '-OO', '-c', 'import dbc_sidecar_example as m; (lambda: m.make())()(-1)'],
+...                           env=env, stderr=subprocess.PIPE).communicate()[1]
+>>> print stderr[stderr.index('ValueError'):] # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+ValueError: dbc_sidecar_example module (...), <lambda>.make.g():
+The following precondition results in logical False; its definition is:
+    b > 0
+and its real value is False
+>>> shutil.rmtree(directory)
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('export', 'export_file', 'load')
+
+import os, json, optparse
+
+
+_SUFFIX = '.dbc.json'
+_VERSION = 4
+
+
+def _sidecar_path(module_path):
+    return os.path.splitext(module_path)[0] + _SUFFIX
+
+
+def _key(name, lineno):
+    return '%s:%i' % (name, lineno)
+
+
+def export_file(path):
+    """
+    Export the contracts of the functions decorated with C{contract_epydoc} in the source file.
+
+    @return: The path to the sidecar file, or C{None} if there are no contracts in the source.
+    @rtype: basestring
+
+    @raises SyntaxError: If the source or any of the contracts cannot be parsed.
+    """
+    import ast
+    from dbc.inline import DbcTransformer, parse_contract
+
+    class _Exporter(DbcTransformer):
+        def __init__(self):
+            DbcTransformer.__init__(self)
+            self.functions = {}
+
+        def visit_FunctionDef(self, node):
+            if any(self._is_contract_decorator(d) for d in node.decorator_list):
+                docstring = ast.get_docstring(node, clean=False)
+                if docstring is not None:
+                    # The line of the first decorator, like co_firstlineno of the function.
+                    self.functions[_key(node.name, node.lineno)] = parse_contract(docstring)
+            self.generic_visit(node)
+            return node
+
+    with open(path, 'rU') as fh:
+        tree = ast.parse(fh.read(), path)
+    exporter = _Exporter()
+    exporter.visit(tree)
+    if not exporter.functions:
+        return None
+
+    sidecar_path = _sidecar_path(path)
+    with open(sidecar_path, 'w') as fh:
+        json.dump({'version': _VERSION, 'functions': exporter.functions}, fh,
+                  separators=(',', ':'), sort_keys=True)
+    return sidecar_path
+
+
+def export(path):
+    """
+    Export the contracts from the source file, or from all the source files in the directory.
+
+    @return: The paths to the written sidecar files.
+    @rtype: list
+    """
+    if not os.path.isdir(path):
+        return filter(None, [export_file(path)])
+
+    result = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                sidecar_path = export_file(os.path.join(dirpath, filename))
+                if sidecar_path is not None:
+                    result.append(sidecar_path)
+    return result
+
+
+_loaded = {}  # module path -> the contracts by the key
+
+def load(module_path, name, lineno):
+    """
+    Find the contract of the function in the sidecar file of its module.
+
+    @param module_path: The path to the module (its source or compiled file).
+    @param name: The name of the function (without the names of the enclosing classes and functions).
+    @param lineno: The first line number of the function (with the decorators).
+
+    @return: The texts of the contract definitions (see L{dbc.inline.parse_contract}),
+             or C{None} if not found.
+    @rtype: dict
+    """
+    try:
+        functions = _loaded[module_path]
+    except KeyError:
+        try:
+            with open(_sidecar_path(module_path)) as fh:
+                data = json.load(fh)
+        except (IOError, ValueError):
+            functions = {}
+        else:
+            functions = data['functions'] if data.get('version') == _VERSION else {}
+        functions = _loaded[module_path] = functions
+    return functions.get(_key(name, lineno))
+
+
+def main():
+    """Export the contracts to the sidecar files
+
+    For every source file with the contracts, writes the compact sidecar file,
+    used by contract_epydoc when the docstrings are stripped by python -OO.
+    """
+    p = optparse.OptionParser(usage='%prog [options] PATH [PATH ...]\n\n' + main.__doc__)
+    options, args = p.parse_args()
+    if not args:
+        p.error('no paths')
+    for path in args:
+        for sidecar_path in export(path):
+            print sidecar_path
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Cross-process statistics of the contract-checked functions.
+
+When enabled, every call of a function decorated with C{contract_epydoc}, and every contract
+violation in it, increments a counter in a memory-mapped file. Every process has its own file
+(named after the process id) with the fixed-size slots for the functions, so the counters
+are updated without any locks or syscalls; the files from all the processes
+in the same directory are aggregated by the command line tool::
+
+    python -m dbc.stats [--format=text|prometheus] DIRECTORY
+
+In the pre-forking servers, call L{enable} in every worker after it is forked.
+
+>>> import tempfile, shutil
+>>> from dbc import contract_epydoc
+>>> directory = tempfile.mkdtemp()
+>>> stats = enable(directory)
+
+>>> @contract_epydoc
+... def f(a):
+...     '''
+...     @precondition: a > 0
+...     '''
+...     return a
+>>> f(1), f(2)
+(1, 2)
+>>> f(-1) # doctest: +ELLIPSIS
+Traceback (most recent call last):
+  ...
+ValueError: ...
+
+>>> disable()
+>>> print format_prometheus(aggregate(directory)) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+# HELP dbc_calls_total Calls of the contract-checked functions.
+# TYPE dbc_calls_total counter
+dbc_calls_total{function="dbc.stats module (...), f()"} 3
+# HELP dbc_violations_total Contract violations in the contract-checked functions.
+# TYPE dbc_violations_total counter
+dbc_violations_total{function="dbc.stats module (...), f()"} 1
+>>> shutil.rmtree(directory)
+
+@copyright: Alex Myodov <amyodov@gmail.com>
+
+@url: http://code.google.com/p/python-dbc/
+"""
+
+__all__ = ('ContractStats', 'enable', 'disable', 'aggregate', 'format_text', 'format_prometheus')
+
+import os, mmap, glob, struct, ctypes, optparse, threading
+
+import dbc
+
+
+_MAGIC = 'DBCSTATS'
+_VERSION = 1
+# magic, version, number of slots, size of the name in the slot, process id.
+_HEADER = struct.Struct('<8sIIIQ')
+_HEADER_SIZE = 64
+
+# The counters in every slot.
+CALLS, VIOLATIONS = 0, 1
+_COUNTERS = 2
+
+_FILE_PATTERN = 'dbc-%i.stats'
+
+
+def _file_size(slot_count, name_size):
+    return _HEADER_SIZE + slot_count * name_size + slot_count * _COUNTERS * 8
+
+
+def _truncate(name, size):
+    """
+    Cut the UTF-8 name from the start to fit the size, so the function name at its end is kept,
+    and no character is split.
+
+    >>> _truncate('module (path.py), f()', 32)
+    'module (path.py), f()'
+    >>> _truncate('module (path.py), f()', 11)
+    '...py), f()'
+    >>> _truncate(u'\u0444\u0443\u043d\u043a\u0446\u0438\u044f()'.encode('utf-8'), 10)
+    '...\\xd0\\xb8\\xd1\\x8f()'
+
+    @type name: str
+    @type size: int
+    @rtype: str
+    """
+    if len(name) <= size:
+        return name
+    tail = name[len(name) - size + 3:]
+    while tail and '\x80' <= tail[0] <= '\xbf':
+        tail = tail[1:]  # a continuation byte of the split character
+    return '...' + tail
+
+
+class ContractStats(object):
+    """
+    The counters of a single process, in a memory-mapped file.
+
+    The file layout is: the header; then the names of the functions for every slot,
+    C{name_size} bytes each (UTF-8, NUL-padded; the names too long are cut from the start,
+    to keep the function name); then the 64-bit counters for every slot.
+    The slots are allocated once per function, when it is called for the first time;
+    if there are no slots left, the function is not counted.
+    """
+
+    def __init__(self, path, slot_count=4096, name_size=256):
+        """
+        @param path: The file to store the counters in; it is overwritten.
+        @type path: basestring
+
+        @type slot_count: int
+        @type name_size: int
+
+        @precondition: name_size % 8 == 0
+        """
+        self.path = path
+        self.slot_count = slot_count
+        self.name_size = name_size
+        self.dropped = 0
+
+        with open(path, 'w+b') as fh:
+            fh.truncate(_file_size(slot_count, name_size))
+            self._mmap = mmap.mmap(fh.fileno(), 0)
+        _HEADER.pack_into(self._mmap, 0, _MAGIC, _VERSION, slot_count, name_size, os.getpid())
+
+        self._counters = (ctypes.c_uint64 * (slot_count * _COUNTERS)).from_buffer(
+                             self._mmap, _HEADER_SIZE + slot_count * name_size)
+        self._slots = {}  # function path -> slot index
+        self._allocate_lock = threading.Lock()
+
+    def _allocate(self, f_path):
+        """
+        @return: The index of the new slot for the function, or -1 if there are no slots left.
+        @rtype: int
+        """
+        with self._allocate_lock:
+            index = self._slots.get(f_path)
+            if index is not None:
+                return index  # allocated by another thread meanwhile
+            index = len(self._slots)
+            if index >= self.slot_count:
+                return -1
+            name = _truncate(f_path.encode('utf-8'), self.name_size)
+            offset = _HEADER_SIZE + index * self.name_size
+            self._mmap[offset:offset + len(name)] = name
+            self._slots[f_path] = index
+            return index
+
+    def count(self, f_path, counter):
+        """
+        Increment the counter for the function.
+
+        @param counter: Either L{CALLS} or L{VIOLATIONS}.
+        """
+        index = self._slots.get(f_path)
+        if index is None:
+            index = self._allocate(f_path)
+        if index >= 0:
+            self._counters[index * _COUNTERS + counter] += 1
+        else:
+            self.dropped += 1
+
+    def close(self):
+        del self._counters
+        self._mmap.close()
+
+
+def read_file(path):
+    """
+    Read the counters from the file written by any process.
+
+    @return: The counters for every function, by the function path.
+    @rtype: dict
+    """
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    magic, version, slot_count, name_size, pid = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('%s is not a dbc statistics file.' % path)
+
+    counters_offset = _HEADER_SIZE + slot_count * name_size
+    result = {}
+    for index in xrange(slot_count):
+        name_offset = _HEADER_SIZE + index * name_size
+        name = data[name_offset:name_offset + name_size].rstrip('\0')
+        if not name:
+            break
+        result[name.decode('utf-8', 'replace')] = struct.unpack_from('<%iQ' % _COUNTERS,
+                                                                     data,
+                                                                     counters_offset + index * _COUNTERS * 8)
+    return result
+
+
+def aggregate(directory):
+    """
+    Sum up the counters from the files of all the processes in the directory.
+
+    @return: The C{(calls, violations)} for every function, by the function path.
+    @rtype: dict
+    """
+    result = {}
+    for path in sorted(glob.glob(os.path.join(directory, _FILE_PATTERN.replace('%i', '*')))):
+        for name, counters in read_file(path).iteritems():
+            total = result.get(name, (0,) * _COUNTERS)
+            result[name] = tuple(a + b for a, b in zip(total, counters))
+    return result
+
+
+def format_text(stats):
+    """
+    @param stats: The result of L{aggregate}.
+    @rtype: basestring
+    """
+    lines = ['%12s %12s  %s' % ('calls', 'violations', 'function')]
+    lines.extend('%12i %12i  %s' % (calls, violations, name)
+                     for name, (calls, violations) in sorted(stats.iteritems()))
+    return '\n'.join(lines)
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_prometheus(stats):
+    """
+    @param stats: The result of L{aggregate}.
+    @return: The statistics in the Prometheus text exposition format
+        (suitable for the node exporter textfile collector).
+    @rtype: basestring
+    """
+    lines = []
+    for metric, counter, description in (('dbc_calls_total', CALLS,
+                                          'Calls of the contract-checked functions.'),
+                                         ('dbc_violations_total', VIOLATIONS,
+                                          'Contract violations in the contract-checked functions.')):
+        lines.append('# HELP %s %s' % (metric, description))
+        lines.append('# TYPE %s counter' % metric)
+        lines.extend('%s{function="%s"} %i' % (metric, _escape_label(name), counters[counter])
+                         for name, counters in sorted(stats.iteritems()))
+    return '\n'.join(lines)
+
+
+def enable(directory, **kwargs):
+    """
+    Start counting the calls and violations of the current process,
+    in the file named after the process id in the directory.
+
+    @param kwargs: The extra arguments for L{ContractStats}.
+
+    @rtype: ContractStats
+    """
+    disable()
+    stats = ContractStats(os.path.join(directory, _FILE_PATTERN % os.getpid()), **kwargs)
+    dbc._stats = stats
+    return stats
+
+
+def disable():
+    """
+    Stop counting (the file is left for the aggregation).
+    """
+    stats, dbc._stats = dbc._stats, None
+    if stats is not None:
+        stats.close()
+
+
+def main():
+    """Aggregate the contract statistics of all the processes
+
+    Sums up the counters from all the statistics files in the directory
+    and prints them in the text or Prometheus textfile format.
+    """
+    p = optparse.OptionParser(usage='%prog [options] DIRECTORY\n\n' + main.__doc__)
+    p.add_option('-f', '--format', choices=('text', 'prometheus'), default='text',
+                 help='output format: text (default) or prometheus')
+    options, args = p.parse_args()
+    if len(args) != 1:
+        p.error('incorrect args')
+
+    stats = aggregate(args[0])
+    if options.format == 'prometheus':
+        print format_prometheus(stats)
+    else:
+        print format_text(stats)
+
+
+if __name__ == '__main__':
+    main()
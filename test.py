@@ -9,8 +9,11 @@ Design by Contract in Python - test module.
 @url: http://code.google.com/p/python-dbc/
 """
 from dbc import contract_epydoc
+from dbc.records import record
 import test
-from types import LambdaType
+from types import LambdaType, NoneType
+import imp
+from array import array
 
 
 @contract_epydoc
@@ -31,6 +34,87 @@ def f1(a1):
         return "%sdef" % a1
 
 
+@contract_epydoc
+def f2(a2):
+    """
+    @type a2: list
+
+    @precondition: all(isinstance(i, int) for i in a2)
+    @precondition: len(a2) > 0
+    """
+    return sum(a2)
+
+
+@contract_epydoc
+def f3(a3):
+    """
+    @precondition: a3 is not None
+    @precondition: len(a3) > 1
+    @precondition: len(a3) < 5 or a3[0] == len(a3)
+
+    @postcondition: len(result) == len(a3) - 1
+    """
+    return a3[1:]
+
+
+@contract_epydoc
+def f4(a4, i4):
+    """
+    @type a4: array
+    @range a4: [0.0, 1.0]
+    @range i4: [0, len(a4))
+
+    @rrange: (0.0, None)
+    """
+    return a4[i4] + 1.0
+
+
+@contract_epydoc
+def f5(a5, b5, n5):
+    """
+    @shape a5: (n5,)
+    @dtype a5: float64
+    @shape b5: (m,)
+
+    @rshape: (m,)
+    @rdtype: float32, float64
+    """
+    return b5
+
+
+@contract_epydoc
+def f7(a7):
+    """
+    @range a7: [0, 1]
+    """
+    return float(sum(a7))
+
+
+_namespaces = []
+
+@contract_epydoc
+def f6(a6, **kwargs):
+    """
+    @precondition: _namespaces.append((globals(), locals())) is None
+    @precondition: a6 > 0
+    @postcondition: _namespaces.append((globals(), locals())) is None
+    """
+    return a6
+
+
+@record
+class R1(object):
+    """
+    @ivar name: The name.
+    @type name: str
+    @ivar parent: The parent, if any.
+    @type parent: (R1, NoneType)
+    @ivar tags: Unchecked.
+    """
+    parent = None
+    tags = ()
+
+
 def test_sanity_good():
     """
     >>> print f1('abcd') # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
@@ -61,6 +145,241 @@ def test_sanity_bad():
     and its real value is False
     """
 
+def test_preconditions():
+    """
+    The preconditions are checked on every call, whatever order they are evaluated in;
+    the violations are reported as declared.
+
+    >>> f2([1, 2])
+    3
+
+    >>> r = f2([]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f2():
+    The following precondition results in logical False; its definition is:
+        len(a2) > 0
+    and its real value is False
+
+    >>> r = f2(['abc']) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f2():
+    The following precondition results in logical False; its definition is:
+        all(isinstance(i, int) for i in a2)
+    and its real value is False
+
+    >>> r = f2([]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f2():
+    The following precondition results in logical False; its definition is:
+        len(a2) > 0
+    and its real value is False
+    """
+
+
+def test_fused_clauses():
+    """
+    The clauses are evaluated together, the shared subexpressions computed once;
+    still, the clauses guarded by the preceding ones are not evaluated
+    and the violations are reported as declared.
+
+    >>> f3([1, 2]), f3([6, 1, 2, 3, 4, 5])
+    ([2], [1, 2, 3, 4, 5])
+
+    >>> r = f3(None) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f3():
+    The following precondition results in logical False; its definition is:
+        a3 is not None
+    and its real value is False
+
+    >>> r = f3([1, 2, 3, 4, 5]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f3():
+    The following precondition results in logical False; its definition is:
+        len(a3) < 5 or a3[0] == len(a3)
+    and its real value is False
+    """
+
+
+def test_fused_reordering():
+    """
+    The preconditions are reordered by their measured cost first,
+    and evaluated together in that order once it settles.
+
+    >>> contract = f3._dbc_contract
+    >>> contract.precondition_schedule is not None, contract.fused_preconditions is None
+    (True, True)
+    >>> for i in xrange(4096):
+    ...     r = f3([1, 2])
+    >>> contract.precondition_schedule is None, contract.fused_preconditions is not None
+    (True, True)
+
+    >>> r = f3([1, 2, 3, 4, 5]) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f3():
+    The following precondition results in logical False; its definition is:
+        len(a3) < 5 or a3[0] == len(a3)
+    and its real value is False
+    """
+
+
+def test_caller():
+    """
+    The violations of the argument types and of the preconditions are attributed to the caller;
+    the violations of the return value and of the postconditions are not.
+
+    >>> def call(function, *args):
+    ...     try:
+    ...         function(*args)
+    ...     except (TypeError, ValueError), e:
+    ...         return getattr(e, 'caller', None)
+
+    >>> caller = call(f2, [])
+    >>> caller.function, caller.lineno == call.func_code.co_firstlineno + 2
+    ('call', True)
+    >>> call(f1, 1).function
+    'call'
+    >>> call(f1, 'bad postcondition') is None
+    True
+    """
+
+
+def test_ranges():
+    """
+    >>> f4(array('d', [0.0, 0.5, 1.0]), 1)
+    1.5
+
+    >>> f4(array('d', [0.0, 1.5]), 1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f4():
+    The 'a4' argument is out of the [0.0, 1.0] range; its value is array('d', [0.0, 1.5])
+
+    >>> f4(array('d', [0.5]), 1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f4():
+    The 'i4' argument is out of the [0, len(a4)) range; its value is 1
+
+    >>> f4(array('d', [0.0]), 0.0 - 1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f4():
+    The 'i4' argument is out of the [0, len(a4)) range; its value is -1.0
+
+    >>> f4(array('d', [0.0]), '0') # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: __main__ module (...), f4():
+    The 'i4' argument is of <type 'str'> while must be a real number or an array of them,
+    within the [0, len(a4)) range; its value is '0'
+    """
+
+
+def test_ranges_numpy():
+    """
+    The NumPy arrays are checked by their minimum and maximum.
+
+    >>> import numpy
+    >>> f7(numpy.array([0.0, 0.5]))
+    0.5
+    >>> f7(numpy.array([], dtype=numpy.int32))
+    0.0
+
+    >>> f7(numpy.array([0.5, 1.5])) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f7():
+    The 'a7' argument is out of the [0, 1] range; its value is array(...)
+
+    >>> f7(numpy.array(['a'])) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: __main__ module (...), f7():
+    The 'a7' argument is of <type 'numpy.ndarray'> while must be a real number or an array of them,
+    within the [0, 1] range; its value is array(...)
+    """
+
+try:
+    imp.find_module('numpy')
+except ImportError:
+    del test_ranges_numpy  # skipped without NumPy
+
+
+def test_arrays():
+    """
+    >>> f5(array('d', [1.0, 2.0]), array('f', [3.0]), 2)
+    array('f', [3.0])
+
+    >>> f5(array('d', [1.0, 2.0]), array('f', [3.0]), 3) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    ValueError: __main__ module (...), f5():
+    The 'a5' argument is of (2,) shape while must be of (n5,) shape (where n5=3); its value is array('d', [1.0, 2.0])
+
+    >>> f5(array('i', [1, 2]), array('f', [3.0]), 2) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: __main__ module (...), f5():
+    The 'a5' argument is of int32 dtype while must be of float64 dtype; its value is array('i', [1, 2])
+
+    >>> f5(array('d', [1.0]), array('i', [3]), 1) # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: __main__ module (...), f5():
+    The return value is of int32 dtype while must be of float32, float64 dtype; its value is array('i', [3])
+    """
+
+
+def test_namespaces():
+    """
+    The clauses are evaluated right in the module globals and in the dictionary of the arguments,
+    which are not copied for every clause, nor between the preconditions and the postconditions.
+
+    >>> f6(1)
+    1
+    >>> import sys
+    >>> (pre_globals, pre_locals), (post_globals, post_locals) = _namespaces
+    >>> pre_globals is sys.modules[f6.__module__].__dict__ is post_globals, pre_locals is post_locals
+    (True, True)
+    """
+
+
+def test_records():
+    """
+    The type definitions may refer to the record class itself, as they are evaluated
+    on the first assignment; the violations are attributed to the code assigning the value.
+
+    >>> root = R1('root')
+    >>> child = R1('child', root, tags=[1])
+    >>> child.parent.name, child.tags, R1.__slots__
+    ('root', [1], ('name', 'parent', 'tags'))
+
+    >>> R1('bad', parent='root') # doctest: +ELLIPSIS, +NORMALIZE_WHITESPACE
+    Traceback (most recent call last):
+      ...
+    TypeError: __main__ module (...), R1:
+    The 'parent' attribute is of <type 'str'> while must be of (<class '__main__.R1'>, <type 'NoneType'>); its value is 'root'
+
+    >>> def assign(value):
+    ...     try:
+    ...         child.name = value
+    ...     except TypeError, e:
+    ...         return e.caller.function
+    >>> assign(42)
+    'assign'
+    >>> del child.tags
+    >>> child
+    R1(name='child', parent=R1(name='root', parent=None, tags=()))
+    """
+
+
 def test_sanity_remote_bad():
     """
     >> tuptup = tuple